@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""Benchmark the divan bench tools themselves on synthetic data.
+
+Each benchmark runs a tool function on logs and results generated by
+synth_divan.py at several scales, and reports its timing in the JSON format
+of parse_divan.py, so results can be compared against a stored baseline
+with compare_divan.py, like any other benchmark run.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+from compare_divan import (
+    ComparisonThresholds,
+    generate_comparison,
+    generate_markdown,
+    load_benchmarks,
+    load_metric_values,
+)
+from parse_divan import ResultTable, parse_divan_output
+from synth_divan import divan_log_lines, synthetic_rows
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterator
+
+DEFAULT_SCALES = (1_000, 10_000, 100_000)
+
+# Metric results are compared on: the median is the least sensitive to outliers
+BASELINE_METRIC = "median"
+
+
+@dataclass
+class ToolBenchmark:
+    """Timing and peak memory of one tool function at one scale."""
+
+    name: str
+    scale: int
+    times_ns: list[int]
+    peak_bytes: int
+
+    @property
+    def throughput(self) -> float:
+        """Benchmarks processed per second, based on the median time."""
+        return self.scale / (statistics.median(self.times_ns) / 1e9)
+
+    def to_dict(self) -> dict[str, Any]:
+        """Convert to the JSON format of parse_divan.py, plus peak memory."""
+        return {
+            "name": f"{self.name}/{self.scale}",
+            "fastest": {"value": min(self.times_ns), "unit": "ns"},
+            "slowest": {"value": max(self.times_ns), "unit": "ns"},
+            "median": {"value": round(statistics.median(self.times_ns)), "unit": "ns"},
+            "mean": {"value": round(statistics.fmean(self.times_ns)), "unit": "ns"},
+            "samples": len(self.times_ns),
+            "iters": 1,
+            "peak_bytes": self.peak_bytes,
+        }
+
+
+def measure(name: str, scale: int, function: Callable[[], object], repeat: int) -> ToolBenchmark:
+    """Time function repeat times, then measure its peak memory in one more run.
+
+    Memory is traced in a separate run, as tracing slows every allocation.
+    """
+    times_ns = []
+    for _ in range(repeat):
+        start = time.perf_counter_ns()
+        function()
+        times_ns.append(time.perf_counter_ns() - start)
+
+    tracemalloc.start()
+    try:
+        function()
+        peak_bytes = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return ToolBenchmark(name, scale, times_ns, peak_bytes)
+
+
+def run_benchmarks(scales: list[int], repeat: int, *, seed: int = 0) -> Iterator[ToolBenchmark]:
+    """Benchmark each tool function at each scale.
+
+    Args:
+        scales: Numbers of benchmarks in the generated inputs.
+        repeat: Timed runs per benchmark.
+        seed: Seed of the generated inputs.
+
+    Yields:
+        One ToolBenchmark per function and scale.
+
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        for scale in scales:
+            log = "\n".join(divan_log_lines(synthetic_rows(scale, seed=seed))) + "\n"
+            base_path = Path(tmp) / f"base_{scale}.json"
+            pr_path = Path(tmp) / f"pr_{scale}.json"
+            for path, drift in ((base_path, 0.0), (pr_path, 0.2)):
+                with path.open("w", encoding="utf-8") as stream:
+                    ResultTable.from_rows(synthetic_rows(scale, seed=seed, drift=drift)).write_json(stream)
+
+            yield measure("parse/parse_divan_output", scale, lambda log=log: parse_divan_output(log), repeat)
+            yield measure("compare/load_benchmarks", scale, lambda path=pr_path: load_benchmarks(path, "mean"), repeat)
+
+            base = load_metric_values(base_path, "mean")
+            pr = load_metric_values(pr_path, "mean")
+            yield measure(
+                "compare/generate_comparison",
+                scale,
+                lambda base=base, pr=pr: generate_comparison(base, pr),
+                repeat,
+            )
+
+            comparisons = generate_comparison(base, pr)
+            yield measure(
+                "compare/generate_markdown",
+                scale,
+                lambda comparisons=comparisons: generate_markdown(comparisons, "Benchmarks"),
+                repeat,
+            )
+
+
+def format_summary(benchmarks: list[ToolBenchmark]) -> str:
+    """Format throughput and peak memory of each benchmark as a plain-text table."""
+    lines = [f"{'benchmark':<40} {'median':>12} {'benchmarks/s':>14} {'peak memory':>12}"]
+    for benchmark in benchmarks:
+        median_ms = statistics.median(benchmark.times_ns) / 1e6
+        lines.append(
+            f"{benchmark.name + '/' + str(benchmark.scale):<40} {median_ms:>9.2f} ms "
+            f"{benchmark.throughput:>14,.0f} {benchmark.peak_bytes / 1024 / 1024:>8.1f} MiB"
+        )
+    return "\n".join(lines) + "\n"
+
+
+def _parse_scales(value: str) -> list[int]:
+    """Parse a comma-separated list of positive scales."""
+    scales = [int(scale) for scale in value.split(",")]
+    if any(scale < 1 for scale in scales):
+        msg = "scales must be positive"
+        raise argparse.ArgumentTypeError(msg)
+    return scales
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Benchmark the divan bench tools on synthetic data.",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument(
+        "--scales",
+        type=_parse_scales,
+        default=list(DEFAULT_SCALES),
+        help="Comma-separated numbers of benchmarks to generate (e.g. 1000,1000000)",
+    )
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per benchmark")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the generated inputs")
+    parser.add_argument("-o", "--output", help="Write results as parse_divan.py JSON to this file")
+    parser.add_argument(
+        "--baseline",
+        help="Results of a previous run to compare against; the comparison report is printed",
+    )
+    parser.add_argument(
+        "--error-threshold",
+        type=float,
+        default=10.0,
+        help="Slowdown against the baseline (in %%) that counts as a regression",
+    )
+
+    args = parser.parse_args()
+    if args.repeat < 1:
+        parser.error("--repeat must be at least 1")
+
+    benchmarks = []
+    for benchmark in run_benchmarks(args.scales, args.repeat, seed=args.seed):
+        benchmarks.append(benchmark)
+        print(format_summary([benchmark]).splitlines()[1], file=sys.stderr, flush=True)
+    print(format_summary(benchmarks))
+
+    results = [benchmark.to_dict() for benchmark in benchmarks]
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2) + "\n")
+
+    if args.baseline:
+        thresholds = ComparisonThresholds(warn=args.error_threshold / 2, error=args.error_threshold)
+        current = {result["name"]: result[BASELINE_METRIC]["value"] for result in results}
+        comparisons = generate_comparison(
+            load_metric_values(args.baseline, BASELINE_METRIC),
+            current,
+            BASELINE_METRIC,
+            thresholds=thresholds,
+        )
+        print(generate_markdown(comparisons, "Tool benchmarks", thresholds=thresholds))
+        if any(comparison.indicator == "❌" for comparison in comparisons):
+            sys.exit(1)
@@ -0,0 +1,495 @@
+#!/usr/bin/env python3
+"""Find the commit that introduced a benchmark regression.
+
+Given a good and a bad commit of a local git repository, this script
+checks out commits in between, as git bisect would, runs only the
+benchmarks matching a filter at each, and classifies each commit as bad
+when a benchmark that regressed between good and bad crosses the error
+threshold against the good commit (as in compare_divan.get_change_indicator).
+
+Bench output is parsed as it is printed (see compare_divan.run_bench_command),
+and the results at each commit are cached under the commit and the command,
+so rerunning a bisect, or bisecting another regression of the same range,
+never measures a commit twice.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import re
+import shlex
+import subprocess
+import sys
+from dataclasses import dataclass, field, replace
+from enum import Enum
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from cache_divan import DEFAULT_CACHE_SIZE, ReportCache, cache_key
+from compare_divan import (
+    TIMED_METRICS,
+    BenchOptions,
+    ComparisonThresholds,
+    calculate_change,
+    format_time,
+    get_change_indicator,
+    run_bench_command,
+    write_report,
+)
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Sequence
+
+# Replaced by the benchmark filter in the bench command template
+FILTER_PLACEHOLDER = "{filter}"
+
+# Directory of the measurement cache, relative to the repository's git directory
+DEFAULT_CACHE_DIR = "divan-bisect"
+
+# File extension of cached measurements
+MEASUREMENT_SUFFIX = ".json"
+
+# Bumped whenever the layout of cached measurements changes
+MEASUREMENT_FORMAT_VERSION = 1
+
+# Length of commit hashes in reports
+SHORT_SHA_LENGTH = 12
+
+
+class BisectError(Exception):
+    """Raised when a bisect cannot be started or carried out."""
+
+
+class Verdict(Enum):
+    """Classification of a tested commit."""
+
+    GOOD = "good"
+    BAD = "bad"
+    SKIP = "skip"
+
+
+@dataclass
+class Commit:
+    """A commit in the bisected range."""
+
+    sha: str
+    subject: str
+
+    @property
+    def short_sha(self) -> str:
+        """Abbreviated hash for reports."""
+        return self.sha[:SHORT_SHA_LENGTH]
+
+
+@dataclass
+class Measurement:
+    """Values of the bisected benchmarks at a commit, and its verdict."""
+
+    commit: Commit
+    # Metric value of each benchmark matching the filter, keyed by name
+    values: dict[str, int | None]
+    verdict: Verdict
+    # Whether the values came from the cache rather than a bench run
+    cached: bool = False
+
+
+@dataclass
+class BisectResult:
+    """Outcome of a bisect."""
+
+    # Commits of the range, from the good commit to the bad one
+    commits: list[Commit]
+    # Benchmarks that regressed between the good and bad commits
+    regressed: list[str]
+    # Measurements in the order commits were tested
+    measurements: list[Measurement] = field(default_factory=list)
+    # Indices in commits of the last good and the first bad commit found
+    good: int = 0
+    bad: int = 0
+
+    @property
+    def culprits(self) -> list[Commit]:
+        """Commits one of which introduced the regression: just the first bad one, unless commits were skipped."""
+        return self.commits[self.good + 1 : self.bad + 1]
+
+
+def bisect_indices(count: int, test: Callable[[int], Verdict]) -> tuple[int, int]:
+    """Binary search a range of count commits whose first is good and last is bad.
+
+    Like git bisect, a skipped commit is stepped around: the untested
+    commit closest to the middle of the remaining range is tested instead.
+
+    Args:
+        count: Number of commits in the range, at least 2.
+        test: Tests the commit at an index of the range.
+
+    Returns:
+        The indices of the last good and the first bad commit found; more
+        than one apart if every commit between them was skipped.
+
+    """
+    good, bad = 0, count - 1
+    skipped: set[int] = set()
+    while True:
+        candidates = [index for index in range(good + 1, bad) if index not in skipped]
+        if not candidates:
+            return good, bad
+        middle = (good + bad) // 2
+        index = min(candidates, key=lambda candidate: (abs(candidate - middle), candidate))
+        verdict = test(index)
+        if verdict is Verdict.GOOD:
+            good = index
+        elif verdict is Verdict.BAD:
+            bad = index
+        else:
+            skipped.add(index)
+
+
+def classify(
+    base: dict[str, int | None],
+    values: dict[str, int | None],
+    names: Sequence[str],
+    thresholds: ComparisonThresholds,
+) -> Verdict:
+    """Classify a commit from its values of the regressed benchmarks.
+
+    A commit is bad if any of them crosses the error threshold against the
+    good commit, and skipped if none does but some were not measured.
+    """
+    missing = False
+    for name in names:
+        value = values.get(name)
+        if value is None:
+            missing = True
+        elif get_change_indicator(calculate_change(base[name], value), thresholds) == "❌":
+            return Verdict.BAD
+    return Verdict.SKIP if missing else Verdict.GOOD
+
+
+def _git(repo: Path, *args: str) -> str:
+    """Run a git command in repo and return its output.
+
+    Raises:
+        BisectError: If git cannot be run or fails.
+
+    """
+    try:
+        completed = subprocess.run(  # noqa: S603
+            ["git", *args],  # noqa: S607
+            cwd=repo,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+    except OSError as e:
+        raise BisectError(f"Cannot run git: {e}") from e
+    except subprocess.CalledProcessError as e:
+        raise BisectError(f"git {args[0]} failed: {e.stderr.strip()}") from e
+    return completed.stdout
+
+
+def list_commits(repo: Path, good: str, bad: str) -> list[Commit]:
+    """List the commits from good to bad, both included, oldest first.
+
+    Only the first-parent chain from good to bad is bisected, so a merged
+    branch is tested as a whole, at its merge commit.
+
+    Raises:
+        BisectError: If a ref cannot be resolved, or good is not an ancestor of bad.
+
+    """
+    good_sha = _git(repo, "rev-parse", "--verify", f"{good}^{{commit}}").strip()
+    bad_sha = _git(repo, "rev-parse", "--verify", f"{bad}^{{commit}}").strip()
+    try:
+        _git(repo, "merge-base", "--is-ancestor", good_sha, bad_sha)
+    except BisectError as e:
+        raise BisectError(f"Good commit '{good}' is not an ancestor of bad commit '{bad}'") from e
+
+    log = _git(
+        repo, "log", "--reverse", "--first-parent", "--ancestry-path", "--format=%H%x00%s", f"{good_sha}..{bad_sha}"
+    )
+    commits = [Commit(good_sha, _git(repo, "log", "-1", "--format=%s", good_sha).strip())]
+    for line in log.splitlines():
+        sha, _, subject = line.partition("\0")
+        commits.append(Commit(sha, subject))
+    if len(commits) < 2 or commits[-1].sha != bad_sha:  # noqa: PLR2004
+        raise BisectError(f"No first-parent path from good commit '{good}' to bad commit '{bad}'")
+    return commits
+
+
+class CommitMeasurer:
+    """Measures the filtered benchmarks at commits of a repository, caching the results.
+
+    Commits are checked out in the repository itself, as git bisect does,
+    so its working tree must be clean; the original checkout is restored
+    by restore().
+    """
+
+    def __init__(
+        self,
+        repo: Path,
+        command: Sequence[str],
+        name_filter: str,
+        cache: ReportCache | None = None,
+        options: BenchOptions | None = None,
+    ) -> None:
+        """Prepare to measure benchmarks in repo.
+
+        The bench command is run with options (see
+        compare_divan.run_bench_command), in repo; only the results named by
+        name_filter are kept, and of those only options.metric.
+
+        Raises:
+            BisectError: If the working tree has uncommitted changes.
+
+        """
+        if _git(repo, "status", "--porcelain", "--untracked-files=no").strip():
+            raise BisectError(f"The working tree of '{repo}' has uncommitted changes")
+        self.repo = repo
+        self.command = list(command)
+        self.pattern = re.compile(name_filter)
+        self.cache = cache
+        self.options = replace(options or BenchOptions(), cwd=repo)
+        self.original = _git(repo, "rev-parse", "--abbrev-ref", "HEAD").strip()
+        if self.original == "HEAD":
+            self.original = _git(repo, "rev-parse", "HEAD").strip()
+
+    def _cache_key(self, commit: Commit) -> str:
+        options = {
+            "version": MEASUREMENT_FORMAT_VERSION,
+            "commit": commit.sha,
+            "command": self.command,
+            "namespace_binaries": self.options.namespace_binaries,
+        }
+        return cache_key([], options)
+
+    def _run(self, commit: Commit) -> dict[str, dict[str, int | None]] | None:
+        """Check out commit and run the bench command, returning its results, or None if it failed."""
+        _git(self.repo, "checkout", "--quiet", "--detach", commit.sha)
+        if self.options.echo is not None:
+            self.options.echo.write(f"Measuring {commit.short_sha} {commit.subject}\n")
+        try:
+            run = asyncio.run(run_bench_command(self.command, {}, self.options))
+        except OSError as e:
+            raise BisectError(f"Cannot run '{shlex.join(self.command)}': {e}") from e
+        if run.returncode != 0:
+            return None
+        return run.pr_columns
+
+    def measure(self, commit: Commit) -> tuple[dict[str, int | None], bool]:
+        """Measure the benchmarks matching the filter at commit.
+
+        Returns:
+            Their values keyed by name, empty if the bench command failed,
+            and whether they came from the cache. Failed runs are not cached.
+
+        """
+        key = self._cache_key(commit)
+        text = self.cache.get(key) if self.cache is not None else None
+        cached = text is not None
+        if text is not None:
+            columns = json.loads(text)
+        else:
+            columns = self._run(commit)
+            if columns is None:
+                return {}, False
+            if self.cache is not None:
+                self.cache.put(key, json.dumps(columns))
+        values = {name: value for name, value in columns[self.options.metric].items() if self.pattern.search(name)}
+        return values, cached
+
+    def restore(self) -> None:
+        """Check out what was checked out before measuring."""
+        _git(self.repo, "checkout", "--quiet", self.original)
+
+
+def run_bisect(
+    commits: list[Commit],
+    measure: Callable[[Commit], tuple[dict[str, int | None], bool]],
+    thresholds: ComparisonThresholds | None = None,
+) -> BisectResult:
+    """Bisect a range of commits for the first one where the filtered benchmarks regressed.
+
+    Args:
+        commits: The range, from the good commit to the bad one (see list_commits).
+        measure: Measures the benchmarks at a commit (see CommitMeasurer.measure).
+        thresholds: Thresholds for change indicators; a commit is bad once
+            a benchmark crosses the error threshold.
+
+    Raises:
+        BisectError: If no benchmark was measured at the good commit, or
+            none regressed between the good and bad commits.
+
+    """
+    if thresholds is None:
+        thresholds = ComparisonThresholds()
+    good_values, cached = measure(commits[0])
+    base = {name: value for name, value in good_values.items() if value is not None}
+    if not base:
+        raise BisectError(f"No benchmark matching the filter was measured at good commit {commits[0].short_sha}")
+    bad_values, bad_cached = measure(commits[-1])
+    regressed = [name for name in base if classify(base, bad_values, [name], thresholds) is Verdict.BAD]
+    if not regressed:
+        raise BisectError(
+            f"No benchmark matching the filter crossed the {thresholds.error:g}% error threshold "
+            f"between {commits[0].short_sha} and {commits[-1].short_sha}"
+        )
+
+    result = BisectResult(commits, sorted(regressed))
+    result.measurements.append(Measurement(commits[0], good_values, Verdict.GOOD, cached))
+    result.measurements.append(Measurement(commits[-1], bad_values, Verdict.BAD, bad_cached))
+
+    def test(index: int) -> Verdict:
+        values, cached = measure(commits[index])
+        verdict = classify(base, values, result.regressed, thresholds)
+        result.measurements.append(Measurement(commits[index], values, verdict, cached))
+        return verdict
+
+    result.good, result.bad = bisect_indices(len(commits), test)
+    return result
+
+
+def generate_bisect_markdown(
+    result: BisectResult,
+    title: str,
+    thresholds: ComparisonThresholds | None = None,
+) -> str:
+    """Generate a markdown report of a bisect.
+
+    Args:
+        result: The bisect to report.
+        title: Title for the report header.
+        thresholds: Thresholds for change indicators.
+
+    Returns:
+        Markdown-formatted report string, naming the first bad commit and
+        listing the tested commits oldest first.
+
+    """
+    if thresholds is None:
+        thresholds = ComparisonThresholds()
+    base = result.measurements[0].values
+    tested = sorted(result.measurements, key=lambda measurement: result.commits.index(measurement.commit))
+    cached = sum(measurement.cached for measurement in result.measurements)
+
+    lines = [
+        f"## {title}",
+        "",
+        (
+            f"<sub>{len(result.commits) - 1} commit(s) after good {result.commits[0].short_sha} up to bad "
+            f"{result.commits[-1].short_sha}, {len(tested)} tested ({cached} from cache)</sub>"
+        ),
+        "",
+    ]
+    culprits = result.culprits
+    if len(culprits) == 1:
+        lines.append(f"**First bad commit:** `{culprits[0].short_sha}` {culprits[0].subject}")
+    else:
+        lines.append(f"**The first bad commit is one of {len(culprits)}**, as the others could not be measured:")
+        lines.append("")
+        lines.extend(f"- `{commit.short_sha}` {commit.subject}" for commit in culprits)
+    lines.append("")
+    lines.append("| Commit | Verdict | Benchmark | Value | Change |")
+    lines.append("|--------|---------|-----------|-------|--------|")
+    for measurement in tested:
+        for name in result.regressed:
+            value = measurement.values.get(name)
+            change = ""
+            if value is not None:
+                change_pct = calculate_change(base[name], value)
+                change = f"{change_pct:+.1f}% {get_change_indicator(change_pct, thresholds)}".rstrip()
+            lines.append(
+                f"| `{measurement.commit.short_sha}` | {measurement.verdict.value} | `{name}` | "
+                f"{format_time(value)} | {change} |"
+            )
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Find the commit between a good and a bad one that made matching benchmarks regress.",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument("good", help="Commit (or any git ref) where the benchmarks were fast")
+    parser.add_argument("bad", help="Later commit (or any git ref) where they had regressed")
+    parser.add_argument(
+        "--filter", required=True, help="Regular expression selecting the benchmarks to bisect, by name"
+    )
+    parser.add_argument(
+        "--command",
+        required=True,
+        help=f"Bench command run at each commit, where {FILTER_PLACEHOLDER} is replaced by the filter "
+        f"(e.g. 'cargo bench --bench hashing -- {FILTER_PLACEHOLDER}'); its output is echoed to stderr",
+    )
+    parser.add_argument("--repo", default=".", help="Git repository to bisect, whose working tree must be clean")
+    parser.add_argument("--title", default="Benchmark bisect", help="Title for the report header")
+    parser.add_argument("--metric", default="mean", choices=TIMED_METRICS, help="Metric to use for comparison")
+    parser.add_argument(
+        "--improvement-threshold",
+        type=float,
+        default=1.0,
+        help="Threshold for detecting improvements (in %%)",
+    )
+    parser.add_argument(
+        "--warn-threshold",
+        type=float,
+        default=5.0,
+        help="Threshold for warning indicator (in %%)",
+    )
+    parser.add_argument(
+        "--error-threshold",
+        type=float,
+        default=10.0,
+        help="Threshold for error/regression indicator (in %%); a commit crossing it is bad",
+    )
+    parser.add_argument(
+        "--namespace-binaries",
+        action="store_true",
+        help="Prefix names with their bench binary, as parse_divan.py --namespace-binaries does",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        help=f"Directory caching the results at each commit (default: {DEFAULT_CACHE_DIR} in the git directory)",
+    )
+    parser.add_argument("--no-cache", action="store_true", help="Measure every tested commit, caching nothing")
+    parser.add_argument("-o", "--output", help="Output file")
+
+    args = parser.parse_args()
+
+    try:
+        re.compile(args.filter)
+    except re.error as e:
+        parser.error(f"--filter is not a valid regular expression: {e}")
+    thresholds = ComparisonThresholds(
+        improvement=-abs(args.improvement_threshold),
+        warn=args.warn_threshold,
+        error=args.error_threshold,
+    )
+    command = [token.replace(FILTER_PLACEHOLDER, args.filter) for token in shlex.split(args.command)]
+    repo = Path(args.repo)
+
+    try:
+        cache = None
+        if not args.no_cache:
+            cache_dir = args.cache_dir
+            if cache_dir is None:
+                git_dir = _git(repo, "rev-parse", "--absolute-git-dir").strip()
+                cache_dir = Path(git_dir) / DEFAULT_CACHE_DIR
+            try:
+                cache = ReportCache(cache_dir, DEFAULT_CACHE_SIZE, MEASUREMENT_SUFFIX)
+            except OSError as e:
+                raise BisectError(f"Cannot open cache directory '{cache_dir}': {e}") from e
+        commits = list_commits(repo, args.good, args.bad)
+        options = BenchOptions(args.metric, namespace_binaries=args.namespace_binaries, echo=sys.stderr)
+        measurer = CommitMeasurer(repo, command, args.filter, cache, options)
+        try:
+            result = run_bisect(commits, measurer.measure, thresholds)
+        finally:
+            measurer.restore()
+    except BisectError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    write_report(generate_bisect_markdown(result, args.title, thresholds), args.output)
@@ -0,0 +1,149 @@
+"""Content-addressed cache of rendered comparison reports.
+
+compare_divan.py is often rerun on the same base and PR files (re-triggered
+CI jobs, matrix fan-out, comment bots). Reports are stored in a cache
+directory under a hash of the input file contents and of every option that
+affects the output, so a rerun can skip loading and comparing altogether.
+
+The cache is safe to share between parallel jobs: entries are written to a
+temporary file and atomically renamed into place, and entries removed by
+another job's eviction are treated as misses.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import tempfile
+import time
+from contextlib import suppress
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from collections.abc import Sequence
+
+# Bumped whenever the layout of cache entries changes
+CACHE_FORMAT_VERSION = 1
+
+# Default size limit of a cache directory, in bytes
+DEFAULT_CACHE_SIZE = 100 * 1024 * 1024
+
+# File extension of cache entries
+CACHE_ENTRY_SUFFIX = ".md"
+
+# File extension of entries being written, renamed into place once complete
+TEMPORARY_SUFFIX = ".tmp"
+
+# Age in seconds after which a temporary file is left over from an
+# interrupted write rather than still being written, and is evicted
+STALE_TEMPORARY_AGE = 60 * 60
+
+
+def cache_key(files: Sequence[str | Path], options: dict[str, Any]) -> str:
+    """Hash input files and options into a cache key.
+
+    Files are hashed by content, not by name or modification time, and in
+    order, so swapping the base and PR files gives a different key.
+
+    Args:
+        files: Files whose contents the cached output depends on.
+        options: JSON-serializable options the cached output depends on.
+
+    Returns:
+        The key as a hex string.
+
+    Raises:
+        OSError: If a file cannot be read.
+
+    """
+    digest = hashlib.sha256(f"divan-cache-v{CACHE_FORMAT_VERSION}\n".encode())
+    for file in files:
+        with Path(file).open("rb") as stream:
+            digest.update(hashlib.file_digest(stream, "sha256").digest())
+    digest.update(json.dumps(options, sort_keys=True).encode())
+    return digest.hexdigest()
+
+
+class ReportCache:
+    """Directory of cached reports, evicted least recently used first.
+
+    Reading an entry refreshes its modification time, which is what
+    eviction orders entries by.
+    """
+
+    def __init__(
+        self, directory: str | Path, max_bytes: int = DEFAULT_CACHE_SIZE, suffix: str = CACHE_ENTRY_SUFFIX
+    ) -> None:
+        """Open (and create if needed) the cache directory.
+
+        Entries are files named by their key and suffix, so caches of
+        different kinds of text can share a directory.
+
+        Raises:
+            OSError: If the directory cannot be created.
+
+        """
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.suffix = suffix
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def _entry_path(self, key: str) -> Path:
+        return self.directory / f"{key}{self.suffix}"
+
+    def get(self, key: str) -> str | None:
+        """Return the cached text for key, or None on a miss."""
+        path = self._entry_path(key)
+        try:
+            text = path.read_text(encoding="utf-8")
+            path.touch()
+        except FileNotFoundError:
+            return None
+        return text
+
+    def put(self, key: str, text: str) -> None:
+        """Store text under key, then evict entries beyond the size limit.
+
+        Caching is best-effort: if the entry cannot be written (a full disk,
+        a read-only or removed directory), the cache is left as it was.
+        """
+        temporary = None
+        try:
+            with tempfile.NamedTemporaryFile(
+                "w", encoding="utf-8", dir=self.directory, suffix=TEMPORARY_SUFFIX, delete=False
+            ) as stream:
+                temporary = Path(stream.name)
+                stream.write(text)
+            temporary.replace(self._entry_path(key))
+            self.evict()
+        except OSError:
+            if temporary is not None:
+                with suppress(OSError):
+                    temporary.unlink(missing_ok=True)
+
+    def evict(self) -> None:
+        """Remove the least recently used entries until the cache fits its size limit.
+
+        Temporary files left behind by interrupted writes are removed too.
+        """
+        stale = time.time() - STALE_TEMPORARY_AGE
+        for path in self.directory.glob(f"*{TEMPORARY_SUFFIX}"):
+            with suppress(FileNotFoundError):
+                if path.stat().st_mtime < stale:
+                    path.unlink(missing_ok=True)
+
+        entries: list[tuple[float, int, Path]] = []
+        for path in self.directory.glob(f"*{self.suffix}"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
@@ -7,17 +7,138 @@ Generates a markdown report showing performance changes with indicators.
 from __future__ import annotations
 
 import argparse
+import asyncio
+import gc
+import glob
+import io
+import itertools
 import json
+import math
+import os
+import re
+import shlex
+import signal
+import statistics
 import sys
-from dataclasses import dataclass
+from contextlib import AbstractContextManager, contextmanager, nullcontext, suppress
+from dataclasses import dataclass, field, replace
 from enum import Enum
 from pathlib import Path
-from typing import Any
+from typing import TYPE_CHECKING, Any, TextIO
+
+import stats_divan
+from cache_divan import DEFAULT_CACHE_SIZE, ReportCache, cache_key
+from env_divan import capture_fingerprint, compare_host_sets
+from history_divan import HistoryError, load_history_baseline, parse_history_spec
+from parse_divan import (
+    BINARY_SEPARATOR,
+    METADATA_KEY,
+    MISSING,
+    RESULT_COLUMNS,
+    RESULTS_KEY,
+    DivanLineParser,
+    ResultTable,
+    RunMetadata,
+    is_binary_result_file,
+    read_binary_metadata,
+    read_binary_metric,
+)
+from tree_divan import NameTrie
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; comparisons fall back to pure Python
+    np = None
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Iterator, Sequence
+
+    from env_divan import FingerprintMismatch, HostFingerprint
+    from parse_divan import BenchmarkRow
 
 NS_PER_US = 1_000
 NS_PER_MS = 1_000_000
 NS_PER_S = 1_000_000_000
 
+# Characters read from a JSON benchmark file per incremental decoding step
+JSON_CHUNK_SIZE = 64 * 1024
+
+# Longest JSON value (a result entry or the metadata) decoded before a file
+# is rejected as malformed, bounding the buffer on unterminated input
+JSON_MAX_VALUE_SIZE = 16 * 1024 * 1024
+
+# Matches the next character that is not JSON whitespace
+JSON_NON_WHITESPACE_PATTERN = re.compile(r"[^ \t\n\r]")
+
+# Matches the first character that cannot continue a JSON number
+JSON_NUMBER_END_PATTERN = re.compile(r"[^0-9.eE+\-]")
+
+# Values below this magnitude convert exactly to float64, so vectorized
+# change percentages match Python's integer division bit for bit
+MAX_EXACT_FLOAT_INT = 2**53
+
+# Metrics needed to estimate the uncertainty of a benchmark in statistical mode
+SPREAD_METRICS = ("fastest", "slowest", "samples")
+
+# Divisor turning the fastest-to-slowest range of the samples into an
+# estimate of their standard deviation (the "range rule of thumb")
+RANGE_TO_STDEV = 4
+
+# Proportion of runs cut from each end before averaging multiple base runs
+TRIM_PROPORTION = 0.2
+
+# Regressions and improvements listed first in a compact report (see render_markdown)
+DEFAULT_TOP_CHANGES = 10
+
+# Bytes of a compact report's budget kept back for its truncation notice
+TRUNCATION_RESERVE = 256
+
+# Smallest budget of a compact report, leaving room for its header and summary
+MIN_REPORT_BYTES = 1024
+
+# Modules besides this script whose code shapes a report, hashed into its cache key
+REPORT_MODULES = ("parse_divan", "history_divan", "tree_divan", "env_divan")
+
+# Characters that make a base file argument a glob pattern
+GLOB_CHARS = "*?["
+
+# Longest output line of an --exec command (asyncio's default is 64 KiB)
+EXEC_LINE_LIMIT = 1024 * 1024
+
+# Regressions after which an --exec command is aborted
+DEFAULT_MAX_REGRESSIONS = 3
+
+# Metric comparing the mean of a benchmark's first throughput counter, in
+# base units per second (see parse_divan.Throughput)
+THROUGHPUT_METRIC = "throughput"
+
+# Pseudo-metric holding the unit of THROUGHPUT_METRIC, e.g. "B/s"
+THROUGHPUT_UNIT = "throughput_unit"
+
+# Unit of an aggregated base throughput whose runs disagree on its unit
+MIXED_UNITS = "mixed units"
+
+# Indicator of a throughput measured in different units by the base and PR
+UNITS_DIFFER = "units differ"
+
+# Metrics derived from the "throughput" list of a JSON entry
+THROUGHPUT_METRICS = (THROUGHPUT_METRIC, THROUGHPUT_UNIT)
+
+# Metrics where a higher value is better; their changes are inverted
+HIGHER_IS_BETTER = frozenset({THROUGHPUT_METRIC})
+
+# Decimal prefixes used to display throughputs, largest first
+THROUGHPUT_DISPLAY_PREFIXES = (("P", 10**15), ("T", 10**12), ("G", 10**9), ("M", 10**6), ("K", 10**3))
+
+# Metrics measured with the bench binary's timer, which a noise floor applies to
+TIMED_METRICS = ("fastest", "slowest", "median", "mean")
+
+# Characters escaped in Divan filters, as regex::escape of the Rust regex crate does
+FILTER_META_CHARS = frozenset("\\.+*?()|[]{}^$#&-~")
+
+# Separates the components of a benchmark's path in Divan filters
+FILTER_PATH_SEPARATOR = "::"
+
 
 class ComparisonStatus(Enum):
     """Status of a benchmark comparison."""
@@ -25,6 +146,8 @@ class ComparisonStatus(Enum):
     COMPARED = "compared"
     NEW = "new"
     REMOVED = "removed"
+    # Present on both sides, but in values that cannot be compared
+    INCOMPARABLE = "incomparable"
 
 
 @dataclass
@@ -46,6 +169,90 @@ class BenchmarkComparison:
     change_pct: float | None
     indicator: str
     status: ComparisonStatus
+    ci_pct: float | None = None
+    base_range: tuple[int, int] | None = None
+    unit: str | None = None
+    # Unit of the base value, when it differs from unit
+    base_unit: str | None = None
+
+
+@dataclass
+class GroupSummary:
+    """Comparisons of every benchmark below a group, rolled up (see summarize_groups)."""
+
+    benchmarks: int = 0
+    compared: int = 0
+    regressions: int = 0
+    improvements: int = 0
+    # Sum of the log of each compared benchmark's PR-to-base ratio
+    log_ratio_sum: float = 0.0
+
+    @property
+    def geomean_change_pct(self) -> float | None:
+        """Geometric mean of the compared benchmarks' changes, in percent, or None if none was compared."""
+        if not self.compared:
+            return None
+        return math.expm1(self.log_ratio_sum / self.compared) * 100
+
+    @classmethod
+    def merge(cls, summaries: Sequence[GroupSummary]) -> GroupSummary:
+        """Combine the summaries of sibling groups and benchmarks."""
+        return cls(
+            sum(summary.benchmarks for summary in summaries),
+            sum(summary.compared for summary in summaries),
+            sum(summary.regressions for summary in summaries),
+            sum(summary.improvements for summary in summaries),
+            math.fsum(summary.log_ratio_sum for summary in summaries),
+        )
+
+
+@dataclass
+class RerunSummary:
+    """Outcome of re-running flagged benchmarks (see confirm_rerun)."""
+
+    # Number of benchmarks whose re-run results replaced the PR's
+    rerun: int = 0
+    # Regressions flagged before and after the re-run
+    confirmed: list[str] = field(default_factory=list)
+    # Regressions flagged before the re-run but not after it
+    cleared: list[str] = field(default_factory=list)
+
+
+@dataclass
+class CompareOptions:
+    """How compare_columns compares benchmarks, besides the metric."""
+
+    thresholds: ComparisonThresholds = field(default_factory=ComparisonThresholds)
+    # Confidence level for apply_confidence, or None to only use thresholds
+    confidence: float | None = None
+    # Observed base range of each benchmark for apply_base_ranges, if any
+    base_ranges: dict[str, tuple[int, int]] | None = None
+    # Largest change in nanoseconds for apply_noise_floor to ignore, or None
+    # to flag changes of any size
+    noise_floor: int | None = None
+
+
+@dataclass
+class ReportOptions:
+    """What generate_markdown and render_markdown report besides the comparisons."""
+
+    # Displayed below the title, if any
+    subtitle: str | None = None
+    thresholds: ComparisonThresholds = field(default_factory=ComparisonThresholds)
+    # Confidence level used by apply_confidence, if any
+    confidence: float | None = None
+    # Deepest group listed in a group summary table (see summarize_groups), or None for no table
+    summary_depth: int | None = None
+    # Noise floor used by apply_noise_floor, if any
+    noise_floor: int | None = None
+    # Differences between the base and PR hosts (see environment_mismatches), warned about before anything else
+    env_mismatches: Sequence[FingerprintMismatch] = ()
+    # Outcome of confirm_rerun, if flagged benchmarks were re-run
+    rerun: RerunSummary | None = None
+    # Maximum size of a render_markdown report in UTF-8 bytes, or None for no limit
+    max_bytes: int | None = None
+    # Number of regressions and of improvements render_markdown lists first
+    top: int = DEFAULT_TOP_CHANGES
 
 
 def format_time(ns: int | None) -> str:
@@ -74,13 +281,50 @@ def format_time(ns: int | None) -> str:
     return f"{sign}{abs_ns} ns"
 
 
-def calculate_change(base: int, pr: int) -> float:
-    """Calculate percentage change from base to PR."""
+def format_throughput(value: int | None, unit: str) -> str:
+    """Format a throughput in base units per second, e.g. "644.600 MB/s"."""
+    if value is None:
+        return "N/A"
+    for prefix, size in THROUGHPUT_DISPLAY_PREFIXES:
+        if abs(value) >= size:
+            return f"{value / size:.3f} {prefix}{unit}"
+    return f"{value} {unit}"
+
+
+def calculate_change(base: int, pr: int, *, higher_is_better: bool = False) -> float:
+    """Calculate percentage change from base to PR.
+
+    When higher values are better (throughput), the change is taken from PR
+    to base instead, so it stays positive for a slowdown: halving a
+    throughput is a +100% change, like doubling a time.
+    """
+    if higher_is_better:
+        base, pr = pr, base
     if base == 0:
         return 0.0
     return ((pr - base) / base) * 100
 
 
+def estimate_standard_error(fastest: int | None, slowest: int | None, samples: int | None) -> float | None:
+    """Estimate the standard error of a benchmark's central value.
+
+    The standard deviation of the samples is approximated from their range,
+    so this is a rough estimate, but it only needs what divan reports.
+
+    Args:
+        fastest: Fastest sample in nanoseconds.
+        slowest: Slowest sample in nanoseconds.
+        samples: Number of samples.
+
+    Returns:
+        The estimated standard error in nanoseconds, or None if the spread is unknown.
+
+    """
+    if fastest is None or slowest is None or not samples:
+        return None
+    return (slowest - fastest) / RANGE_TO_STDEV / math.sqrt(samples)
+
+
 def get_change_indicator(
     change_pct: float,
     thresholds: ComparisonThresholds | None = None,
@@ -105,6 +349,10 @@ def get_change_indicator(
     return ""
 
 
+class InvalidBenchmarkEntryError(ValueError):
+    """Raised when an entry of a benchmark file has the wrong shape."""
+
+
 def validate_benchmark_entry(entry: dict[str, Any], file_path: Path, index: int, metric: str) -> None:
     """Validate a single benchmark entry has required fields.
 
@@ -112,19 +360,297 @@ def validate_benchmark_entry(entry: dict[str, Any], file_path: Path, index: int,
         ValueError: If required fields are missing.
 
     """
+    if not isinstance(entry, dict):
+        raise InvalidBenchmarkEntryError(f"Entry {index} in '{file_path}' is not an object")
     if "name" not in entry:
         raise ValueError(f"Entry {index} in '{file_path}' missing required field 'name'")
+    if metric in THROUGHPUT_METRICS:
+        # Optional: only benchmarks with a throughput counter have one
+        if not isinstance(entry.get("throughput", []), list):
+            raise ValueError(
+                f"Benchmark '{entry['name']}' (entry {index}) in '{file_path}' has a 'throughput' that is not a list"
+            )
+        return
     if metric not in entry:
         raise ValueError(
-            f"Benchmark '{entry.get('name', f'entry {index}')}' in '{file_path}' missing metric '{metric}'"
+            f"Benchmark '{entry.get('name', f'entry {index}')}' (entry {index}) in '{file_path}' "
+            f"missing metric '{metric}'"
+        )
+    value = entry[metric]
+    if isinstance(value, dict) and "value" not in value:
+        raise ValueError(
+            f"Benchmark '{entry['name']}' (entry {index}) in '{file_path}' has metric '{metric}' but no 'value' field"
         )
-    if "value" not in entry.get(metric, {}):
-        raise ValueError(f"Benchmark '{entry['name']}' in '{file_path}' has metric '{metric}' but no 'value' field")
 
 
+class _JsonStreamReader:
+    """Incremental reader over a JSON text stream, holding one value at a time.
+
+    Decoding errors are reported with their position in the stream, not in
+    the buffer.
+    """
+
+    def __init__(self, stream: TextIO, chunk_size: int) -> None:
+        self.stream = stream
+        self.chunk_size = chunk_size
+        self.decoder = json.JSONDecoder()
+        self.buffer = ""
+        self.position = 0
+        self.at_eof = False
+        # Position of the start of the buffer in the stream
+        self.offset = 0
+        self.line = 1
+        self.column = 0
+
+    def fill(self, size: int | None = None) -> bool:
+        """Append the next size characters (a chunk by default) to the unconsumed part of the buffer."""
+        chunk = self.stream.read(size or self.chunk_size)
+        if not chunk:
+            self.at_eof = True
+            return False
+        newlines = self.buffer.count("\n", 0, self.position)
+        if newlines:
+            self.line += newlines
+            self.column = self.position - self.buffer.rfind("\n", 0, self.position) - 1
+        else:
+            self.column += self.position
+        self.offset += self.position
+        self.buffer = self.buffer[self.position :] + chunk
+        self.position = 0
+        return True
+
+    def error(self, msg: str, position: int) -> json.JSONDecodeError:
+        """Build a decoding error for a buffer position, located in the stream."""
+        error = json.JSONDecodeError(msg, self.buffer, position)
+        lineno = self.line + error.lineno - 1
+        colno = error.colno + (self.column if error.lineno == 1 else 0)
+        error.pos, error.lineno, error.colno = self.offset + position, lineno, colno
+        error.args = (f"{msg}: line {lineno} column {colno} (char {error.pos})",)
+        return error
+
+    def peek(self) -> str:
+        """Skip whitespace and return the next character, or "" at the end."""
+        while True:
+            match = JSON_NON_WHITESPACE_PATTERN.search(self.buffer, self.position)
+            if match:
+                self.position = match.start()
+                return self.buffer[self.position]
+            self.position = len(self.buffer)
+            if not self.fill():
+                return ""
+
+    def expect(self, characters: str) -> str:
+        """Consume the next non-whitespace character, which must be one of characters."""
+        character = self.peek()
+        if not character or character not in characters:
+            expected = " or ".join(repr(c) for c in characters)
+            raise self.error(f"Expecting {expected}", self.position)
+        self.position += 1
+        return character
+
+    def decode(self) -> Any:  # noqa: ANN401
+        """Decode the next value, reading more input as needed.
+
+        Raises:
+            json.JSONDecodeError: If the value is invalid, or is not complete
+                within JSON_MAX_VALUE_SIZE characters.
+
+        """
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.position)
+            except json.JSONDecodeError as e:
+                pending = len(self.buffer) - self.position
+                if pending >= JSON_MAX_VALUE_SIZE:
+                    msg = f"{e.msg} (no complete value within {JSON_MAX_VALUE_SIZE} characters)"
+                    raise self.error(msg, e.pos) from None
+                # Doubling the pending input keeps re-decoding linear in the value size
+                if not self.fill(min(max(pending, self.chunk_size), JSON_MAX_VALUE_SIZE - pending)):
+                    raise self.error(e.msg, e.pos) from None
+                continue
+            # A number is only complete once something that cannot continue it has been read
+            is_number = isinstance(value, int | float)
+            if is_number and not JSON_NUMBER_END_PATTERN.search(self.buffer, end) and self.fill():
+                continue
+            self.position = end
+            return value
+
+
+def iter_json_array(stream: TextIO, chunk_size: int = JSON_CHUNK_SIZE) -> Iterator[Any]:
+    """Decode the elements of a top-level JSON array one at a time.
+
+    The stream is read in chunks of chunk_size characters, and only the
+    element being decoded is kept in memory.
+
+    Args:
+        stream: Text stream positioned at the start of a JSON document.
+        chunk_size: Number of characters to read at a time.
+
+    Yields:
+        Each array element, in order.
+
+    Raises:
+        json.JSONDecodeError: If the document is not valid JSON.
+        ValueError: If the document is valid JSON but not an array.
+
+    """
+    reader = _JsonStreamReader(stream, chunk_size)
+    if reader.peek() != "[":
+        raise ValueError(f"Expected JSON array, got {type(reader.decode()).__name__}")
+    yield from _iter_array_elements(reader)
+    _expect_end(reader)
+
+
+def iter_json_results(
+    stream: TextIO, metadata: RunMetadata | None = None, chunk_size: int = JSON_CHUNK_SIZE
+) -> Iterator[Any]:
+    """Decode the result entries of a JSON benchmark file one at a time.
+
+    A file is either a document {"results": [...], "metadata": {...}}, as
+    written by parse_divan.py, or a bare array of results, as written by
+    earlier versions. Results are streamed as by iter_json_array; other
+    fields of a document are ignored.
+
+    Args:
+        stream: Text stream positioned at the start of a JSON document.
+        metadata: Run metadata updated from the document's metadata; as it
+            may follow the results, it is complete once they are exhausted.
+        chunk_size: Number of characters to read at a time.
+
+    Yields:
+        Each result entry, in order.
+
+    Raises:
+        json.JSONDecodeError: If the document is not valid JSON.
+        ValueError: If the document is valid JSON but neither an array nor
+            a document with a results array, or its metadata is invalid.
+
+    """
+    reader = _JsonStreamReader(stream, chunk_size)
+    if reader.peek() == "[":
+        yield from _iter_array_elements(reader)
+    elif reader.peek() == "{":
+        yield from _iter_document_results(reader, metadata)
+    else:
+        raise ValueError(f"Expected JSON array or object, got {type(reader.decode()).__name__}")
+    _expect_end(reader)
+
+
+def _iter_document_results(reader: _JsonStreamReader, metadata: RunMetadata | None) -> Iterator[Any]:
+    """Decode the results of the document object starting at the reader's next character."""
+    reader.expect("{")
+    found_results = False
+    if reader.peek() == "}":
+        reader.position += 1
+    else:
+        while True:
+            key = reader.decode()
+            reader.expect(":")
+            if key == RESULTS_KEY:
+                if reader.peek() != "[":
+                    found = type(reader.decode()).__name__
+                    raise ValueError(f"Expected '{RESULTS_KEY}' to be a JSON array, got {found}")
+                found_results = True
+                yield from _iter_array_elements(reader)
+            elif key == METADATA_KEY:
+                run_metadata = RunMetadata.from_dict(reader.decode())
+                if metadata is not None:
+                    metadata.update(run_metadata)
+            else:
+                reader.decode()
+            if reader.expect(",}") == "}":
+                break
+    if not found_results:
+        raise ValueError(f"Expected JSON object with a '{RESULTS_KEY}' array")
+
+
+def _iter_array_elements(reader: _JsonStreamReader) -> Iterator[Any]:
+    """Decode the elements of the array starting at the reader's next character."""
+    reader.expect("[")
+    if reader.peek() == "]":
+        reader.position += 1
+        return
+    while True:
+        yield reader.decode()
+        if reader.expect(",]") == "]":
+            return
+
+
+def _expect_end(reader: _JsonStreamReader) -> None:
+    """Check that nothing but whitespace follows the decoded document."""
+    if reader.peek():
+        msg = "Extra data"
+        raise reader.error(msg, reader.position)
+
+
+def _iter_benchmark_entries(
+    path: Path, metrics: Sequence[str], metadata: RunMetadata | None = None
+) -> Iterator[tuple[int, dict[str, Any]]]:
+    """Stream the entries of a JSON benchmark file, validating each against metrics.
+
+    The file's run metadata, if any, is added to metadata. Every entry of a
+    repeated name is yielded, so callers storing entries by name keep the
+    last one, and the repeats are reported by warn_duplicates.
+
+    Raises:
+        json.JSONDecodeError: If the file is not valid JSON.
+        ValueError: If the file holds no results array or an entry is invalid.
+
+    """
+    names: set[str] = set()
+    duplicates: list[str] = []
+    with path.open(encoding="utf-8") as stream:
+        for index, entry in enumerate(iter_json_results(stream, metadata)):
+            for metric in metrics:
+                validate_benchmark_entry(entry, path, index, metric)
+            if entry["name"] in names:
+                duplicates.append(entry["name"])
+            names.add(entry["name"])
+            yield index, entry
+    warn_duplicates(path, duplicates)
+
+
+def warn_duplicates(path: Path, duplicates: Sequence[str]) -> None:
+    """Warn that benchmark names repeat within a file, and only their last entries are used.
+
+    Logs of several benchmark binaries can repeat names unless parsed with
+    --namespace-binaries, so repeats are not an error.
+    """
+    if duplicates:
+        print(
+            f"Warning: {len(duplicates)} duplicate benchmark name(s) in '{path}' (first: '{duplicates[0]}'); "
+            "only the last entry of each is used. Parse multi-binary logs with --namespace-binaries "
+            "to keep them apart.",
+            file=sys.stderr,
+        )
+
+
+def _exit_on_load_error(path: Path, error: ValueError) -> None:
+    """Report a benchmark file loading error and exit."""
+    if isinstance(error, json.JSONDecodeError):
+        print(f"Error: Invalid JSON in '{path}': {error}", file=sys.stderr)
+    elif isinstance(error, UnicodeDecodeError):
+        print(f"Error: '{path}' is not valid UTF-8: {error}", file=sys.stderr)
+    else:
+        print(f"Error: {error}", file=sys.stderr)
+    sys.exit(1)
+
+
+def _check_exists(path: Path) -> None:
+    """Exit with an error if a benchmark file does not exist."""
+    if not path.exists():
+        print(f"Error: File '{path}' not found", file=sys.stderr)
+        sys.exit(1)
+
+
+@stats_divan.timed("load_benchmarks")
 def load_benchmarks(file_path: str | Path, metric: str) -> dict[str, dict[str, Any]]:
     """Load benchmarks from JSON file and return as dict keyed by name.
 
+    Prefer load_metric_values or load_metric_columns when only metric
+    values are needed: they do not keep whole entries in memory.
+
     Args:
         file_path: Path to the JSON benchmark file.
         metric: The metric to validate (e.g., "mean", "median").
@@ -134,33 +660,300 @@ def load_benchmarks(file_path: str | Path, metric: str) -> dict[str, dict[str, A
 
     """
     path = Path(file_path)
+    _check_exists(path)
 
-    if not path.exists():
-        print(f"Error: File '{path}' not found", file=sys.stderr)
-        sys.exit(1)
-
+    benchmarks: dict[str, dict[str, Any]] = {}
     try:
-        data = json.loads(path.read_text())
-    except json.JSONDecodeError as e:
-        print(f"Error: Invalid JSON in '{path}': {e}", file=sys.stderr)
-        sys.exit(1)
+        for _, entry in _iter_benchmark_entries(path, [metric]):
+            benchmarks[entry["name"]] = entry
+    except ValueError as e:
+        _exit_on_load_error(path, e)
 
-    if not isinstance(data, list):
-        print(
-            f"Error: Expected JSON array in '{path}', got {type(data).__name__}",
-            file=sys.stderr,
+    return benchmarks
+
+
+def get_entry_value(entry: dict[str, Any], metric: str) -> int | None:
+    """Get a metric value from a benchmark entry.
+
+    Time metrics are stored as {"value": ..., "unit": ...}, while counts
+    such as "samples" and "iters" are stored as plain numbers. The
+    throughput metrics are the mean and unit of the first throughput
+    counter, or None if the benchmark has none.
+    """
+    if metric in THROUGHPUT_METRICS:
+        counters = entry.get("throughput")
+        if not counters:
+            return None
+        return counters[0]["unit" if metric == THROUGHPUT_UNIT else "mean"]
+    value = entry[metric]
+    return value["value"] if isinstance(value, dict) else value
+
+
+@stats_divan.timed("load_benchmarks")
+def load_metric_columns(
+    file_path: str | Path, metrics: Sequence[str], metadata: RunMetadata | None = None
+) -> dict[str, dict[str, int | None]]:
+    """Load only the given metrics from a JSON or binary benchmark file.
+
+    JSON files are decoded one entry at a time, and each entry is validated
+    and reduced to its metric values before the next one is read, so memory
+    use depends on the number of benchmarks and metrics, not on the file
+    size. Binary files written by ``parse_divan.py --format binary`` are
+    memory-mapped, and only the requested metric columns are read.
+
+    Args:
+        file_path: Path to the benchmark file.
+        metrics: The metrics to load (e.g., ["mean"], or ["fastest", "slowest"]).
+        metadata: Run metadata updated from the file, if it stores any
+            (older JSON files and version 1 binary files do not).
+
+    Returns:
+        Dictionary mapping each metric to a dictionary of benchmark names to values.
+
+    """
+    path = Path(file_path)
+    _check_exists(path)
+
+    binary = is_binary_result_file(path)
+    if binary and any(metric in THROUGHPUT_METRICS for metric in metrics):
+        _exit_on_load_error(
+            path, ValueError(f"Binary result file '{path}' does not store throughput; write results as JSON")
         )
+
+    columns: dict[str, dict[str, int | None]] = {metric: {} for metric in metrics}
+    try:
+        if binary:
+            duplicates: list[str] = []
+            for metric in metrics:
+                # Every column repeats the same names, so collect them once
+                columns[metric] = read_binary_metric(path, metric, None if duplicates else duplicates)
+            warn_duplicates(path, duplicates)
+            if metadata is not None:
+                metadata.update(read_binary_metadata(path))
+            return columns
+
+        for _, entry in _iter_benchmark_entries(path, metrics, metadata):
+            for metric, values in columns.items():
+                value = get_entry_value(entry, metric)
+                # Benchmarks without a throughput counter are left out, not missing
+                if value is not None or metric not in THROUGHPUT_METRICS:
+                    values[entry["name"]] = value
+                else:
+                    values.pop(entry["name"], None)
+    except ValueError as e:
+        _exit_on_load_error(path, e)
+
+    return columns
+
+
+def load_metric_values(file_path: str | Path, metric: str) -> dict[str, int | None]:
+    """Load a single metric from a JSON or binary benchmark file.
+
+    Args:
+        file_path: Path to the benchmark file.
+        metric: The metric to load (e.g., "mean", "median").
+
+    Returns:
+        Dictionary mapping benchmark names to metric values.
+
+    """
+    return load_metric_columns(file_path, [metric])[metric]
+
+
+def load_baseline_columns(
+    spec: str, metrics: Sequence[str], metadata: RunMetadata | None = None
+) -> dict[str, dict[str, int | None]]:
+    """Load the given metrics for the base side of a comparison.
+
+    The base is either a benchmark file or a history spec such as
+    "history:bench.db?branch=main&last=5", which takes the per-benchmark
+    median of the last 5 runs on main stored by history_divan.py.
+
+    Args:
+        spec: Path to a benchmark file, or a history spec.
+        metrics: The metrics to load (e.g., ["mean"], or ["fastest", "slowest"]).
+        metadata: Run metadata updated from a benchmark file; the history
+            database stores none.
+
+    Returns:
+        Dictionary mapping each metric to a dictionary of benchmark names to values.
+
+    """
+    try:
+        history = parse_history_spec(spec)
+        if history is None:
+            return load_metric_columns(spec, metrics, metadata)
+        with stats_divan.phase("load_benchmarks"):
+            return {metric: dict(load_history_baseline(history, metric)) for metric in metrics}
+    except (ValueError, HistoryError) as e:
+        print(f"Error: {e}", file=sys.stderr)
         sys.exit(1)
 
-    # Validate each entry
-    for index, entry in enumerate(data):
+
+def load_baseline_values(spec: str, metric: str) -> dict[str, int | None]:
+    """Load a single metric for the base side of a comparison.
+
+    Args:
+        spec: Path to a benchmark file, or a history spec (see load_baseline_columns).
+        metric: The metric to load (e.g., "mean", "median").
+
+    Returns:
+        Dictionary mapping benchmark names to metric values.
+
+    """
+    return load_baseline_columns(spec, [metric])[metric]
+
+
+def expand_base_specs(specs: Sequence[str]) -> list[str]:
+    """Expand glob patterns among base file arguments.
+
+    Patterns are expanded here as well as by the shell, so quoted patterns
+    work the same on every platform. History specs are kept as they are.
+
+    Args:
+        specs: Base file paths, glob patterns or history specs.
+
+    Returns:
+        The base specs, with each pattern replaced by its sorted matches.
+
+    Raises:
+        SystemExit: If a history spec is malformed or a pattern matches no
+            file (the error is printed to stderr).
+
+    """
+    expanded: list[str] = []
+    for spec in specs:
         try:
-            validate_benchmark_entry(entry, path, index, metric)
+            history = parse_history_spec(spec)
         except ValueError as e:
             print(f"Error: {e}", file=sys.stderr)
             sys.exit(1)
+        if history is not None or not any(char in spec for char in GLOB_CHARS):
+            expanded.append(spec)
+            continue
+        matches = sorted(glob.glob(spec))  # noqa: PTH207
+        if not matches:
+            print(f"Error: No base file matches '{spec}'", file=sys.stderr)
+            sys.exit(1)
+        expanded.extend(matches)
+    return expanded
+
+
+def trimmed_mean(values: Sequence[float], proportion: float = TRIM_PROPORTION) -> float:
+    """Average values after cutting the given proportion from each end.
+
+    Args:
+        values: The values to average.
+        proportion: Proportion of values cut from each end (rounded down).
+
+    """
+    cut = int(len(values) * proportion)
+    kept = sorted(values)[cut : len(values) - cut]
+    return statistics.fmean(kept)
+
+
+# Robust aggregates of several base runs, by --aggregate name
+AGGREGATES = {"median": statistics.median, "trimmed-mean": trimmed_mean}
 
-    return {item["name"]: item for item in data}
+
+def aggregate_baseline_columns(
+    specs: Sequence[str],
+    metrics: Sequence[str],
+    aggregate: str = "median",
+    metadata: RunMetadata | None = None,
+) -> tuple[dict[str, dict[str, int | None]], dict[str, dict[str, tuple[int, int]]]]:
+    """Combine several base runs into one robust baseline.
+
+    Each base is loaded once, one after the other, and its values are added
+    to per-benchmark lists, so only the values themselves are kept in memory.
+    A benchmark present in only some of the runs is aggregated over those.
+
+    Args:
+        specs: Base file paths or history specs (see load_baseline_columns).
+        metrics: The metrics to load and aggregate.
+        aggregate: Name of the aggregate in AGGREGATES.
+        metadata: Run metadata updated from every base run.
+
+    Returns:
+        The aggregated values, keyed by metric then benchmark name, and the
+        observed (lowest, highest) value of each benchmark across the runs.
+
+    """
+    samples: dict[str, dict[str, list[int]]] = {metric: {} for metric in metrics}
+    for spec in specs:
+        for metric, values in load_baseline_columns(spec, metrics, metadata).items():
+            metric_samples = samples[metric]
+            for name, value in values.items():
+                runs = metric_samples.setdefault(name, [])
+                if value is not None:
+                    runs.append(value)
+
+    # Throughput units are labels, not measurements: runs disagreeing on a
+    # benchmark's unit are marked MIXED_UNITS, and its range is meaningless
+    units = samples.pop(THROUGHPUT_UNIT, {})
+    mixed = {name for name, runs in units.items() if len(set(runs)) > 1}
+    combine = AGGREGATES[aggregate]
+    columns = {
+        metric: {name: round(combine(runs)) if runs else None for name, runs in metric_samples.items()}
+        for metric, metric_samples in samples.items()
+    }
+    ranges = {
+        metric: {name: (min(runs), max(runs)) for name, runs in metric_samples.items() if runs}
+        for metric, metric_samples in samples.items()
+    }
+    if THROUGHPUT_UNIT in metrics:
+        columns[THROUGHPUT_UNIT] = {
+            name: MIXED_UNITS if name in mixed else runs[0] for name, runs in units.items() if runs
+        }
+        for name in mixed:
+            ranges.get(THROUGHPUT_METRIC, {}).pop(name, None)
+    return columns, ranges
+
+
+def apply_base_ranges(comparisons: list[BenchmarkComparison], ranges: dict[str, tuple[int, int]]) -> None:
+    """Attach the run-to-run range of the base to each comparison.
+
+    A PR value inside the range observed across the base runs is within
+    normal run-to-run variation, so a warning or improvement indicator is
+    cleared. A single outlying base run can stretch the range arbitrarily,
+    so changes beyond the error threshold keep their indicator.
+
+    Args:
+        comparisons: Comparisons from generate_comparison, updated in place.
+        ranges: Observed (lowest, highest) base value of each benchmark.
+
+    """
+    for comparison in comparisons:
+        base_range = ranges.get(comparison.name)
+        if base_range is None:
+            continue
+        comparison.base_range = base_range
+        in_range = comparison.pr is not None and base_range[0] <= comparison.pr <= base_range[1]
+        if in_range and comparison.indicator != "❌":
+            comparison.indicator = ""
+
+
+def get_metric_values(
+    benchmarks: dict[str, dict[str, Any]] | dict[str, int | None] | ResultTable,
+    metric: str,
+) -> dict[str, int | None]:
+    """Map benchmark names to the value of a single metric.
+
+    Args:
+        benchmarks: Benchmarks keyed by name, as returned by load_benchmarks,
+            values already keyed by name, as returned by load_metric_values,
+            or a ResultTable from parse_divan, which is read column-wise.
+        metric: The metric to extract (e.g., "mean", "median").
+
+    """
+    if isinstance(benchmarks, ResultTable):
+        return benchmarks.metric_values(metric)
+    if dict not in set(map(type, benchmarks.values())):
+        return benchmarks
+    if metric in THROUGHPUT_METRICS:
+        values = ((name, get_entry_value(entry, metric)) for name, entry in benchmarks.items())
+        return {name: value for name, value in values if value is not None}
+    return {name: entry[metric]["value"] if isinstance(entry, dict) else entry for name, entry in benchmarks.items()}
 
 
 def get_benchmark_group(name: str) -> str:
@@ -188,10 +981,20 @@ def format_table_row(comparison: BenchmarkComparison, display_name: str | None =
 
     """
     name = display_name or comparison.name
-    base_str = format_time(comparison.base)
-    pr_str = format_time(comparison.pr)
 
-    if comparison.change_pct is not None:
+    def format_value(value: int | None, unit: str | None) -> str:
+        return format_time(value) if unit is None else format_throughput(value, unit)
+
+    base_unit = comparison.base_unit or comparison.unit
+    base_str = format_value(comparison.base, base_unit)
+    if comparison.base_range is not None:
+        low, high = comparison.base_range
+        base_str += f" ({format_value(low, base_unit)} - {format_value(high, base_unit)})"
+    pr_str = format_value(comparison.pr, comparison.unit)
+
+    if comparison.change_pct is not None and comparison.ci_pct is not None:
+        change_str = f"{comparison.change_pct:+.1f}% ±{comparison.ci_pct:.1f}% {comparison.indicator}".strip()
+    elif comparison.change_pct is not None:
         change_str = f"{comparison.change_pct:+.1f}% {comparison.indicator}".strip()
     else:
         change_str = comparison.indicator
@@ -199,9 +1002,10 @@ def format_table_row(comparison: BenchmarkComparison, display_name: str | None =
     return f"| `{name}` | {base_str} | {pr_str} | {change_str} |"
 
 
+@stats_divan.timed("generate_comparison")
 def generate_comparison(
-    base_benchmarks: dict[str, dict[str, Any]],
-    pr_benchmarks: dict[str, dict[str, Any]],
+    base_benchmarks: dict[str, dict[str, Any]] | dict[str, int | None] | ResultTable,
+    pr_benchmarks: dict[str, dict[str, Any]] | dict[str, int | None] | ResultTable,
     metric: str = "mean",
     thresholds: ComparisonThresholds | None = None,
 ) -> list[BenchmarkComparison]:
@@ -210,7 +1014,8 @@ def generate_comparison(
     Args:
         base_benchmarks: Benchmarks from the base branch.
         pr_benchmarks: Benchmarks from the PR branch.
-        metric: The metric to compare.
+        metric: The metric to compare; changes of HIGHER_IS_BETTER metrics
+            are inverted (see calculate_change).
         thresholds: Thresholds for change indicators.
 
     Returns:
@@ -219,19 +1024,385 @@ def generate_comparison(
     """
     if thresholds is None:
         thresholds = ComparisonThresholds()
+    higher_is_better = metric in HIGHER_IS_BETTER
 
-    comparisons: list[BenchmarkComparison] = []
+    base_values = get_metric_values(base_benchmarks, metric)
+    pr_values = get_metric_values(pr_benchmarks, metric)
+
+    # Align both sides once, on the sorted union of their names. Uniting the
+    # dicts keeps file order, which is mostly sorted already, so the sort
+    # merges long runs instead of reordering hash order
+    names = sorted(base_values | pr_values)
+
+    with _gc_paused():
+        if np is not None and _all_ints(base_values) and _all_ints(pr_values):
+            comparisons = _compare_vectorized(
+                names, base_values, pr_values, thresholds, higher_is_better=higher_is_better
+            )
+            if comparisons is not None:
+                return comparisons
+
+        return _compare_sequential(names, base_values, pr_values, thresholds, higher_is_better=higher_is_better)
+
+
+def apply_confidence(
+    comparisons: list[BenchmarkComparison],
+    base_columns: dict[str, dict[str, int | None]],
+    pr_columns: dict[str, dict[str, int | None]],
+    confidence: float,
+    thresholds: ComparisonThresholds | None = None,
+) -> None:
+    """Only flag changes that are statistically significant.
+
+    The uncertainty of each side is estimated from its spread and sample
+    count (see estimate_standard_error). Each compared benchmark gets the
+    half-width of the confidence interval of its change in ci_pct, and its
+    indicator is cleared unless the change lies outside that interval.
+    Changes that are significant are still held to the thresholds.
+
+    Args:
+        comparisons: Comparisons from generate_comparison, updated in place.
+        base_columns: Base values of SPREAD_METRICS, keyed by metric then name.
+        pr_columns: PR values of SPREAD_METRICS, keyed by metric then name.
+        confidence: Confidence level in percent (e.g., 95).
+        thresholds: Thresholds for change indicators.
 
-    all_names = sorted(set(base_benchmarks.keys()) | set(pr_benchmarks.keys()))
+    """
+    if thresholds is None:
+        thresholds = ComparisonThresholds()
+    z = statistics.NormalDist().inv_cdf(0.5 + confidence / 200)
 
-    for name in all_names:
-        base_data = base_benchmarks.get(name)
-        pr_data = pr_benchmarks.get(name)
+    for comparison in comparisons:
+        if comparison.status is not ComparisonStatus.COMPARED or not comparison.base:
+            continue
+        errors = [
+            estimate_standard_error(*(columns[metric].get(comparison.name) for metric in SPREAD_METRICS))
+            for columns in (base_columns, pr_columns)
+        ]
+        if None in errors:
+            continue
 
-        if base_data and pr_data:
-            base_value = base_data[metric]["value"]
-            pr_value = pr_data[metric]["value"]
-            change_pct = calculate_change(base_value, pr_value)
+        comparison.ci_pct = z * math.hypot(*errors) / abs(comparison.base) * 100
+        significant = abs(comparison.change_pct) > comparison.ci_pct
+        comparison.indicator = get_change_indicator(comparison.change_pct, thresholds) if significant else ""
+
+
+def timer_noise_floor(multiple: float, metadata: Iterable[RunMetadata]) -> int | None:
+    """Compute the smallest change that can be told apart from timer noise.
+
+    Args:
+        multiple: Multiple of the timer precision below which changes are noise.
+        metadata: Metadata of the compared runs; the coarsest timer precision
+            among them is used.
+
+    Returns:
+        The noise floor in nanoseconds, or None if no run recorded its timer
+        precision.
+
+    """
+    precisions = [run.timer_precision for run in metadata if run.timer_precision is not None]
+    if not precisions:
+        return None
+    return round(max(precisions) * multiple)
+
+
+def apply_noise_floor(comparisons: list[BenchmarkComparison], noise_floor: int) -> None:
+    """Clear the indicator of changes too small for the timer to measure.
+
+    A benchmark running in a few nanoseconds changes by tens of percent when
+    it moves by a single tick of the timer, so a change of at most
+    noise_floor nanoseconds is not flagged, whatever its percentage.
+
+    Args:
+        comparisons: Comparisons from generate_comparison, updated in place.
+        noise_floor: Largest change in nanoseconds considered noise (see
+            timer_noise_floor).
+
+    """
+    for comparison in comparisons:
+        if comparison.status is ComparisonStatus.COMPARED and abs(comparison.pr - comparison.base) <= noise_floor:
+            comparison.indicator = ""
+
+
+def environment_mismatches(base: RunMetadata, pr: RunMetadata, *, strict: bool = False) -> list[FingerprintMismatch]:
+    """Compare the hosts the base and PR runs were measured on.
+
+    Merged or aggregated results may come from several hosts, which
+    mismatch even against a side measured on one of them (see
+    env_divan.compare_host_sets).
+
+    Args:
+        base: Run metadata of the base.
+        pr: Run metadata of the PR.
+        strict: Refuse the comparison unless both hosts were captured and
+            they match.
+
+    Returns:
+        The fields on which the hosts disagree; none if either side's
+        host was not captured.
+
+    Raises:
+        ValueError: If strict and the hosts differ or either was not captured.
+
+    """
+    missing = [side for side, metadata in (("base", base), ("PR", pr)) if metadata.host is None]
+    if missing:
+        if strict:
+            raise ValueError(
+                f"No host fingerprint in the {' and '.join(missing)} results; "
+                "record it with parse_divan.py --capture-env"
+            )
+        return []
+    mismatches = compare_host_sets(base.hosts, pr.hosts)
+    if strict and mismatches:
+        differences = "; ".join(f"{m.label}: {m.base!r} vs {m.pr!r}" for m in mismatches)
+        raise ValueError(f"Base and PR were measured on different hosts ({differences})")
+    return mismatches
+
+
+def apply_throughput_units(
+    comparisons: list[BenchmarkComparison], base_units: dict[str, Any], pr_units: dict[str, Any]
+) -> None:
+    """Attach throughput units to each comparison, refusing to compare across units.
+
+    A benchmark whose base and PR throughputs are in different units, e.g.
+    after its counter changed from bytes to items, or whose base runs
+    disagree on the unit (see aggregate_baseline_columns), is marked
+    INCOMPARABLE and its change is dropped.
+
+    Args:
+        comparisons: Comparisons from generate_comparison, updated in place.
+        base_units: Throughput unit of each base benchmark.
+        pr_units: Throughput unit of each PR benchmark.
+
+    """
+    for comparison in comparisons:
+        base_unit, pr_unit = base_units.get(comparison.name), pr_units.get(comparison.name)
+        comparison.unit = pr_unit or base_unit
+        if base_unit is None or pr_unit is None or base_unit == pr_unit:
+            continue
+        comparison.status = ComparisonStatus.INCOMPARABLE
+        comparison.change_pct = comparison.ci_pct = None
+        comparison.indicator = UNITS_DIFFER
+        comparison.base_unit = base_unit
+        if base_unit == MIXED_UNITS:
+            comparison.base = comparison.base_range = None
+
+
+def check_options(
+    metric: str,
+    *,
+    confidence: float | None = None,
+    noise_floor: float | None = None,
+    summary_depth: int | None = None,
+    max_bytes: int | None = None,
+) -> None:
+    """Check the comparison options shared by the command line and serve_divan.py.
+
+    Raises:
+        ValueError: If an option is out of range or cannot be used with metric.
+
+    """
+    if confidence is not None and not 0 < confidence < 100:  # noqa: PLR2004
+        msg = "--confidence must be between 0 and 100 (exclusive)"
+        raise ValueError(msg)
+    if confidence is not None and metric == THROUGHPUT_METRIC:
+        msg = "--confidence cannot be used with --metric throughput"
+        raise ValueError(msg)
+    if noise_floor is not None and noise_floor < 0:
+        msg = "--noise-floor must not be negative"
+        raise ValueError(msg)
+    if noise_floor is not None and metric not in TIMED_METRICS:
+        msg = f"--noise-floor cannot be used with --metric {metric}"
+        raise ValueError(msg)
+    if summary_depth is not None and summary_depth < 1:
+        msg = "--summary-depth must be at least 1"
+        raise ValueError(msg)
+    if max_bytes is not None and max_bytes < MIN_REPORT_BYTES:
+        msg = f"--max-bytes must be at least {MIN_REPORT_BYTES}"
+        raise ValueError(msg)
+
+
+def comparison_metrics(metric: str, confidence: float | None = None) -> list[str]:
+    """List the metrics compare_columns needs to compare on metric.
+
+    Args:
+        metric: The metric to compare.
+        confidence: Confidence level of statistical mode, which also needs
+            SPREAD_METRICS, or None.
+
+    """
+    metrics = [metric]
+    if confidence is not None:
+        metrics += [spread_metric for spread_metric in SPREAD_METRICS if spread_metric != metric]
+    if metric == THROUGHPUT_METRIC:
+        metrics.append(THROUGHPUT_UNIT)
+    return metrics
+
+
+def compare_columns(
+    base_columns: dict[str, dict[str, int | None]],
+    pr_columns: dict[str, dict[str, int | None]],
+    metric: str,
+    options: CompareOptions | None = None,
+) -> list[BenchmarkComparison]:
+    """Compare loaded metric columns, as the command line does.
+
+    Args:
+        base_columns: Base values keyed by metric then name; must include
+            SPREAD_METRICS if confidence is given.
+        pr_columns: PR values keyed by metric then name, likewise.
+        metric: The metric to compare; for THROUGHPUT_METRIC, both sides
+            should include THROUGHPUT_UNIT (see comparison_metrics).
+        options: Thresholds, and the post-passes to apply.
+
+    Returns:
+        List of BenchmarkComparison objects.
+
+    Raises:
+        ValueError: If a confidence is given for a throughput comparison, as
+            the spread of a throughput is not reported, or a noise floor is
+            given for a metric that is not a time (see TIMED_METRICS).
+
+    """
+    if options is None:
+        options = CompareOptions()
+    if options.confidence is not None and metric in THROUGHPUT_METRICS:
+        msg = "Statistical mode does not support the throughput metric"
+        raise ValueError(msg)
+    if options.noise_floor is not None and metric not in TIMED_METRICS:
+        raise ValueError(f"A timer noise floor does not apply to metric '{metric}'")
+    thresholds = options.thresholds
+    comparisons = generate_comparison(base_columns[metric], pr_columns[metric], metric, thresholds=thresholds)
+    if options.confidence is not None:
+        apply_confidence(comparisons, base_columns, pr_columns, options.confidence, thresholds)
+    if options.base_ranges:
+        apply_base_ranges(comparisons, options.base_ranges)
+    if options.noise_floor is not None:
+        apply_noise_floor(comparisons, options.noise_floor)
+    if metric == THROUGHPUT_METRIC:
+        apply_throughput_units(comparisons, base_columns.get(THROUGHPUT_UNIT, {}), pr_columns.get(THROUGHPUT_UNIT, {}))
+    return comparisons
+
+
+def _escape_filter(text: str) -> str:
+    """Escape text for a Divan filter, which is a Rust regular expression."""
+    return "".join(f"\\{char}" if char in FILTER_META_CHARS else char for char in text)
+
+
+def rerun_filter(names: Iterable[str]) -> str:
+    """Build a Divan filter running only the benchmarks that produced the named results.
+
+    Divan matches filters against the path of each benchmark function,
+    e.g. "hashing::sha256", while results are named by the rows of the
+    output tree, which go on below the function for its types and
+    arguments, e.g. "hashing/sha256/1024". Each name therefore matches the
+    functions whose path is a prefix of it; the bench binary of a
+    namespaced name is left out, as cargo passes the filter to every
+    binary.
+
+    Args:
+        names: Result names, as parse_divan gives them.
+
+    Returns:
+        A single regular expression, to be passed as one argument
+        (e.g. cargo bench -- "$(cat filter.txt)").
+
+    """
+    alternatives = set()
+    for name in names:
+        path = name.rpartition(BINARY_SEPARATOR)[2]
+        first, *rest = (_escape_filter(component) for component in path.split("/"))
+        nested = "".join(f"(?:{FILTER_PATH_SEPARATOR}{component}" for component in rest)
+        alternatives.add(f"{first}{nested}{')?' * len(rest)}")
+    return f"^(?:{'|'.join(sorted(alternatives))})$"
+
+
+def confirm_rerun(
+    comparisons: list[BenchmarkComparison],
+    base_columns: dict[str, dict[str, int | None]],
+    rerun_columns: dict[str, dict[str, int | None]],
+    metric: str,
+    options: CompareOptions | None = None,
+) -> RerunSummary:
+    """Compare re-run benchmarks again, replacing their comparisons in place.
+
+    Only the benchmarks in the re-run results are compared again, with the
+    same options as compare_columns; re-run benchmarks that were not part
+    of the comparisons are ignored.
+
+    Args:
+        comparisons: Comparisons of the PR results, as compare_columns returns them.
+        base_columns: Base values keyed by metric then name.
+        rerun_columns: Re-run values keyed by metric then name, likewise.
+        metric: The compared metric.
+        options: The options the comparisons were made with.
+
+    Returns:
+        How many benchmarks were compared again, and which regressions were
+        confirmed or cleared by the re-run.
+
+    """
+    if options is None:
+        options = CompareOptions()
+    thresholds = options.thresholds
+    positions = {comparison.name: index for index, comparison in enumerate(comparisons)}
+    names = rerun_columns[metric].keys() & positions.keys()
+    flagged = {name for name in names if _is_regression(comparisons[positions[name]], thresholds)}
+
+    def select(columns: dict[str, dict[str, int | None]]) -> dict[str, dict[str, int | None]]:
+        """Keep the values of the re-run benchmarks."""
+        return {column: {name: values[name] for name in names if name in values} for column, values in columns.items()}
+
+    recompared = compare_columns(select(base_columns), select(rerun_columns), metric, options)
+    still_flagged = set()
+    for comparison in recompared:
+        comparisons[positions[comparison.name]] = comparison
+        if _is_regression(comparison, thresholds):
+            still_flagged.add(comparison.name)
+    return RerunSummary(len(names), sorted(flagged & still_flagged), sorted(flagged - still_flagged))
+
+
+@contextmanager
+def _gc_paused() -> Iterator[None]:
+    """Pause the cyclic garbage collector while building many objects.
+
+    The objects created here are acyclic, so collections triggered by the
+    allocations alone would only rescan them over and over.
+    """
+    was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if was_enabled:
+            gc.enable()
+
+
+def _all_ints(values: dict[str, Any]) -> bool:
+    """Check that every value is a plain int, i.e. fits the vectorized engine."""
+    return set(map(type, values.values())) <= {int}
+
+
+def _compare_sequential(
+    names: list[str],
+    base_values: dict[str, int | None],
+    pr_values: dict[str, int | None],
+    thresholds: ComparisonThresholds,
+    *,
+    higher_is_better: bool = False,
+) -> list[BenchmarkComparison]:
+    """Compare aligned benchmarks one at a time, in pure Python."""
+    comparisons: list[BenchmarkComparison] = []
+
+    for name in names:
+        in_base = name in base_values
+        in_pr = name in pr_values
+
+        if in_base and in_pr:
+            base_value = base_values[name]
+            pr_value = pr_values[name]
+            change_pct = calculate_change(base_value, pr_value, higher_is_better=higher_is_better)
 
             comparisons.append(
                 BenchmarkComparison(
@@ -243,22 +1414,22 @@ def generate_comparison(
                     status=ComparisonStatus.COMPARED,
                 )
             )
-        elif pr_data and not base_data:
+        elif in_pr:
             comparisons.append(
                 BenchmarkComparison(
                     name=name,
                     base=None,
-                    pr=pr_data[metric]["value"],
+                    pr=pr_values[name],
                     change_pct=None,
                     indicator="🆕",
                     status=ComparisonStatus.NEW,
                 )
             )
-        elif base_data and not pr_data:
+        else:
             comparisons.append(
                 BenchmarkComparison(
                     name=name,
-                    base=base_data[metric]["value"],
+                    base=base_values[name],
                     pr=None,
                     change_pct=None,
                     indicator="🗑️",
@@ -269,11 +1440,226 @@ def generate_comparison(
     return comparisons
 
 
-def generate_markdown(
+if np is not None:
+    # Indicators and statuses by the class codes computed in _compare_vectorized
+    VECTORIZED_INDICATORS = np.array(["", "✅", "❌", "⚠️", "🆕", "🗑️"], dtype=object)
+    VECTORIZED_STATUSES = np.array(
+        [ComparisonStatus.COMPARED] * 4 + [ComparisonStatus.NEW, ComparisonStatus.REMOVED],
+        dtype=object,
+    )
+
+
+def _compare_vectorized(
+    names: list[str],
+    base_values: dict[str, int],
+    pr_values: dict[str, int],
+    thresholds: ComparisonThresholds,
+    *,
+    higher_is_better: bool = False,
+) -> list[BenchmarkComparison] | None:
+    """Compare aligned benchmarks with NumPy, over whole columns at once.
+
+    Gives the same results as _compare_sequential. Returns None when a value
+    is too large to be converted to float64 exactly, in which case the
+    caller falls back to the sequential path.
+    """
+    count = len(names)
+    base = np.fromiter(map(base_values.get, names, itertools.repeat(MISSING)), dtype=np.int64, count=count)
+    pr = np.fromiter(map(pr_values.get, names, itertools.repeat(MISSING)), dtype=np.int64, count=count)
+    in_base = base != MISSING
+    in_pr = pr != MISSING
+
+    if np.abs(base[in_base]).max(initial=0) >= MAX_EXACT_FLOAT_INT or (
+        np.abs(pr[in_pr]).max(initial=0) >= MAX_EXACT_FLOAT_INT
+    ):
+        return None
+
+    compared = in_base & in_pr
+    # The change runs from reference to measured, swapped as in calculate_change
+    reference, measured = (pr, base) if higher_is_better else (base, pr)
+    reference_compared = reference[compared]
+    change = np.zeros(count)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        change[compared] = np.where(
+            reference_compared == 0,
+            0.0,
+            ((measured[compared] - reference_compared) / reference_compared) * 100,
+        )
+    # Class codes index VECTORIZED_INDICATORS and VECTORIZED_STATUSES
+    codes = np.select(
+        [
+            ~in_base,
+            ~in_pr,
+            change <= thresholds.improvement,
+            change > thresholds.error,
+            change > thresholds.warn,
+        ],
+        [4, 5, 1, 2, 3],
+        0,
+    )
+
+    columns = zip(
+        names,
+        np.where(in_base, base, None).tolist(),
+        np.where(in_pr, pr, None).tolist(),
+        np.where(compared, change, None).tolist(),
+        VECTORIZED_INDICATORS[codes].tolist(),
+        VECTORIZED_STATUSES[codes].tolist(),
+        strict=True,
+    )
+    return list(itertools.starmap(BenchmarkComparison, columns))
+
+
+def _is_regression(comparison: BenchmarkComparison, thresholds: ComparisonThresholds) -> bool:
+    """Check whether a comparison is a potential regression (changes without an indicator are not significant)."""
+    return bool(comparison.indicator) and (comparison.change_pct or 0) > thresholds.warn
+
+
+def _is_improvement(comparison: BenchmarkComparison, thresholds: ComparisonThresholds) -> bool:
+    """Check whether a comparison is a significant improvement."""
+    return bool(comparison.indicator) and (comparison.change_pct or 0) < thresholds.improvement
+
+
+def summarize_groups(
+    comparisons: list[BenchmarkComparison],
+    thresholds: ComparisonThresholds | None = None,
+    max_depth: int | None = None,
+) -> list[tuple[str, GroupSummary]]:
+    """Roll comparisons up the tree of benchmark groups, at any depth.
+
+    Names are indexed in a tree_divan.NameTrie, and every group's summary is
+    computed in a single bottom-up pass: its benchmark count, regressions,
+    improvements and the geometric mean of its compared benchmarks' changes,
+    which weighs a 2x slowdown and a 2x speedup equally whatever the
+    benchmarks' magnitudes.
+
+    Args:
+        comparisons: Comparisons from generate_comparison.
+        thresholds: Thresholds for regression/improvement detection.
+        max_depth: Deepest group summarized (1 for top-level groups), or None for all.
+
+    Returns:
+        (group path, summary) pairs, each group before its subgroups.
+
+    """
+    if thresholds is None:
+        thresholds = ComparisonThresholds()
+
+    def leaf(comparison: BenchmarkComparison) -> GroupSummary:
+        summary = GroupSummary(
+            benchmarks=1,
+            regressions=int(_is_regression(comparison, thresholds)),
+            improvements=int(_is_improvement(comparison, thresholds)),
+        )
+        # A change of -100% (a PR value of 0) has no ratio to average
+        if comparison.change_pct is not None and comparison.change_pct > -100:  # noqa: PLR2004
+            summary.compared = 1
+            summary.log_ratio_sum = math.log1p(comparison.change_pct / 100)
+        return summary
+
+    trie = NameTrie.from_items((c.name, c) for c in comparisons)
+    return trie.rollup(leaf, GroupSummary.merge, max_depth=max_depth)
+
+
+def _group_summary_lines(
+    comparisons: list[BenchmarkComparison],
+    thresholds: ComparisonThresholds,
+    max_depth: int,
+) -> list[str]:
+    """Render the table of group summaries shown before the benchmarks."""
+    lines = [
+        "",
+        "### Group summary",
+        "",
+        "| Group | Benchmarks | Geomean change | Regressions | Improvements |",
+        "|-------|------------|----------------|-------------|--------------|",
+    ]
+    for path, summary in summarize_groups(comparisons, thresholds, max_depth):
+        change = summary.geomean_change_pct
+        change_str = "" if change is None else f"{change:+.1f}% {get_change_indicator(change, thresholds)}".strip()
+        lines.append(
+            f"| `{path}` | {summary.benchmarks} | {change_str} | {summary.regressions} | {summary.improvements} |"
+        )
+    return lines
+
+
+def _environment_lines(mismatches: Sequence[FingerprintMismatch]) -> list[str]:
+    """Warn that base and PR hosts differ, as a block quote leading the report."""
+    if not mismatches:
+        return []
+    lines = [
+        "> [!WARNING]",
+        "> **Base and PR were measured on different hosts**: changes may come from the environment, not the code.",
+        ">",
+        "> | Host | Base | PR |",
+        "> |------|------|-----|",
+    ]
+    lines.extend(f"> | {m.label} | `{m.base}` | `{m.pr}` |" for m in mismatches)
+    lines.append("")
+    return lines
+
+
+def _header_lines(title: str, options: ReportOptions) -> list[str]:
+    """Render the title, subtitle and environment warning that start every report."""
+    lines = [f"## {title}"]
+    if options.subtitle:
+        lines.extend(["", f"<sub>{options.subtitle}</sub>"])
+    lines.append("")
+    lines.extend(_environment_lines(options.env_mismatches))
+    return lines
+
+
+def _summary_lines(comparisons: list[BenchmarkComparison], options: ReportOptions) -> list[str]:
+    """Summarize regressions and improvements for the report header."""
+    lines: list[str] = []
+    thresholds, rerun = options.thresholds, options.rerun
+
+    regressions = [c for c in comparisons if _is_regression(c, thresholds)]
+    improvements = [c for c in comparisons if _is_improvement(c, thresholds)]
+
+    if regressions:
+        lines.append(f"**{len(regressions)} potential regression(s)** detected (>{thresholds.warn}% slower)")
+    if improvements:
+        lines.append(f"**{len(improvements)} improvement(s)** detected")
+    incomparable = sum(c.status is ComparisonStatus.INCOMPARABLE for c in comparisons)
+    if incomparable:
+        lines.append(f"{incomparable} benchmark(s) not compared: their throughput units differ.")
+    if options.confidence is not None:
+        lines.append(
+            f"Changes are shown with their {options.confidence:g}% confidence interval and flagged only if significant."
+        )
+    if options.noise_floor is not None:
+        lines.append(
+            f"Changes of at most {format_time(options.noise_floor)} are within timer precision and not flagged."
+        )
+    if rerun is not None:
+        lines.append(
+            f"{rerun.rerun} benchmark(s) re-run: {len(rerun.confirmed)} regression(s) confirmed, "
+            f"{len(rerun.cleared)} cleared."
+        )
+
+    return lines
+
+
+def _report_options(options: ReportOptions | None, **fields: object) -> ReportOptions:
+    """Combine report options with the keyword arguments given explicitly (not None), which take precedence."""
+    return replace(options or ReportOptions(), **{name: value for name, value in fields.items() if value is not None})
+
+
+# The keyword arguments predate ReportOptions and are kept for existing callers
+@stats_divan.timed("generate_markdown")
+def generate_markdown(  # noqa: PLR0913
     comparisons: list[BenchmarkComparison],
     title: str,
     subtitle: str | None = None,
     thresholds: ComparisonThresholds | None = None,
+    confidence: float | None = None,
+    *,
+    summary_depth: int | None = None,
+    noise_floor: int | None = None,
+    env_mismatches: Sequence[FingerprintMismatch] | None = None,
+    rerun: RerunSummary | None = None,
+    options: ReportOptions | None = None,
 ) -> str:
     """Generate markdown report from comparison data.
 
@@ -282,35 +1668,41 @@ def generate_markdown(
         title: Title for the report header.
         subtitle: Optional subtitle displayed below the title.
         thresholds: Thresholds for regression/improvement detection.
+        confidence: Confidence level used by apply_confidence, if any.
+        summary_depth: Deepest group listed in a group summary table (see
+            summarize_groups), or None for no table.
+        noise_floor: Noise floor used by apply_noise_floor, if any.
+        env_mismatches: Differences between the base and PR hosts (see
+            environment_mismatches), warned about before anything else.
+        rerun: Outcome of confirm_rerun, if flagged benchmarks were re-run.
+        options: All of the above at once, as used by the command line;
+            the arguments given explicitly take precedence. max_bytes and
+            top do not apply.
 
     Returns:
         Markdown-formatted report string.
 
     """
-    if thresholds is None:
-        thresholds = ComparisonThresholds()
-
-    lines: list[str] = []
-
-    # Count regressions and improvements
-    regressions = [c for c in comparisons if (c.change_pct or 0) > thresholds.warn]
-    improvements = [c for c in comparisons if (c.change_pct or 0) < thresholds.improvement]
+    options = _report_options(
+        options,
+        subtitle=subtitle,
+        thresholds=thresholds,
+        confidence=confidence,
+        summary_depth=summary_depth,
+        noise_floor=noise_floor,
+        env_mismatches=env_mismatches,
+        rerun=rerun,
+    )
 
-    lines.append(f"## {title}")
-    if subtitle:
-        lines.append("")
-        lines.append(f"<sub>{subtitle}</sub>")
-    lines.append("")
+    lines = _header_lines(title, options)
 
     if not comparisons:
         lines.append("No benchmark data available.")
         return "\n".join(lines)
 
-    # Summary
-    if regressions:
-        lines.append(f"**{len(regressions)} potential regression(s)** detected (>{thresholds.warn}% slower)")
-    if improvements:
-        lines.append(f"**{len(improvements)} improvement(s)** detected")
+    lines.extend(_summary_lines(comparisons, options))
+    if options.summary_depth is not None:
+        lines.extend(_group_summary_lines(comparisons, options.thresholds, options.summary_depth))
 
     # Group benchmarks by category
     groups: dict[str, list[BenchmarkComparison]] = {}
@@ -339,13 +1731,418 @@ def generate_markdown(
     return "\n".join(lines)
 
 
+class _BudgetedWriter:
+    """Write lines to a stream until the next one would exceed a byte budget.
+
+    TRUNCATION_RESERVE bytes of the budget are kept back, so a truncation
+    notice always fits once the writer is full.
+    """
+
+    def __init__(self, stream: TextIO, max_bytes: int | None) -> None:
+        self.stream = stream
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.full = False
+
+    def write_line(self, line: str = "") -> bool:
+        """Write a line if it fits the budget, and tell whether it did."""
+        size = len(line.encode()) + 1
+        if self.max_bytes is not None and self.size + size > self.max_bytes - TRUNCATION_RESERVE:
+            self.full = True
+        if self.full:
+            return False
+        self.stream.write(line + "\n")
+        self.size += size
+        return True
+
+
+def _top_change_lines(comparisons: list[BenchmarkComparison], thresholds: ComparisonThresholds, top: int) -> list[str]:
+    """Render the tables of the largest regressions and improvements that lead a compact report."""
+    regressions = [c for c in comparisons if _is_regression(c, thresholds)]
+    improvements = [c for c in comparisons if _is_improvement(c, thresholds)]
+    regressions.sort(key=lambda c: c.change_pct, reverse=True)
+    improvements.sort(key=lambda c: c.change_pct)
+
+    lines: list[str] = []
+    for heading, top_changes in (("Top regressions", regressions[:top]), ("Top improvements", improvements[:top])):
+        if top_changes:
+            lines.extend(["", f"### {heading}", ""])
+            lines.extend(["| Benchmark | Base | PR | Change |", "|-----------|------|-----|--------|"])
+            lines.extend(format_table_row(c) for c in top_changes)
+    return lines
+
+
+def _write_group_sections(out: _BudgetedWriter, comparisons: list[BenchmarkComparison]) -> tuple[int, bool]:
+    """Write a table per group, collapsing groups without a change, until the budget runs out.
+
+    Returns:
+        The number of benchmark rows written, and whether a <details>
+        section was left open by the budget running out.
+
+    """
+    groups: dict[str, list[BenchmarkComparison]] = {}
+    for c in comparisons:
+        groups.setdefault(get_benchmark_group(c.name), []).append(c)
+    # Groups with a change come first, so they are the last to be truncated
+    ordered_groups = sorted(groups, key=lambda group: (not any(c.indicator for c in groups[group]), group))
+
+    shown = 0
+    details_open = False
+    for group in ordered_groups:
+        group_comparisons = groups[group]
+        out.write_line()
+        if any(c.indicator for c in group_comparisons):
+            out.write_line(f"### {format_group_name(group)}")
+        else:
+            details_open = out.write_line("<details>")
+            out.write_line(
+                f"<summary>{format_group_name(group)}: {len(group_comparisons)} unchanged benchmark(s)</summary>"
+            )
+        out.write_line()
+        out.write_line("| Benchmark | Base | PR | Change |")
+        out.write_line("|-----------|------|-----|--------|")
+        for c in group_comparisons:
+            if not out.write_line(format_table_row(c, get_short_name(c.name))):
+                break
+            shown += 1
+        if details_open:
+            out.write_line()
+            details_open = not out.write_line("</details>")
+        if out.full:
+            break
+    return shown, details_open
+
+
+# The keyword arguments predate ReportOptions and are kept for existing callers
+@stats_divan.timed("generate_markdown")
+def render_markdown(  # noqa: PLR0913
+    comparisons: list[BenchmarkComparison],
+    stream: TextIO,
+    title: str,
+    *,
+    subtitle: str | None = None,
+    thresholds: ComparisonThresholds | None = None,
+    confidence: float | None = None,
+    max_bytes: int | None = None,
+    top: int | None = None,
+    summary_depth: int | None = None,
+    noise_floor: int | None = None,
+    env_mismatches: Sequence[FingerprintMismatch] | None = None,
+    rerun: RerunSummary | None = None,
+    options: ReportOptions | None = None,
+) -> bool:
+    """Stream a compact markdown report to a stream, within a size budget.
+
+    Unlike generate_markdown, the report starts with the top regressions
+    and improvements, then lists groups with a change, and collapses groups
+    without any into <details> sections at the end. Rows are written as they
+    are rendered, and once the next line would exceed max_bytes, the report
+    ends with a note of how many benchmarks were left out. A group summary
+    table, if any, follows the top changes.
+
+    Args:
+        comparisons: List of benchmark comparisons.
+        stream: Text stream to write the report to.
+        title: Title for the report header.
+        subtitle: Optional subtitle displayed below the title.
+        thresholds: Thresholds for regression/improvement detection.
+        confidence: Confidence level used by apply_confidence, if any.
+        max_bytes: Maximum size of the report in UTF-8 bytes, or None for no limit.
+        top: Number of regressions and of improvements listed first
+            (DEFAULT_TOP_CHANGES by default).
+        summary_depth: Deepest group listed in a group summary table, shown
+            after the top changes, or None for no table.
+        noise_floor: Noise floor used by apply_noise_floor, if any.
+        env_mismatches: Differences between the base and PR hosts, warned
+            about before anything else.
+        rerun: Outcome of confirm_rerun, if flagged benchmarks were re-run.
+        options: All of the above at once, as used by the command line;
+            the arguments given explicitly take precedence.
+
+    Returns:
+        True if the report was truncated to fit max_bytes.
+
+    """
+    options = _report_options(
+        options,
+        subtitle=subtitle,
+        thresholds=thresholds,
+        confidence=confidence,
+        max_bytes=max_bytes,
+        top=top,
+        summary_depth=summary_depth,
+        noise_floor=noise_floor,
+        env_mismatches=env_mismatches,
+        rerun=rerun,
+    )
+    thresholds = options.thresholds
+
+    lines = _header_lines(title, options)
+    if not comparisons:
+        lines.append("No benchmark data available.")
+    else:
+        lines.extend(_summary_lines(comparisons, options))
+        lines.extend(_top_change_lines(comparisons, thresholds, options.top))
+        if options.summary_depth is not None:
+            lines.extend(_group_summary_lines(comparisons, thresholds, options.summary_depth))
+
+    out = _BudgetedWriter(stream, options.max_bytes)
+    for line in lines:
+        out.write_line(line)
+    if not comparisons:
+        return out.full
+
+    shown, details_open = _write_group_sections(out, comparisons)
+    if out.full:
+        if details_open:
+            stream.write("\n</details>\n")
+        stream.write(
+            f"\n_Report truncated to {options.max_bytes} bytes: {len(comparisons) - shown} of "
+            f"{len(comparisons)} benchmark(s) not shown._\n"
+        )
+    return out.full
+
+
+@dataclass
+class BenchRun:
+    """Outcome of a bench command run by run_bench_command."""
+
+    pr_columns: dict[str, dict[str, int | None]]
+    regressions: list[str]
+    aborted: bool
+    returncode: int
+    metadata: RunMetadata = field(default_factory=RunMetadata)
+
+
+def _terminate(process: asyncio.subprocess.Process) -> None:
+    """Terminate a bench command and the bench binaries it started."""
+    with suppress(ProcessLookupError):
+        os.killpg(process.pid, signal.SIGTERM)
+
+
+@dataclass
+class BenchOptions:
+    """How run_bench_command runs a bench command and flags its results."""
+
+    metric: str = "mean"
+    thresholds: ComparisonThresholds = field(default_factory=ComparisonThresholds)
+    # Regressions after which the command is aborted, or None to always let it finish
+    max_regressions: int | None = None
+    # Prefix names with the bench binary they ran in
+    namespace_binaries: bool = False
+    # Stream every output line is copied to, if any
+    echo: TextIO | None = None
+    # Multiple of the timer precision below which a change is not a
+    # regression (see timer_noise_floor), or None
+    noise_floor_multiple: float | None = None
+    # Run metadata of the base, whose timer precision counts towards the noise floor
+    base_metadata: RunMetadata | None = None
+    # Fingerprint of this host, recorded in the run's metadata, if captured
+    # (see env_divan.capture_fingerprint)
+    host: HostFingerprint | None = None
+    # Directory the command runs in, by default the current one
+    cwd: str | Path | None = None
+
+
+def _store_row(row: BenchmarkRow, pr_columns: dict[str, dict[str, int | None]], parser: DivanLineParser) -> None:
+    """Add a complete result, and the throughput the parser collected for it, to pr_columns."""
+    name = row[0]
+    for column, value in zip(RESULT_COLUMNS, row[1:], strict=True):
+        pr_columns[column][name] = value
+    counters = parser.throughput.pop(name, None)
+    if counters and counters[0].mean is not None:
+        pr_columns[THROUGHPUT_METRIC][name] = counters[0].mean
+        pr_columns[THROUGHPUT_UNIT][name] = counters[0].unit
+
+
+def _crosses_error_threshold(base: int, pr: int, options: BenchOptions, metadata: RunMetadata) -> bool:
+    """Tell whether a result is a regression of a bench command run, given the run's metadata so far."""
+    if options.noise_floor_multiple is not None:
+        # Bench binaries report their precision before their first result
+        runs = [metadata] if options.base_metadata is None else [options.base_metadata, metadata]
+        noise_floor = timer_noise_floor(options.noise_floor_multiple, runs)
+        if noise_floor is not None and abs(pr - base) <= noise_floor:
+            return False
+    change = calculate_change(base, pr, higher_is_better=options.metric in HIGHER_IS_BETTER)
+    return get_change_indicator(change, options.thresholds) == "❌"
+
+
+async def run_bench_command(
+    command: Sequence[str], base_values: dict[str, int | None], options: BenchOptions | None = None
+) -> BenchRun:
+    """Run a bench command, comparing each result against the base as it is printed.
+
+    The command's stdout and stderr are parsed line by line as it runs (see
+    parse_divan.DivanLineParser). A result counts as a regression when its
+    change crosses the error threshold; once options.max_regressions
+    results do, the command is terminated, along with the bench binaries it
+    started.
+
+    Args:
+        command: The bench command and its arguments, e.g. ["cargo", "bench"].
+        base_values: Base values of the compared metric, keyed by name.
+        options: How the command is run and its results are compared.
+
+    Returns:
+        The results so far, keyed by metric then name, their run metadata,
+        and how the run ended.
+
+    Raises:
+        OSError: If the command cannot be started.
+
+    """
+    if options is None:
+        options = BenchOptions()
+    pr_columns: dict[str, dict[str, int | None]] = {column: {} for column in (*RESULT_COLUMNS, *THROUGHPUT_METRICS)}
+    regressions: list[str] = []
+    parser = DivanLineParser(namespace_binaries=options.namespace_binaries)
+    parser.metadata.host = options.host
+
+    def is_regression(row: BenchmarkRow) -> bool:
+        """Store a complete result, and tell whether it crosses the error threshold."""
+        _store_row(row, pr_columns, parser)
+        base, pr = base_values.get(row[0]), pr_columns[options.metric].get(row[0])
+        return base is not None and pr is not None and _crosses_error_threshold(base, pr, options, parser.metadata)
+
+    # A session of its own lets the bench binaries be terminated with the command
+    process = await asyncio.create_subprocess_exec(
+        *command,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.STDOUT,
+        start_new_session=True,
+        limit=EXEC_LINE_LIMIT,
+        cwd=options.cwd,
+    )
+    aborted = False
+    try:
+        async for raw_line in process.stdout:
+            line = raw_line.decode("utf-8", errors="replace")
+            if options.echo is not None:
+                options.echo.write(line)
+                options.echo.flush()
+            row = parser.feed(line)
+            if row is None or not is_regression(row):
+                continue
+            regressions.append(row[0])
+            if options.max_regressions is not None and len(regressions) >= options.max_regressions:
+                aborted = True
+                _terminate(process)
+                break
+    except BaseException:
+        _terminate(process)
+        await process.wait()
+        raise
+    returncode = await process.wait()
+
+    # The last result is only complete once the output ends
+    row = parser.close()
+    if not aborted and row is not None and is_regression(row):
+        regressions.append(row[0])
+    if stats_divan.hooks_attached():
+        stats_divan.report_counters("parse", parser.counters())
+    return BenchRun(pr_columns, regressions, aborted, returncode, parser.metadata)
+
+
+def format_abort_notice(run: BenchRun, not_run: int) -> str:
+    """Describe an aborted bench run, as a paragraph ending its partial report."""
+    return (
+        f"_Benchmark run aborted after {len(run.regressions)} regression(s) "
+        f"({', '.join(f'`{name}`' for name in run.regressions)}): "
+        f"{not_run} base benchmark(s) not run and left out of this partial report._"
+    )
+
+
+def report_cache_key(base_specs: Sequence[str], pr_file: str, options: dict[str, Any]) -> str | None:
+    """Build the cache key of a report (see cache_divan.cache_key).
+
+    The key covers the contents of every input file, including history
+    databases, this script and the modules in REPORT_MODULES, so reports
+    are not reused across versions of them, and the given command line
+    options.
+
+    Args:
+        base_specs: Base file paths or history specs, after glob expansion.
+        pr_file: Path to the PR benchmark file.
+        options: Parsed command line options.
+
+    Returns:
+        The key, or None if an input cannot be read, in which case the
+        report is not cached and loading reports the error.
+
+    """
+    files = [Path(__file__), *(Path(sys.modules[name].__file__) for name in REPORT_MODULES)]
+    # File names do not affect the report, but the selection of a history spec does
+    history_specs: list[str | None] = []
+    for spec in base_specs:
+        try:
+            history = parse_history_spec(spec)
+        except ValueError:
+            return None
+        files.append(Path(spec) if history is None else history.path)
+        history_specs.append(None if history is None else spec)
+    files.append(Path(pr_file))
+
+    # Options of --exec runs, which are never cached, do not affect a comparison of files either
+    ignored = {
+        "base_files",
+        "pr_file",
+        "output",
+        "cache_dir",
+        "cache_size",
+        "stats",
+        "exec",
+        "max_regressions",
+        "namespace_binaries",
+    }
+    options = {name: value for name, value in options.items() if name not in ignored}
+    options["history_specs"] = history_specs
+    try:
+        return cache_key(files, options)
+    except OSError:
+        return None
+
+
+def open_report_output(output: str | None) -> AbstractContextManager[TextIO]:
+    """Open the report output file, or use stdout (left open) if no output is given."""
+    if output:
+        return Path(output).open("w", encoding="utf-8")
+    return nullcontext(sys.stdout)
+
+
+def write_rerun_filter(path: str, regressed: Sequence[str]) -> None:
+    """Write the rerun_filter of the regressed benchmarks to path, or remove path if none regressed.
+
+    Raises:
+        OSError: If the file cannot be written or removed.
+
+    """
+    if regressed:
+        Path(path).write_text(rerun_filter(regressed) + "\n")
+    else:
+        Path(path).unlink(missing_ok=True)
+
+
+def write_report(markdown: str, output: str | None) -> None:
+    """Write the report to output, or print it if no output is given."""
+    if output:
+        Path(output).write_text(markdown)
+    else:
+        print(markdown)
+
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(
         description="Compare benchmark results between base and PR",
         formatter_class=argparse.ArgumentDefaultsHelpFormatter,
     )
-    parser.add_argument("base_file", help="Path to base benchmark JSON file")
-    parser.add_argument("pr_file", help="Path to PR benchmark JSON file")
+    parser.add_argument(
+        "base_files",
+        nargs="+",
+        metavar="base_file",
+        help="Path to base benchmark file (JSON or binary), or a history spec like "
+        "history:bench.db?branch=main&last=5. Several files or a glob are aggregated into one baseline",
+    )
+    parser.add_argument("pr_file", nargs="?", help="Path to PR benchmark file (JSON or binary); omitted with --exec")
     parser.add_argument(
         "--title",
         default="Benchmarks",
@@ -358,8 +2155,9 @@ if __name__ == "__main__":
     parser.add_argument(
         "--metric",
         default="mean",
-        choices=["fastest", "slowest", "median", "mean"],
-        help="Metric to use for comparison",
+        choices=["fastest", "slowest", "median", "mean", THROUGHPUT_METRIC],
+        help="Metric to use for comparison; throughput compares the mean of each benchmark's first "
+        "throughput counter, where higher is better",
     )
     parser.add_argument(
         "--improvement-threshold",
@@ -379,6 +2177,93 @@ if __name__ == "__main__":
         default=10.0,
         help="Threshold for error/regression indicator (in %%)",
     )
+    parser.add_argument(
+        "--aggregate",
+        default="median",
+        choices=sorted(AGGREGATES),
+        help="How several base files are combined into one baseline",
+    )
+    parser.add_argument(
+        "--confidence",
+        type=float,
+        help="Statistical mode: only flag changes significant at this confidence level (in %%, e.g. 95), "
+        "estimated from each benchmark's fastest/slowest spread and sample count",
+    )
+    parser.add_argument(
+        "--noise-floor",
+        type=float,
+        metavar="MULTIPLE",
+        help="Do not flag changes of at most this multiple of the timer precision recorded in the base and PR "
+        "results (e.g. 2), which are noise for nanosecond-scale benchmarks",
+    )
+    parser.add_argument(
+        "--strict-env",
+        action="store_true",
+        help="Refuse to compare unless the base and PR results carry matching host fingerprints "
+        "(parse_divan.py --capture-env); without it, mismatches are only warned about in the report",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        help="Directory caching reports by a hash of the input files and options; a hit skips loading entirely",
+    )
+    parser.add_argument(
+        "--cache-size",
+        type=float,
+        default=DEFAULT_CACHE_SIZE / 1024 / 1024,
+        help="Size limit of the cache directory (in MiB), least recently used reports are evicted first",
+    )
+    parser.add_argument(
+        "--max-bytes",
+        type=int,
+        help="Write a compact report of at most this many bytes (e.g. 65000 for a GitHub comment): "
+        "top changes first, unchanged groups collapsed, truncated once the budget is reached",
+    )
+    parser.add_argument(
+        "--top",
+        type=int,
+        default=DEFAULT_TOP_CHANGES,
+        help="Number of regressions and of improvements listed first in a compact report",
+    )
+    parser.add_argument(
+        "--summary-depth",
+        type=int,
+        help="Add a table summarizing each group down to this depth (1 for top-level groups): "
+        "benchmark count, geometric mean change, regressions and improvements",
+    )
+    parser.add_argument(
+        "--stats",
+        action="store_true",
+        help="Report wall time and peak memory of each phase to stderr",
+    )
+    parser.add_argument(
+        "--exec",
+        help="Run this bench command (e.g. 'cargo bench') instead of reading a PR file, comparing each result "
+        "as it is printed; its output is echoed to stderr",
+    )
+    parser.add_argument(
+        "--max-regressions",
+        type=int,
+        default=DEFAULT_MAX_REGRESSIONS,
+        help="With --exec, abort the bench command with a partial report once this many benchmarks "
+        "cross the error threshold (0 to never abort)",
+    )
+    parser.add_argument(
+        "--namespace-binaries",
+        action="store_true",
+        help="With --exec, prefix names with their bench binary, as parse_divan.py --namespace-binaries does",
+    )
+    parser.add_argument(
+        "--rerun-filter",
+        metavar="FILE",
+        help="Write a Divan filter running only the regressed benchmarks to FILE, to confirm them with e.g. "
+        'cargo bench -- "$(cat FILE)"; FILE is removed if nothing regressed',
+    )
+    parser.add_argument(
+        "--confirm",
+        metavar="RERUN_FILE",
+        help="Results of re-running flagged benchmarks (JSON or binary): they replace the PR results of the same "
+        "benchmarks, which alone are compared again, and the report counts the regressions confirmed and cleared",
+    )
     parser.add_argument(
         "-o",
         "--output",
@@ -387,6 +2272,35 @@ if __name__ == "__main__":
 
     args = parser.parse_args()
 
+    if args.exec is None:
+        # Base files take every positional argument, so the PR file is split off here
+        if args.pr_file is None:
+            if len(args.base_files) < 2:  # noqa: PLR2004
+                parser.error("the following arguments are required: pr_file (or --exec)")
+            *args.base_files, args.pr_file = args.base_files
+    elif args.pr_file is not None:
+        args.base_files.append(args.pr_file)
+        args.pr_file = None
+    if args.exec is not None and args.cache_dir:
+        parser.error("--cache-dir cannot be used with --exec")
+    if (args.rerun_filter or args.confirm) and args.cache_dir:
+        parser.error("--cache-dir cannot be used with --rerun-filter or --confirm")
+
+    try:
+        check_options(
+            args.metric,
+            confidence=args.confidence,
+            noise_floor=args.noise_floor,
+            summary_depth=args.summary_depth,
+            max_bytes=args.max_bytes,
+        )
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+    if args.max_regressions < 0:
+        print("Error: --max-regressions must not be negative", file=sys.stderr)
+        sys.exit(1)
+
     # Convert improvement threshold to negative
     thresholds = ComparisonThresholds(
         improvement=-abs(args.improvement_threshold),
@@ -394,23 +2308,124 @@ if __name__ == "__main__":
         error=args.error_threshold,
     )
 
-    base_benchmarks = load_benchmarks(args.base_file, args.metric)
-    pr_benchmarks = load_benchmarks(args.pr_file, args.metric)
+    base_files = expand_base_specs(args.base_files)
 
-    comparisons = generate_comparison(
-        base_benchmarks,
-        pr_benchmarks,
-        args.metric,
-        thresholds=thresholds,
-    )
-    markdown = generate_markdown(
-        comparisons,
-        args.title,
-        subtitle=args.subtitle,
-        thresholds=thresholds,
-    )
-
-    if args.output:
-        Path(args.output).write_text(markdown)
-    else:
-        print(markdown)
+    cache = None
+    if args.cache_dir:
+        try:
+            cache = ReportCache(args.cache_dir, int(args.cache_size * 1024 * 1024))
+        except OSError as e:
+            print(f"Error: Cannot open cache directory '{args.cache_dir}': {e}", file=sys.stderr)
+            sys.exit(1)
+        key = report_cache_key(base_files, args.pr_file, vars(args))
+
+    run = None
+    with stats_divan.collect_stats() if args.stats else nullcontext() as collector:
+        markdown = cache.get(key) if cache is not None and key is not None else None
+        cache_hit = markdown is not None
+        if cache is not None:
+            stats_divan.report_counters("cache", {"cache_hits": int(cache_hit)})
+        if markdown is None:
+            metrics = comparison_metrics(args.metric, args.confidence)
+            base_ranges: dict[str, dict[str, tuple[int, int]]] = {}
+            base_metadata, pr_metadata = RunMetadata(), RunMetadata()
+            if len(base_files) == 1:
+                base_columns = load_baseline_columns(base_files[0], metrics, base_metadata)
+            else:
+                base_columns, base_ranges = aggregate_baseline_columns(
+                    base_files, metrics, args.aggregate, base_metadata
+                )
+            if args.exec is None:
+                pr_columns = load_metric_columns(args.pr_file, metrics, pr_metadata)
+            else:
+                # The bench command runs here, so this host is the PR's, checked before it runs
+                pr_metadata.host = capture_fingerprint()
+            try:
+                env_mismatches = environment_mismatches(base_metadata, pr_metadata, strict=args.strict_env)
+            except ValueError as e:
+                print(f"Error: {e}", file=sys.stderr)
+                sys.exit(1)
+            if args.exec is not None:
+                try:
+                    run = asyncio.run(
+                        run_bench_command(
+                            shlex.split(args.exec),
+                            base_columns[args.metric],
+                            BenchOptions(
+                                args.metric,
+                                thresholds,
+                                max_regressions=args.max_regressions or None,
+                                namespace_binaries=args.namespace_binaries,
+                                echo=sys.stderr,
+                                noise_floor_multiple=args.noise_floor,
+                                base_metadata=base_metadata,
+                                host=pr_metadata.host,
+                            ),
+                        )
+                    )
+                except OSError as e:
+                    print(f"Error: Cannot run '{args.exec}': {e}", file=sys.stderr)
+                    sys.exit(1)
+                pr_columns, pr_metadata = run.pr_columns, run.metadata
+            abort_notice = None
+            if run is not None and run.aborted:
+                # Benchmarks the aborted run never reached are not reported as removed
+                reached = pr_columns[args.metric]
+                not_run = len(base_columns[args.metric].keys() - reached.keys())
+                base_columns = {
+                    metric: {name: value for name, value in values.items() if name in reached}
+                    for metric, values in base_columns.items()
+                }
+                abort_notice = format_abort_notice(run, not_run)
+
+            rerun_metadata = RunMetadata()
+            if args.confirm:
+                rerun_columns = load_metric_columns(args.confirm, metrics, rerun_metadata)
+            noise_floor = None
+            if args.noise_floor is not None:
+                noise_floor = timer_noise_floor(args.noise_floor, [base_metadata, pr_metadata, rerun_metadata])
+            compare_options = CompareOptions(thresholds, args.confidence, base_ranges.get(args.metric), noise_floor)
+            comparisons = compare_columns(base_columns, pr_columns, args.metric, compare_options)
+            rerun = None
+            if args.confirm:
+                rerun = confirm_rerun(comparisons, base_columns, rerun_columns, args.metric, compare_options)
+            if args.rerun_filter:
+                try:
+                    write_rerun_filter(
+                        args.rerun_filter, [c.name for c in comparisons if _is_regression(c, thresholds)]
+                    )
+                except OSError as e:
+                    print(f"Error: Cannot write rerun filter '{args.rerun_filter}': {e}", file=sys.stderr)
+                    sys.exit(1)
+            report_options = ReportOptions(
+                subtitle=args.subtitle,
+                thresholds=thresholds,
+                confidence=args.confidence,
+                summary_depth=args.summary_depth,
+                noise_floor=noise_floor,
+                env_mismatches=env_mismatches,
+                rerun=rerun,
+                top=args.top,
+            )
+            if args.max_bytes is None:
+                markdown = generate_markdown(comparisons, args.title, options=report_options)
+                if abort_notice is not None:
+                    markdown += f"\n\n{abort_notice}"
+            else:
+                # Compact reports are streamed straight to the output, unless they are cached
+                output = nullcontext(io.StringIO()) if cache is not None else open_report_output(args.output)
+                ending = "" if abort_notice is None else f"\n{abort_notice}\n"
+                with output as output_stream:
+                    report_options.max_bytes = args.max_bytes - len(ending.encode())
+                    render_markdown(comparisons, output_stream, args.title, options=report_options)
+                    output_stream.write(ending)
+                    markdown = output_stream.getvalue() if cache is not None else None
+    if markdown is not None:
+        write_report(markdown, args.output)
+        # Cached only once written, as caching is best-effort and must not lose the report
+        if cache is not None and key is not None and not cache_hit:
+            cache.put(key, markdown)
+    if collector is not None:
+        sys.stderr.write(collector.format_report())
+    if run is not None and (run.aborted or run.returncode):
+        sys.exit(1 if run.aborted else run.returncode)
@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""Fingerprint the host a benchmark run was measured on.
+
+A base run from a bare-metal machine and a PR run from a throttled VM
+differ by far more than any PR does. parse_divan.py --capture-env records
+a HostFingerprint in the run metadata, and compare_divan.py warns when the
+base and PR fingerprints disagree (or refuses them with --strict-env).
+
+Everything is read from /proc, /sys and the os module, so capturing costs a
+few small file reads; the only command run is ``rustc --version``, and only
+if rustc is on PATH.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+from dataclasses import asdict, dataclass, fields
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from collections.abc import Sequence
+
+# Source of the CPU model on Linux
+CPUINFO_PATH = Path("/proc/cpuinfo")
+
+# Keys of /proc/cpuinfo naming the CPU model, by preference (x86, then ARM)
+CPUINFO_MODEL_KEYS = ("model name", "Hardware", "Processor")
+
+# Frequency governor of the first CPU, which CI runners set for all CPUs
+GOVERNOR_PATH = Path("/sys/devices/system/cpu/cpu0/cpufreq/scaling_governor")
+
+# Seconds rustc --version may take before it is given up on
+RUSTC_TIMEOUT = 5
+
+# Failures of rustc --version, which leave the version unknown
+RUSTC_ERRORS = (OSError, subprocess.SubprocessError)
+
+# Fields that identify the host; the load average describes the moment of capture instead
+IDENTITY_FIELDS = ("cpu_model", "cores", "governor", "kernel", "rustc")
+
+# Labels of the fingerprint fields in reports
+FIELD_LABELS = {
+    "cpu_model": "CPU model",
+    "cores": "Cores",
+    "governor": "Frequency governor",
+    "kernel": "Kernel",
+    "load_average": "Load average (1 min)",
+    "rustc": "rustc",
+}
+
+
+class InvalidFingerprintError(ValueError):
+    """Raised when a recorded host fingerprint has the wrong shape."""
+
+
+@dataclass
+class HostFingerprint:
+    """Where a run was measured; fields that could not be read are None."""
+
+    cpu_model: str | None = None
+    cores: int | None = None
+    governor: str | None = None
+    kernel: str | None = None
+    load_average: float | None = None
+    rustc: str | None = None
+
+    def to_dict(self) -> dict[str, Any]:
+        """Convert to dictionary for JSON serialization, leaving out unknown fields."""
+        return {name: value for name, value in asdict(self).items() if value is not None}
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> HostFingerprint:
+        """Build a fingerprint from its JSON representation; unknown keys are ignored.
+
+        Raises:
+            InvalidFingerprintError: If a field has the wrong type.
+
+        """
+        if not isinstance(data, dict):
+            raise InvalidFingerprintError(f"Host fingerprint must be an object, got {type(data).__name__}")
+        values: dict[str, Any] = {}
+        for spec in fields(cls):
+            value = data.get(spec.name)
+            if value is None:
+                continue
+            expected = {"cores": int, "load_average": int | float}.get(spec.name, str)
+            if not isinstance(value, expected) or isinstance(value, bool):
+                raise InvalidFingerprintError(f"Host fingerprint has an invalid '{spec.name}'")
+            values[spec.name] = value
+        return cls(**values)
+
+
+@dataclass
+class FingerprintMismatch:
+    """A field on which the base and PR hosts disagree."""
+
+    field: str
+    base: Any
+    pr: Any
+
+    @property
+    def label(self) -> str:
+        """Name of the field in reports."""
+        return FIELD_LABELS[self.field]
+
+
+def _read_text(path: Path) -> str | None:
+    """Read a small text file, or None if it cannot be read."""
+    try:
+        return path.read_text(encoding="utf-8", errors="replace")
+    except OSError:
+        return None
+
+
+def read_cpu_model(cpuinfo: Path = CPUINFO_PATH) -> str | None:
+    """Read the CPU model from /proc/cpuinfo, falling back to the machine type."""
+    found: dict[str, str] = {}
+    for line in (_read_text(cpuinfo) or "").splitlines():
+        key, _, value = line.partition(":")
+        key, value = key.strip(), value.strip()
+        if key in CPUINFO_MODEL_KEYS and value:
+            found.setdefault(key, value)
+            # Every CPU repeats its model, so the first one is enough
+            if key == CPUINFO_MODEL_KEYS[0]:
+                break
+    return next((found[key] for key in CPUINFO_MODEL_KEYS if key in found), platform.machine() or None)
+
+
+def count_cores() -> int | None:
+    """Count the CPUs this process may run on, which may be fewer than the machine has."""
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count()
+
+
+def read_governor(path: Path = GOVERNOR_PATH) -> str | None:
+    """Read the CPU frequency governor, or None where it is not exposed (e.g. most VMs)."""
+    text = _read_text(path)
+    if text is None:
+        return None
+    return text.strip() or None
+
+
+def read_load_average() -> float | None:
+    """Read the 1-minute load average, or None where it is not available."""
+    if not hasattr(os, "getloadavg"):
+        return None
+    try:
+        return round(os.getloadavg()[0], 2)
+    except OSError:
+        return None
+
+
+def read_rustc_version() -> str | None:
+    """Run ``rustc --version`` if rustc is on PATH, or return None."""
+    rustc = shutil.which("rustc")
+    if rustc is None:
+        return None
+    try:
+        completed = subprocess.run(  # noqa: S603
+            [rustc, "--version"], capture_output=True, text=True, timeout=RUSTC_TIMEOUT, check=True
+        )
+    except RUSTC_ERRORS:
+        return None
+    return completed.stdout.strip() or None
+
+
+def capture_fingerprint() -> HostFingerprint:
+    """Fingerprint the current host."""
+    return HostFingerprint(
+        cpu_model=read_cpu_model(),
+        cores=count_cores(),
+        governor=read_governor(),
+        kernel=platform.release() or None,
+        load_average=read_load_average(),
+        rustc=read_rustc_version(),
+    )
+
+
+def compare_fingerprints(base: HostFingerprint, pr: HostFingerprint) -> list[FingerprintMismatch]:
+    """List the identity fields on which two hosts disagree.
+
+    Fields unknown on either side are not compared, so a fingerprint taken
+    where, say, the governor is not exposed does not mismatch on it alone.
+    """
+    mismatches = []
+    for name in IDENTITY_FIELDS:
+        base_value, pr_value = getattr(base, name), getattr(pr, name)
+        if base_value is not None and pr_value is not None and base_value != pr_value:
+            mismatches.append(FingerprintMismatch(name, base_value, pr_value))
+    return mismatches
+
+
+def compare_host_sets(base: Sequence[HostFingerprint], pr: Sequence[HostFingerprint]) -> list[FingerprintMismatch]:
+    """List the identity fields on which two sets of hosts disagree.
+
+    Results merged from several shards or base runs may have been measured
+    on several hosts (see parse_divan.RunMetadata.hosts). A field mismatches
+    if the two sides disagree on it or the hosts of either side disagree
+    among themselves; the values of a side are then joined with " / ".
+    Unknown fields are skipped as in compare_fingerprints.
+    """
+    mismatches = []
+    for name in IDENTITY_FIELDS:
+        base_values = {value for host in base if (value := getattr(host, name)) is not None}
+        pr_values = {value for host in pr if (value := getattr(host, name)) is not None}
+        if base_values and pr_values and (base_values != pr_values or len(base_values) > 1):
+            mismatches.append(FingerprintMismatch(name, _join_values(base_values), _join_values(pr_values)))
+    return mismatches
+
+
+def _join_values(values: set[Any]) -> Any:  # noqa: ANN401
+    """Show the values of a field across hosts: the value itself if there is only one."""
+    if len(values) == 1:
+        return next(iter(values))
+    return " / ".join(sorted(map(str, values)))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Print the fingerprint of this host, as parse_divan.py --capture-env records it.",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    parser.parse_args()
+    json.dump(capture_fingerprint().to_dict(), sys.stdout, indent=2)
+    sys.stdout.write("\n")
@@ -0,0 +1,403 @@
+#!/usr/bin/env python3
+"""Store benchmark runs in a local SQLite history database.
+
+Results produced by parse_divan.py are appended to the database together
+with the commit, branch, timestamp and run id they were measured at, so
+that compare_divan.py can compare against past runs (for instance "the
+last 5 runs on main") without keeping every JSON file around.
+"""
+
+from __future__ import annotations
+
+import argparse
+import sqlite3
+import statistics
+import sys
+import uuid
+from dataclasses import dataclass
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import TYPE_CHECKING, Self
+from urllib.parse import parse_qs, urlsplit
+
+from parse_divan import RESULT_COLUMNS
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+    from types import TracebackType
+
+# Prefix of baseline specs that refer to a history database instead of a file
+HISTORY_SPEC_SCHEME = "history"
+
+# Version of the database layout, stored in SQLite's user_version
+SCHEMA_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    run_id TEXT NOT NULL UNIQUE,
+    commit_sha TEXT NOT NULL,
+    branch TEXT NOT NULL,
+    timestamp TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS runs_commit ON runs (commit_sha);
+CREATE INDEX IF NOT EXISTS runs_branch_timestamp ON runs (branch, timestamp);
+
+CREATE TABLE IF NOT EXISTS benchmarks (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+
+CREATE TABLE IF NOT EXISTS results (
+    run INTEGER NOT NULL REFERENCES runs (id) ON DELETE CASCADE,
+    benchmark INTEGER NOT NULL REFERENCES benchmarks (id),
+    fastest INTEGER,
+    slowest INTEGER,
+    median INTEGER,
+    mean INTEGER,
+    samples INTEGER,
+    iters INTEGER,
+    PRIMARY KEY (run, benchmark)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS results_benchmark ON results (benchmark, run);
+"""
+
+
+class HistoryError(Exception):
+    """Raised when the history database cannot be read or written."""
+
+
+@dataclass
+class RunInfo:
+    """Identifies a single benchmark run in the history database."""
+
+    run_id: str
+    commit: str
+    branch: str
+    timestamp: str
+
+
+@dataclass
+class HistorySpec:
+    """Selection of past runs to use as a baseline.
+
+    Parsed from specs like "history:bench.db?branch=main&last=5". Without
+    a branch, runs from every branch are considered; a commit restricts the
+    selection to runs of that commit.
+    """
+
+    path: Path
+    branch: str | None = None
+    commit: str | None = None
+    last: int = 1
+
+
+def parse_history_spec(spec: str) -> HistorySpec | None:
+    """Parse a history baseline spec.
+
+    Args:
+        spec: A spec like "history:bench.db?branch=main&last=5".
+
+    Returns:
+        The parsed spec, or None if spec is not a history spec (e.g. a file path).
+
+    Raises:
+        ValueError: If the spec is malformed.
+
+    """
+    parts = urlsplit(spec)
+    if parts.scheme != HISTORY_SPEC_SCHEME:
+        return None
+    if not parts.path:
+        raise ValueError(f"History spec '{spec}' has no database path")
+
+    query = {key: values[-1] for key, values in parse_qs(parts.query, strict_parsing=bool(parts.query)).items()}
+    unknown = query.keys() - {"branch", "commit", "last"}
+    if unknown:
+        raise ValueError(f"Unknown history spec option(s) in '{spec}': {', '.join(sorted(unknown))}")
+
+    try:
+        last = int(query.get("last", "1"))
+    except ValueError:
+        raise ValueError(f"History spec '{spec}' has a non-integer 'last' option") from None
+    if last < 1:
+        raise ValueError(f"History spec '{spec}' must select at least one run")
+
+    return HistorySpec(path=Path(parts.path), branch=query.get("branch"), commit=query.get("commit"), last=last)
+
+
+def normalize_timestamp(timestamp: str) -> str:
+    """Convert an ISO 8601 time to UTC, in the single format stored in the database.
+
+    Runs are ordered by their stored timestamp as text, which only matches
+    chronological order when every timestamp shares one format and zone.
+    A time without a UTC offset is taken to be in UTC.
+
+    Raises:
+        HistoryError: If timestamp is not an ISO 8601 time.
+
+    """
+    try:
+        moment = datetime.fromisoformat(timestamp)
+    except ValueError as e:
+        raise HistoryError(
+            f"Invalid timestamp '{timestamp}', expected ISO 8601 such as 2026-01-31T12:00:00+01:00"
+        ) from e
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=UTC)
+    return moment.astimezone(UTC).isoformat(timespec="seconds")
+
+
+class HistoryStore:
+    """Local SQLite database of benchmark runs.
+
+    Use as a context manager so the connection is closed afterwards.
+    """
+
+    def __init__(self, path: str | Path, *, readonly: bool = False) -> None:
+        """Open (and, unless readonly, create) the database at path.
+
+        Raises:
+            HistoryError: If the database cannot be opened.
+
+        """
+        self.path = Path(path)
+        try:
+            if readonly:
+                self.connection = sqlite3.connect(f"{self.path.resolve().as_uri()}?mode=ro", uri=True)
+            else:
+                self.connection = sqlite3.connect(self.path)
+                self.connection.executescript(SCHEMA)
+                self.connection.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+            version = self.connection.execute("PRAGMA user_version").fetchone()[0]
+        except sqlite3.Error as e:
+            raise HistoryError(f"Cannot open history database '{self.path}': {e}") from e
+        if version != SCHEMA_VERSION:
+            self.connection.close()
+            raise HistoryError(
+                f"History database '{self.path}' has schema version {version}, expected {SCHEMA_VERSION}"
+            )
+
+    def __enter__(self) -> Self:
+        """Return the store itself."""
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        """Close the database connection."""
+        self.connection.close()
+
+    def ingest(self, run: RunInfo, columns: dict[str, dict[str, int | None]]) -> None:
+        """Append the results of a run in a single transaction.
+
+        Args:
+            run: Identification of the run; its timestamp is stored
+                normalized to UTC (see normalize_timestamp).
+            columns: Metric values keyed by metric, then benchmark name, as
+                returned by compare_divan.load_metric_columns for RESULT_COLUMNS.
+
+        Raises:
+            HistoryError: If the timestamp is invalid, the run id already
+                exists or the write fails.
+
+        """
+        timestamp = normalize_timestamp(run.timestamp)
+        names = list(columns[RESULT_COLUMNS[0]])
+        try:
+            with self.connection:
+                cursor = self.connection.execute(
+                    "INSERT INTO runs (run_id, commit_sha, branch, timestamp) VALUES (?, ?, ?, ?)",
+                    (run.run_id, run.commit, run.branch, timestamp),
+                )
+                run_key = cursor.lastrowid
+                self.connection.executemany(
+                    "INSERT OR IGNORE INTO benchmarks (name) VALUES (?)", ((name,) for name in names)
+                )
+                self.connection.executemany(
+                    "INSERT INTO results (run, benchmark, fastest, slowest, median, mean, samples, iters) "
+                    "SELECT ?, id, ?, ?, ?, ?, ?, ? FROM benchmarks WHERE name = ?",
+                    ((run_key, *(columns[metric][name] for metric in RESULT_COLUMNS), name) for name in names),
+                )
+        except sqlite3.IntegrityError as e:
+            raise HistoryError(f"Run '{run.run_id}' is already in '{self.path}'") from e
+        except sqlite3.Error as e:
+            raise HistoryError(f"Cannot write to history database '{self.path}': {e}") from e
+
+    def select_runs(
+        self, *, branch: str | None = None, commit: str | None = None, last: int | None = None
+    ) -> list[RunInfo]:
+        """Return the most recent runs, newest first.
+
+        Args:
+            branch: Only consider runs on this branch.
+            commit: Only consider runs of this commit.
+            last: Maximum number of runs to return; all runs if None.
+
+        """
+        query = "SELECT run_id, commit_sha, branch, timestamp FROM runs WHERE 1 = 1"
+        parameters: list[str | int] = []
+        if branch is not None:
+            query += " AND branch = ?"
+            parameters.append(branch)
+        if commit is not None:
+            query += " AND commit_sha = ?"
+            parameters.append(commit)
+        query += " ORDER BY timestamp DESC, id DESC"
+        if last is not None:
+            query += " LIMIT ?"
+            parameters.append(last)
+        try:
+            return [RunInfo(*row) for row in self.connection.execute(query, parameters)]
+        except sqlite3.Error as e:
+            raise HistoryError(f"Cannot read history database '{self.path}': {e}") from e
+
+    def iter_metric(self, run_ids: list[str], metric: str) -> Iterator[tuple[str, str, int | None]]:
+        """Yield (run id, benchmark name, value) for one metric of the given runs.
+
+        Raises:
+            ValueError: If metric is not one of RESULT_COLUMNS.
+            HistoryError: If the database cannot be read.
+
+        """
+        if metric not in RESULT_COLUMNS:
+            raise ValueError(f"Unknown metric '{metric}', expected one of {', '.join(RESULT_COLUMNS)}")
+        placeholders = ", ".join("?" * len(run_ids))
+        query = (
+            f"SELECT runs.run_id, benchmarks.name, results.{metric} FROM results "  # noqa: S608
+            "JOIN runs ON runs.id = results.run JOIN benchmarks ON benchmarks.id = results.benchmark "
+            f"WHERE runs.run_id IN ({placeholders})"
+        )
+        try:
+            yield from self.connection.execute(query, run_ids)
+        except sqlite3.Error as e:
+            raise HistoryError(f"Cannot read history database '{self.path}': {e}") from e
+
+    def baseline_values(self, spec: HistorySpec, metric: str) -> dict[str, int]:
+        """Build a baseline from the runs selected by spec.
+
+        Each benchmark's value is the median over the selected runs it
+        appears in, rounded to the nearest integer.
+
+        Raises:
+            HistoryError: If no run matches spec, or the database cannot be read.
+
+        """
+        runs = self.select_runs(branch=spec.branch, commit=spec.commit, last=spec.last)
+        if not runs:
+            raise HistoryError(f"No runs in '{self.path}' match branch={spec.branch} commit={spec.commit}")
+
+        values: dict[str, list[int]] = {}
+        for _, name, value in self.iter_metric([run.run_id for run in runs], metric):
+            if value is not None:
+                values.setdefault(name, []).append(value)
+        return {name: round(statistics.median(samples)) for name, samples in values.items()}
+
+    def series_values(self, spec: HistorySpec, metric: str) -> tuple[list[RunInfo], dict[str, list[int | None]]]:
+        """Collect the values of every benchmark across the runs selected by spec.
+
+        Returns:
+            The selected runs, oldest first, and each benchmark's values in
+            the same order, None where a run did not measure it.
+
+        Raises:
+            HistoryError: If no run matches spec, or the database cannot be read.
+
+        """
+        runs = self.select_runs(branch=spec.branch, commit=spec.commit, last=spec.last)
+        if not runs:
+            raise HistoryError(f"No runs in '{self.path}' match branch={spec.branch} commit={spec.commit}")
+        runs.reverse()
+
+        positions = {run.run_id: position for position, run in enumerate(runs)}
+        series: dict[str, list[int | None]] = {}
+        for run_id, name, value in self.iter_metric(list(positions), metric):
+            values = series.get(name)
+            if values is None:
+                values = series[name] = [None] * len(runs)
+            values[positions[run_id]] = value
+        return runs, series
+
+
+def load_history_baseline(spec: HistorySpec, metric: str) -> dict[str, int]:
+    """Open the database named by spec and build a baseline from it.
+
+    Raises:
+        HistoryError: If the database cannot be read or no run matches.
+
+    """
+    if not spec.path.exists():
+        raise HistoryError(f"History database '{spec.path}' not found")
+    with HistoryStore(spec.path, readonly=True) as store:
+        return store.baseline_values(spec, metric)
+
+
+def load_history_series(spec: HistorySpec, metric: str) -> tuple[list[RunInfo], dict[str, list[int | None]]]:
+    """Open the database named by spec and collect the series of every benchmark.
+
+    Raises:
+        HistoryError: If the database cannot be read or no run matches.
+
+    """
+    if not spec.path.exists():
+        raise HistoryError(f"History database '{spec.path}' not found")
+    with HistoryStore(spec.path, readonly=True) as store:
+        return store.series_values(spec, metric)
+
+
+if __name__ == "__main__":
+    from compare_divan import load_metric_columns
+
+    parser = argparse.ArgumentParser(
+        description="Store benchmark runs in a local SQLite history database.",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument("--db", required=True, help="Path to the history database")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    ingest_parser = subparsers.add_parser(
+        "ingest",
+        help="Append a parse_divan.py result file as a new run",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    ingest_parser.add_argument("results", help="Path to a parse_divan.py result file (JSON or binary)")
+    ingest_parser.add_argument("--commit", required=True, help="Commit the results were measured at")
+    ingest_parser.add_argument("--branch", required=True, help="Branch the results were measured on")
+    ingest_parser.add_argument(
+        "--timestamp", help="ISO 8601 time of the run, UTC unless it has an offset (default: now)"
+    )
+    ingest_parser.add_argument("--run-id", help="Unique id of the run (default: random)")
+
+    runs_parser = subparsers.add_parser(
+        "runs",
+        help="List stored runs, newest first",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    runs_parser.add_argument("--branch", help="Only list runs on this branch")
+    runs_parser.add_argument("--last", type=int, help="Maximum number of runs to list")
+
+    args = parser.parse_args()
+
+    try:
+        if args.command == "ingest":
+            timestamp = args.timestamp or datetime.now(UTC).isoformat(timespec="seconds")
+            run = RunInfo(
+                run_id=args.run_id or uuid.uuid4().hex,
+                commit=args.commit,
+                branch=args.branch,
+                timestamp=timestamp,
+            )
+            columns = load_metric_columns(args.results, RESULT_COLUMNS)
+            with HistoryStore(args.db) as store:
+                store.ingest(run, columns)
+            print(f"Ingested {len(columns[RESULT_COLUMNS[0]])} benchmark(s) as run '{run.run_id}'")
+        else:
+            with HistoryStore(args.db, readonly=True) as store:
+                for run in store.select_runs(branch=args.branch, last=args.last):
+                    print(f"{run.timestamp}  {run.branch}  {run.commit}  {run.run_id}")
+    except HistoryError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
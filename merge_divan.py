@@ -0,0 +1,338 @@
+#!/usr/bin/env python3
+"""Merge benchmark result files from a sharded bench suite into one.
+
+When a suite is split across CI machines, each shard is parsed into its own
+result file. Concatenating them would hide benchmarks measured by several
+shards, so shards are merged instead: each must be sorted by name
+(``parse_divan.py --sort``), and a single k-way merge pass holds one entry
+per shard at a time, so memory use does not depend on the size of the
+shards. A benchmark found in several shards is handled by an explicit
+duplicate policy, and shards that cannot belong to the same suite are
+rejected. The output is a result file compare_divan.py accepts.
+"""
+
+from __future__ import annotations
+
+import argparse
+import heapq
+import itertools
+import statistics
+import sys
+import tempfile
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from compare_divan import get_entry_value, iter_json_results, validate_benchmark_entry
+from parse_divan import (
+    BINARY_SEPARATOR,
+    RESULT_COLUMNS,
+    BenchmarkResult,
+    ResultTable,
+    RunMetadata,
+    Throughput,
+    is_binary_result_file,
+    write_json_document,
+)
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator, Sequence
+
+    from parse_divan import BenchmarkRow
+
+# How a benchmark found in several shards is merged
+DUPLICATE_POLICIES = ("error", "fastest", "average")
+
+
+class ShardError(ValueError):
+    """Raised when shards cannot be merged into one consistent result file."""
+
+
+def iter_shard_rows(
+    path: str | Path,
+    metadata: RunMetadata | None = None,
+    throughput: dict[str, list[Throughput]] | None = None,
+) -> Iterator[BenchmarkRow]:
+    """Read the rows of a shard in order, checking that it is sorted by name.
+
+    JSON shards are decoded one entry at a time; binary shards (written by
+    ``parse_divan.py --format binary``) are loaded as a ResultTable. The
+    run metadata of the shard is added to metadata, and the throughput
+    of each row with counters is added to throughput before the row is
+    yielded.
+
+    Raises:
+        json.JSONDecodeError: If a JSON shard is not valid JSON.
+        ShardError: If the shard is not sorted by name, names a benchmark
+            twice, or has no results.
+        ValueError: If an entry is invalid.
+
+    """
+    path = Path(path)
+    if is_binary_result_file(path):
+        table = ResultTable.read_binary(path)
+        rows = map(table.row, range(len(table)))
+        if metadata is not None:
+            metadata.update(table.metadata)
+        if throughput is not None:
+            throughput.update(table.throughput)
+    else:
+        rows = _iter_json_rows(path, metadata, throughput)
+
+    previous = None
+    for row in rows:
+        if previous is not None and row[0] <= previous:
+            if row[0] == previous:
+                raise ShardError(f"Duplicate benchmark '{row[0]}' in shard '{path}'")
+            raise ShardError(
+                f"Shard '{path}' is not sorted by name ('{row[0]}' after '{previous}'); "
+                "write shards with parse_divan.py --sort"
+            )
+        previous = row[0]
+        yield row
+    if previous is None:
+        raise ShardError(f"Shard '{path}' has no results")
+
+
+def _iter_json_rows(
+    path: Path, metadata: RunMetadata | None, throughput: dict[str, list[Throughput]] | None
+) -> Iterator[BenchmarkRow]:
+    """Stream the entries of a JSON result file as rows, and their throughput."""
+    with path.open(encoding="utf-8") as stream:
+        for index, entry in enumerate(iter_json_results(stream, metadata)):
+            for column in (*RESULT_COLUMNS, "throughput"):
+                validate_benchmark_entry(entry, path, index, column)
+            if throughput is not None and entry.get("throughput"):
+                try:
+                    throughput[entry["name"]] = [Throughput.from_dict(item) for item in entry["throughput"]]
+                except (KeyError, TypeError) as e:
+                    raise ValueError(
+                        f"Benchmark '{entry['name']}' (entry {index}) in '{path}' has an invalid 'throughput'"
+                    ) from e
+            yield (entry["name"], *(get_entry_value(entry, column) for column in RESULT_COLUMNS))
+
+
+def _tagged_rows(
+    path: str | Path, metadata: RunMetadata | None, namespaced: dict[str, bool]
+) -> Iterator[tuple[str, BenchmarkRow, list[Throughput]]]:
+    """Read the rows of a shard, each paired with the shard's path and its throughput.
+
+    Once the shard is exhausted, namespaced maps its path to whether its
+    names are prefixed with their bench binary. This is recorded in the
+    metadata of shards parsed by current versions of parse_divan.py. For
+    other shards it is inferred from every name holding BINARY_SEPARATOR:
+    a single name can hold it without namespacing, e.g.
+    "g/Vec<alloc::string::String>".
+    """
+    shard_metadata = RunMetadata()
+    shard_throughput: dict[str, list[Throughput]] = {}
+    all_separated = True
+    for row in iter_shard_rows(path, shard_metadata, shard_throughput):
+        all_separated = all_separated and BINARY_SEPARATOR in row[0]
+        yield str(path), row, shard_throughput.pop(row[0], [])
+    recorded = shard_metadata.namespace_binaries
+    namespaced[str(path)] = all_separated if recorded is None else recorded
+    if metadata is not None:
+        metadata.update(shard_metadata)
+
+
+def average_rows(rows: Sequence[BenchmarkRow]) -> BenchmarkRow:
+    """Combine measurements of the same benchmark from several shards.
+
+    Median and mean are averaged, while fastest and slowest keep the
+    extremes and samples are added up, so the spread used by the
+    statistical mode of compare_divan covers every sample. Iterations per
+    sample are kept only if all shards agree. Missing values are ignored.
+    """
+
+    def present(index: int) -> list[int]:
+        return [row[index] for row in rows if row[index] is not None]
+
+    fastest, slowest, median, mean, samples, iters = (present(index) for index in range(1, len(RESULT_COLUMNS) + 1))
+    return (
+        rows[0][0],
+        min(fastest, default=None),
+        max(slowest, default=None),
+        round(statistics.fmean(median)) if median else None,
+        round(statistics.fmean(mean)) if mean else None,
+        sum(samples) if samples else None,
+        iters[0] if iters and len(set(iters)) == 1 and len(iters) == len(rows) else None,
+    )
+
+
+def average_throughput(throughputs: Sequence[list[Throughput]]) -> list[Throughput]:
+    """Combine the throughput of the same benchmark from several shards, as average_rows combines times.
+
+    Fastest and slowest keep the extremes. Median and mean take the harmonic
+    mean, the throughput of the averaged time. Counters are kept only if
+    every shard has the same ones. Missing values are ignored.
+    """
+    units = [[counter.unit for counter in counters] for counters in throughputs]
+    if not units[0] or any(other != units[0] for other in units[1:]):
+        return []
+
+    def combined(counters: Sequence[Throughput]) -> Throughput:
+        def present(column: str) -> list[int]:
+            return [value for counter in counters if (value := getattr(counter, column)) is not None]
+
+        fastest, slowest, median, mean = map(present, ("fastest", "slowest", "median", "mean"))
+        return Throughput(
+            counters[0].unit,
+            max(fastest, default=None),
+            min(slowest, default=None),
+            round(statistics.harmonic_mean(median)) if median else None,
+            round(statistics.harmonic_mean(mean)) if mean else None,
+        )
+
+    return [combined(counters) for counters in zip(*throughputs, strict=True)]
+
+
+def merge_shards(
+    paths: Sequence[str | Path],
+    duplicates: str = "error",
+    metric: str = "mean",
+    metadata: RunMetadata | None = None,
+    throughput: dict[str, list[Throughput]] | None = None,
+) -> Iterator[BenchmarkRow]:
+    """Merge name-sorted shards into a single name-sorted stream of rows.
+
+    Args:
+        paths: Shard result files, each sorted by name.
+        duplicates: Policy for a benchmark found in several shards: "error"
+            rejects it, "fastest" keeps the measurement with the lowest
+            metric value, and "average" combines them with average_rows
+            and average_throughput.
+        metric: Metric that "fastest" compares.
+        metadata: Run metadata updated with that of every shard, complete
+            once the merged rows are exhausted.
+        throughput: Dictionary the merged throughput of each row with
+            counters is added to before the row is yielded.
+
+    Yields:
+        Merged rows, sorted by name
+
+    Raises:
+        ShardError: If a benchmark is duplicated under the "error" policy,
+            a shard is invalid (see iter_shard_rows), or some shards name
+            benchmarks with their bench binary and others do not.
+
+    """
+    if duplicates not in DUPLICATE_POLICIES:
+        raise ValueError(f"Unknown duplicate policy '{duplicates}'")
+    metric_index = RESULT_COLUMNS.index(metric) + 1
+
+    namespaced: dict[str, bool] = {}
+    shards = [_tagged_rows(path, metadata, namespaced) for path in paths]
+    merged = heapq.merge(*shards, key=lambda tagged: tagged[1][0])
+    for name, group in itertools.groupby(merged, key=lambda tagged: tagged[1][0]):
+        tagged_rows = list(group)
+        if len(tagged_rows) == 1:
+            _, row, counters = tagged_rows[0]
+        elif duplicates == "error":
+            shard_list = ", ".join(f"'{path}'" for path, _, _ in tagged_rows)
+            raise ShardError(f"Benchmark '{name}' is in several shards: {shard_list}")
+        elif duplicates == "fastest":
+            _, row, counters = min(
+                tagged_rows, key=lambda tagged: (tagged[1][metric_index] is None, tagged[1][metric_index] or 0)
+            )
+        else:
+            row = average_rows([row for _, row, _ in tagged_rows])
+            counters = average_throughput([counters for _, _, counters in tagged_rows])
+        if throughput is not None and counters:
+            throughput[name] = counters
+        yield row
+
+    # Only known once every shard is read, as the metadata follows the results
+    if len(set(namespaced.values())) > 1:
+        with_binaries = next(path for path, value in namespaced.items() if value)
+        without_binaries = next(path for path, value in namespaced.items() if not value)
+        raise ShardError(f"Shards '{with_binaries}' and '{without_binaries}' disagree on --namespace-binaries")
+
+
+def warn_mixed_hosts(metadata: RunMetadata) -> None:
+    """Warn that the shards were measured on different hosts.
+
+    The merged metadata records every host, so compare_divan.py reports
+    the mismatch, or refuses the results with --strict-env.
+    """
+    if metadata.other_hosts:
+        print(
+            f"Warning: shards were measured on {len(metadata.hosts)} different hosts; "
+            "comparisons against the merged results will report a host mismatch",
+            file=sys.stderr,
+        )
+
+
+def write_merged(paths: Sequence[str | Path], output: str | None, duplicates: str, metric: str) -> int:
+    """Merge shards into a JSON result file, or stdout if output is None.
+
+    The output file is only replaced once the whole merge has succeeded;
+    on stdout, an error leaves the rows merged before it. The metadata of
+    the shards is merged too, keeping the coarsest timer precision and
+    every host (see warn_mixed_hosts).
+
+    Returns:
+        The number of merged benchmarks.
+
+    """
+    count = 0
+    metadata = RunMetadata()
+    throughput: dict[str, list[Throughput]] = {}
+
+    def counted_results() -> Iterator[BenchmarkResult]:
+        nonlocal count
+        for row in merge_shards(paths, duplicates, metric, metadata, throughput):
+            count += 1
+            yield BenchmarkResult.from_row(row, throughput.pop(row[0], None))
+
+    if output is None:
+        write_json_document(counted_results(), sys.stdout, metadata)
+        warn_mixed_hosts(metadata)
+        return count
+
+    output_path = Path(output)
+    with tempfile.NamedTemporaryFile(
+        "w", encoding="utf-8", dir=output_path.parent, suffix=".tmp", delete=False
+    ) as stream:
+        try:
+            write_json_document(counted_results(), stream, metadata)
+        except BaseException:
+            stream.close()
+            Path(stream.name).unlink()
+            raise
+    Path(stream.name).replace(output_path)
+    warn_mixed_hosts(metadata)
+    return count
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Merge name-sorted benchmark result files from a sharded bench suite into one.",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument("shards", nargs="+", help="Shard result files (JSON or binary), each sorted by name")
+    parser.add_argument(
+        "--duplicates",
+        choices=DUPLICATE_POLICIES,
+        default="error",
+        help="How a benchmark found in several shards is merged: reject it, keep the fastest "
+        "measurement, or average them",
+    )
+    parser.add_argument(
+        "--metric",
+        default="mean",
+        choices=["fastest", "slowest", "median", "mean"],
+        help="Metric deciding which measurement is the fastest",
+    )
+    parser.add_argument("-o", "--output", help="Output file (JSON)")
+
+    args = parser.parse_args()
+
+    try:
+        count = write_merged(args.shards, args.output, args.duplicates, args.metric)
+    except FileNotFoundError as e:
+        print(f"Error: File '{e.filename}' not found", file=sys.stderr)
+        sys.exit(1)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+    print(f"Merged {count} benchmark(s) from {len(args.shards)} shard(s)", file=sys.stderr)
@@ -9,22 +9,49 @@ processing, such as benchmark comparisons in CI pipelines.
 from __future__ import annotations
 
 import argparse
+import functools
 import json
+import mmap
 import re
+import struct
 import sys
-from dataclasses import dataclass
+import textwrap
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass, field, replace
 from pathlib import Path
-from typing import Any
+from typing import TYPE_CHECKING, Any, BinaryIO, TextIO
+
+import stats_divan
+from env_divan import HostFingerprint, capture_fingerprint, compare_fingerprints
+
+if TYPE_CHECKING:
+    from collections.abc import Generator, Iterable, Iterator
+
+    # A parsed benchmark row: name followed by the RESULT_COLUMNS values
+    BenchmarkRow = tuple[str, int | None, int | None, int | None, int, int | None, int | None]
 
 # Matches time values like "1.816 ms", "710.1 µs", "500 ns"
 TIME_PATTERN = re.compile(r"([\d.]+)\s*(ns|µs|us|ms|s)")
 
-# Matches lines starting with tree-drawing characters (├, │, └, ╰, ─)
+# Matches lines starting with tree-drawing characters (├, │, └, ╰, ─). The
+# row parser classifies lines by TREE_CHARS instead; kept for importers
 TREE_LINE_PATTERN = re.compile(r"^\s*[├│└╰─]")
 
-# Matches benchmark data lines, including nested ones like "│  ├─ 16   <data...>"
+# Matches benchmark data lines, including nested ones like "│  ├─ 16   <data...>".
+# The row parser tokenizes entries without it; kept for importers
 BENCH_LINE_PATTERN = re.compile(r"^\s*(?:│\s*)*[├└╰]─\s*(\S+)\s+(.*)")
 
+# Matches cargo's bench binary banner, like "Running benches/parse.rs (target/release/deps/parse-<hash>)"
+RUNNING_LINE_PATTERN = re.compile(r"^\s*Running\s+(?:.*\()?(?P<path>[^\s()]+)\)?\s*$")
+
+# Matches the hash cargo appends to bench binary file names
+BINARY_HASH_SUFFIX_PATTERN = re.compile(r"-[0-9a-f]{16}$")
+
+# Separates the bench binary from the rest of a namespaced benchmark name
+BINARY_SEPARATOR = "::"
+
 # Splits on column separators (│) with optional surrounding whitespace
 COLUMN_SPLIT_PATTERN = re.compile(r"\s*│\s*")
 
@@ -32,6 +59,80 @@ COLUMN_SPLIT_PATTERN = re.compile(r"\s*│\s*")
 # fastest, slowest, median, mean, samples, iters
 EXPECTED_COLUMN_COUNT = 6
 
+# Nanoseconds per time unit, built once rather than on every conversion
+TIME_UNIT_MULTIPLIERS: dict[str, int] = {
+    "ns": 1,
+    "µs": 1_000,
+    "us": 1_000,
+    "ms": 1_000_000,
+    "s": 1_000_000_000,
+}
+
+# Base units of Divan's counters (BytesCount, ItemsCount, CharsCount,
+# CyclesCount); throughput is stored per second of these units
+THROUGHPUT_BASE_UNITS = ("B/s", "item/s", "char/s", "Hz")
+
+# Decimal and binary prefixes of throughput units, with their multipliers
+THROUGHPUT_DECIMAL_PREFIXES = {"": 1, "K": 10**3, "M": 10**6, "G": 10**9, "T": 10**12, "P": 10**15}
+THROUGHPUT_BINARY_PREFIXES = {"Ki": 2**10, "Mi": 2**20, "Gi": 2**30, "Ti": 2**40, "Pi": 2**50}
+
+# Base unit and multiplier of every throughput unit Divan prints (e.g. "MB/s",
+# "KiB/s", "Mitem/s"), built once rather than on every conversion
+THROUGHPUT_UNITS: dict[str, tuple[str, int]] = {
+    prefix + base: (base, multiplier)
+    for base in THROUGHPUT_BASE_UNITS
+    for prefix, multiplier in (
+        THROUGHPUT_DECIMAL_PREFIXES | THROUGHPUT_BINARY_PREFIXES if base == "B/s" else THROUGHPUT_DECIMAL_PREFIXES
+    ).items()
+}
+
+# Number of leading columns of a throughput line: fastest, slowest, median, mean
+THROUGHPUT_COLUMN_COUNT = 4
+
+# Start of the line where each bench binary reports its timer's precision
+TIMER_PRECISION_PREFIX = "Timer precision:"
+
+# Keys of a JSON result document: the results array, then the run metadata
+RESULTS_KEY = "results"
+METADATA_KEY = "metadata"
+
+# Tree-drawing characters that may start a tree line
+TREE_CHARS = "├│└╰─"
+
+# Characters that open a benchmark entry, right before the "─" marker
+BRANCH_CHARS = "├└╰"
+
+# Characters allowed before the branch of a nested entry ("│  ├─ ...")
+TREE_INDENT_CHARS = "│ \t"
+
+# Characters making up the numeric part of a time value
+NUMBER_CHARS = "0123456789."
+
+# Integer columns of a parsed row, in Divan column order
+RESULT_COLUMNS = ("fastest", "slowest", "median", "mean", "samples", "iters")
+
+# Stored in ResultTable columns in place of a missing value
+MISSING = -(2**63)
+
+# Binary result format: leading magic bytes and current layout version
+BINARY_MAGIC = b"DIVANRT\x00"
+BINARY_FORMAT_VERSION = 2
+
+# Binary layout versions that can still be read; version 1 has no run metadata
+BINARY_READABLE_VERSIONS = (1, BINARY_FORMAT_VERSION)
+
+# Binary header: magic, version, column count, row count, names offset, names size
+_BINARY_HEADER = struct.Struct("<8sHHQQQ")
+
+# Binary column index entry: column name (NUL-padded ASCII), data offset
+_BINARY_COLUMN_ENTRY = struct.Struct("<16sQ")
+
+# Binary run metadata section header: size of the JSON that follows
+_BINARY_METADATA_HEADER = struct.Struct("<Q")
+
+# Size in bytes of one int64/uint64 value, the unit of alignment in the binary format
+_WORD_SIZE = 8
+
 
 @dataclass
 class TimeValue:
@@ -45,6 +146,128 @@ class TimeValue:
         return {"value": self.value, "unit": self.unit}
 
 
+@dataclass
+class Throughput:
+    """Throughput of a benchmark for one Divan counter, per second of a base unit.
+
+    Divan prints it on the line below the benchmark's times, one line per
+    counter, with a column for each of fastest, slowest, median and mean.
+    """
+
+    unit: str
+    fastest: int | None
+    slowest: int | None
+    median: int | None
+    mean: int | None
+
+    def to_dict(self) -> dict[str, Any]:
+        """Convert to dictionary for JSON serialization."""
+        return {
+            "unit": self.unit,
+            "fastest": self.fastest,
+            "slowest": self.slowest,
+            "median": self.median,
+            "mean": self.mean,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> Throughput:
+        """Build a throughput from its JSON representation."""
+        return cls(data["unit"], data["fastest"], data["slowest"], data["median"], data["mean"])
+
+
+class InvalidMetadataError(ValueError):
+    """Raised when the run metadata of a result file has the wrong shape."""
+
+
+@dataclass
+class RunMetadata:
+    """Information about a whole bench run, stored alongside its results.
+
+    Every bench binary reports the precision of its timer; a run keeps the
+    coarsest, which bounds how small a measured change can be trusted. The
+    host the run was measured on is only known if it was captured (see
+    env_divan); runs merged from several hosts keep the others in
+    other_hosts. Whether names were prefixed with their bench binary is
+    recorded by the parser, and unknown for results written before it was.
+    """
+
+    timer_precision: int | None = None
+    host: HostFingerprint | None = None
+    namespace_binaries: bool | None = None
+    # Hosts of merged runs that differ from host, each from all the others
+    other_hosts: list[HostFingerprint] = field(default_factory=list)
+
+    @property
+    def hosts(self) -> list[HostFingerprint]:
+        """Every known host the run was measured on."""
+        return [] if self.host is None else [self.host, *self.other_hosts]
+
+    def add_timer_precision(self, precision: int | None) -> None:
+        """Record a timer precision in nanoseconds, keeping the coarsest."""
+        if precision is not None and (self.timer_precision is None or precision > self.timer_precision):
+            self.timer_precision = precision
+
+    def update(self, other: RunMetadata) -> None:
+        """Merge the metadata of another run, e.g. another shard of the same suite.
+
+        The first known host and namespacing are kept; hosts that differ from
+        every known host are added to other_hosts.
+        """
+        self.add_timer_precision(other.timer_precision)
+        for host in other.hosts:
+            if self.host is None:
+                self.host = host
+            elif all(compare_fingerprints(known, host) for known in self.hosts):
+                self.other_hosts.append(host)
+        if self.namespace_binaries is None:
+            self.namespace_binaries = other.namespace_binaries
+
+    def to_dict(self) -> dict[str, Any]:
+        """Convert to dictionary for JSON serialization, leaving out unknown fields."""
+        data: dict[str, Any] = {}
+        if self.timer_precision is not None:
+            data["timer_precision"] = TimeValue(self.timer_precision).to_dict()
+        if self.host is not None:
+            data["host"] = self.host.to_dict()
+        if self.other_hosts:
+            data["other_hosts"] = [host.to_dict() for host in self.other_hosts]
+        if self.namespace_binaries is not None:
+            data["namespace_binaries"] = self.namespace_binaries
+        return data
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> RunMetadata:
+        """Build run metadata from its JSON representation.
+
+        Raises:
+            InvalidMetadataError: If a field has the wrong shape.
+
+        """
+        if not isinstance(data, dict):
+            raise InvalidMetadataError(f"Run metadata must be an object, got {type(data).__name__}")
+        metadata = cls()
+        precision = data.get("timer_precision")
+        if precision is not None:
+            if not isinstance(precision, dict) or not isinstance(precision.get("value"), int):
+                msg = "Run metadata has an invalid 'timer_precision'"
+                raise InvalidMetadataError(msg)
+            metadata.timer_precision = precision["value"]
+        if data.get("host") is not None:
+            metadata.host = HostFingerprint.from_dict(data["host"])
+        other_hosts = data.get("other_hosts", [])
+        if not isinstance(other_hosts, list):
+            msg = "Run metadata has an invalid 'other_hosts'"
+            raise InvalidMetadataError(msg)
+        metadata.other_hosts = [HostFingerprint.from_dict(host) for host in other_hosts]
+        namespace_binaries = data.get("namespace_binaries")
+        if namespace_binaries is not None and not isinstance(namespace_binaries, bool):
+            msg = "Run metadata has an invalid 'namespace_binaries'"
+            raise InvalidMetadataError(msg)
+        metadata.namespace_binaries = namespace_binaries
+        return metadata
+
+
 @dataclass
 class BenchmarkResult:
     """Represents a single benchmark result with all timing metrics."""
@@ -56,10 +279,41 @@ class BenchmarkResult:
     mean: TimeValue
     samples: int | None
     iters: int | None
+    throughput: list[Throughput] = field(default_factory=list)
+
+    @classmethod
+    def from_row(cls, row: BenchmarkRow, throughput: list[Throughput] | None = None) -> BenchmarkResult:
+        """Build a result from a parsed row and the throughput of its counters, if any."""
+        name, fastest, slowest, median, mean, samples, iters = row
+        return cls(
+            name=name,
+            fastest=TimeValue(fastest),
+            slowest=TimeValue(slowest),
+            median=TimeValue(median),
+            mean=TimeValue(mean),
+            samples=samples,
+            iters=iters,
+            throughput=throughput or [],
+        )
+
+    def to_row(self) -> BenchmarkRow:
+        """Convert to a parsed row, as stored in a ResultTable."""
+        return (
+            self.name,
+            self.fastest.value,
+            self.slowest.value,
+            self.median.value,
+            self.mean.value,
+            self.samples,
+            self.iters,
+        )
 
     def to_dict(self) -> dict[str, Any]:
-        """Convert to dictionary for JSON serialization."""
-        return {
+        """Convert to dictionary for JSON serialization.
+
+        The "throughput" list is only present for benchmarks with counters.
+        """
+        data = {
             "name": self.name,
             "fastest": self.fastest.to_dict(),
             "slowest": self.slowest.to_dict(),
@@ -68,6 +322,9 @@ class BenchmarkResult:
             "samples": self.samples,
             "iters": self.iters,
         }
+        if self.throughput:
+            data["throughput"] = [throughput.to_dict() for throughput in self.throughput]
+        return data
 
     def validate(self) -> list[str]:
         """Validate benchmark result for consistency.
@@ -94,6 +351,398 @@ class BenchmarkResult:
         return warnings
 
 
+# JSON layout of one result, identical to json.dumps(result.to_dict(), indent=2)
+# once nested in an array
+_JSON_ELEMENT_TEMPLATE = """\
+  {{
+    "name": {},
+    "fastest": {{
+      "value": {},
+      "unit": "ns"
+    }},
+    "slowest": {{
+      "value": {},
+      "unit": "ns"
+    }},
+    "median": {{
+      "value": {},
+      "unit": "ns"
+    }},
+    "mean": {{
+      "value": {},
+      "unit": "ns"
+    }},
+    "samples": {},
+    "iters": {}
+  }}"""
+
+# The same layout one level deeper, in the results array of a JSON document
+_JSON_DOCUMENT_ELEMENT_TEMPLATE = textwrap.indent(_JSON_ELEMENT_TEMPLATE, "  ")
+
+# Start of a JSON document up to its first result, and up to its metadata if it has none
+_JSON_DOCUMENT_START = f'{{\n  "{RESULTS_KEY}": [\n'
+_JSON_DOCUMENT_NO_RESULTS = f'{{\n  "{RESULTS_KEY}": [],\n'
+
+
+def _format_json_element(
+    name: str, *values: int | None, throughput: list[Throughput] | None = None, nested: bool = False
+) -> str:
+    """Format a row as an indented JSON array element using the template.
+
+    Elements of a top-level array are indented one level, and elements of
+    the results array of a JSON document (nested) two levels.
+    """
+    template = _JSON_DOCUMENT_ELEMENT_TEMPLATE if nested else _JSON_ELEMENT_TEMPLATE
+    element = template.format(json.dumps(name), *("null" if v is None else v for v in values))
+    if not throughput:
+        return element
+    # Rare enough to go through json.dumps, indented to its place in the element
+    indent = "      " if nested else "    "
+    end = f"\n{indent[:-2]}}}"
+    items = json.dumps([item.to_dict() for item in throughput], indent=2).replace("\n", "\n" + indent)
+    return f'{element.removesuffix(end)},\n{indent}"throughput": {items}{end}'
+
+
+def _format_json_metadata(metadata: RunMetadata | None) -> str:
+    """Format run metadata as the last member of a JSON document."""
+    fields = {} if metadata is None else metadata.to_dict()
+    return f'  "{METADATA_KEY}": ' + json.dumps(fields, indent=2).replace("\n", "\n  ")
+
+
+class ResultTable:
+    """Columnar container for many benchmark results.
+
+    Names are interned and kept in a single list, and each of RESULT_COLUMNS
+    is stored in its own ``array('q')`` of int64 values, with MISSING marking
+    absent values. Columns support the buffer protocol, so
+    ``numpy.frombuffer(table.column("mean"), dtype=numpy.int64)`` gives a
+    zero-copy NumPy view.
+
+    Throughput is only printed for benchmarks with counters, so it is kept
+    apart, keyed by benchmark name, and the run's metadata is kept with the
+    table.
+    """
+
+    def __init__(self) -> None:
+        """Create an empty table."""
+        self.names: list[str] = []
+        self._columns: tuple[array[int], ...] = tuple(array("q") for _ in RESULT_COLUMNS)
+        self.throughput: dict[str, list[Throughput]] = {}
+        self.metadata = RunMetadata()
+
+    @classmethod
+    def from_rows(
+        cls,
+        rows: Iterable[BenchmarkRow],
+        throughput: dict[str, list[Throughput]] | None = None,
+        metadata: RunMetadata | None = None,
+    ) -> ResultTable:
+        """Build a table from parsed rows, the throughput of those with counters, and run metadata.
+
+        The throughput dictionary and metadata are kept by reference, so
+        they may still be filled while rows are consumed (see iter_divan_rows).
+        """
+        table = cls()
+        if throughput is not None:
+            table.throughput = throughput
+        if metadata is not None:
+            table.metadata = metadata
+        for row in rows:
+            table.append_row(row)
+        return table
+
+    @classmethod
+    def from_results(cls, results: Iterable[BenchmarkResult]) -> ResultTable:
+        """Build a table from BenchmarkResult objects."""
+        table = cls()
+        for result in results:
+            table.append(result)
+        return table
+
+    def append_row(self, row: BenchmarkRow) -> None:
+        """Append a parsed row."""
+        self.names.append(sys.intern(row[0]))
+        for column, value in zip(self._columns, row[1:], strict=True):
+            column.append(MISSING if value is None else value)
+
+    def append(self, result: BenchmarkResult) -> None:
+        """Append a BenchmarkResult."""
+        self.append_row(result.to_row())
+        if result.throughput:
+            self.throughput[result.name] = result.throughput
+
+    def __len__(self) -> int:
+        """Return the number of benchmarks."""
+        return len(self.names)
+
+    def row(self, index: int) -> BenchmarkRow:
+        """Return the row at index, with MISSING converted back to None."""
+        fastest, slowest, median, mean, samples, iters = (
+            None if column[index] == MISSING else column[index] for column in self._columns
+        )
+        return (self.names[index], fastest, slowest, median, mean, samples, iters)
+
+    def __getitem__(self, index: int) -> BenchmarkResult:
+        """Return a BenchmarkResult view of the row at index."""
+        return BenchmarkResult.from_row(self.row(index), self.throughput.get(self.names[index]))
+
+    def __iter__(self) -> Iterator[BenchmarkResult]:
+        """Iterate over BenchmarkResult views of every row."""
+        for index in range(len(self.names)):
+            yield self[index]
+
+    def sorted_by_name(self) -> ResultTable:
+        """Return a copy of the table with its rows sorted by benchmark name."""
+        order = sorted(range(len(self.names)), key=self.names.__getitem__)
+        table = ResultTable()
+        table.names = [self.names[index] for index in order]
+        table._columns = tuple(array("q", (column[index] for index in order)) for column in self._columns)
+        table.throughput = dict(self.throughput)
+        table.metadata = replace(self.metadata)
+        return table
+
+    def column(self, name: str) -> array[int]:
+        """Return the raw int64 column for one of RESULT_COLUMNS."""
+        return self._columns[RESULT_COLUMNS.index(name)]
+
+    def metric_values(self, metric: str) -> dict[str, int | None]:
+        """Map benchmark names to the values of one metric."""
+        return {
+            name: None if value == MISSING else value
+            for name, value in zip(self.names, self.column(metric), strict=True)
+        }
+
+    @stats_divan.timed("serialize")
+    def write_json(self, stream: TextIO) -> None:
+        """Write the table and its run metadata as a JSON document in a single bulk pass.
+
+        The output is identical to write_json_document over the same results
+        and metadata.
+        """
+        throughput = self.throughput
+        separator = _JSON_DOCUMENT_START
+        for name, *values in zip(self.names, *self._columns, strict=True):
+            element = _format_json_element(
+                name, *(None if v == MISSING else v for v in values), throughput=throughput.get(name), nested=True
+            )
+            stream.write(separator + element)
+            separator = ",\n"
+        stream.write(_JSON_DOCUMENT_NO_RESULTS if separator == _JSON_DOCUMENT_START else "\n  ],\n")
+        stream.write(_format_json_metadata(self.metadata) + "\n}\n")
+
+    @stats_divan.timed("serialize")
+    def write_binary(self, stream: BinaryIO) -> None:
+        """Write the table in the compact binary result format.
+
+        Layout (little-endian), with every section aligned to 8 bytes:
+
+        - header: magic, version, column count, row count, names offset and
+          names size (see _BINARY_HEADER)
+        - column index: one (name, offset) entry per column
+        - column data: row count int64 values per column, MISSING for absent values
+        - name table: row count + 1 uint64 offsets into the name blob, then
+          the UTF-8 names, each followed by a newline
+        - run metadata: a uint64 size, then the metadata as UTF-8 JSON, in
+          the format of a JSON result document's "metadata" object
+
+        Raises:
+            ValueError: If a benchmark name contains a newline.
+
+        """
+        for name in self.names:
+            if "\n" in name:
+                raise ValueError(f"Benchmark name {name!r} contains a newline")
+        encoded_names = [name.encode() for name in self.names]
+
+        count = len(encoded_names)
+        name_offsets = array("Q", [0])
+        for name in encoded_names:
+            name_offsets.append(name_offsets[-1] + len(name) + 1)
+        blob = b"".join(name + b"\n" for name in encoded_names)
+
+        index_size = _BINARY_HEADER.size + _BINARY_COLUMN_ENTRY.size * len(RESULT_COLUMNS)
+        data_offset = -(-index_size // _WORD_SIZE) * _WORD_SIZE
+        column_size = _WORD_SIZE * count
+        names_offset = data_offset + column_size * len(RESULT_COLUMNS)
+
+        stream.write(
+            _BINARY_HEADER.pack(
+                BINARY_MAGIC, BINARY_FORMAT_VERSION, len(RESULT_COLUMNS), count, names_offset, len(blob)
+            )
+        )
+        stream.writelines(
+            _BINARY_COLUMN_ENTRY.pack(column_name.encode(), data_offset + column_size * index)
+            for index, column_name in enumerate(RESULT_COLUMNS)
+        )
+        stream.write(b"\0" * (data_offset - index_size))
+        stream.writelines(_to_little_endian(column).tobytes() for column in self._columns)
+        stream.write(_to_little_endian(name_offsets).tobytes())
+        stream.write(blob)
+        metadata = json.dumps(self.metadata.to_dict()).encode()
+        stream.write(b"\0" * (-len(blob) % _WORD_SIZE))
+        stream.write(_BINARY_METADATA_HEADER.pack(len(metadata)))
+        stream.write(metadata)
+
+    @classmethod
+    def read_binary(cls, path: str | Path) -> ResultTable:
+        """Load a table written by write_binary.
+
+        Raises:
+            ValueError: If the file is not a supported binary result file.
+
+        """
+        table = cls()
+        with _map_binary(path) as (mapped, index):
+            table.names = [sys.intern(name) for name in _read_binary_names(mapped, index)]
+            table._columns = tuple(_read_binary_column(mapped, index, name) for name in RESULT_COLUMNS)
+            table.metadata = _read_binary_metadata(mapped, index, path)
+        return table
+
+
+def _to_little_endian(values: array[int]) -> array[int]:
+    """Return values in little-endian byte order, copying only on big-endian hosts."""
+    if sys.byteorder == "little":
+        return values
+    swapped = array(values.typecode, values)
+    swapped.byteswap()
+    return swapped
+
+
+@dataclass
+class _BinaryIndex:
+    """Decoded header and column index of a binary result file."""
+
+    row_count: int
+    names_offset: int
+    names_size: int
+    column_offsets: dict[str, int]
+    # Start of the run metadata section, None for version 1 files
+    metadata_offset: int | None
+
+
+@contextmanager
+def _map_binary(path: str | Path) -> Iterator[tuple[mmap.mmap, _BinaryIndex]]:
+    """Memory-map a binary result file and decode its header and column index.
+
+    Raises:
+        ValueError: If the file is not a supported binary result file.
+
+    """
+    with Path(path).open("rb") as f:
+        if Path(path).stat().st_size < _BINARY_HEADER.size:
+            raise ValueError(f"'{path}' is not a binary result file")
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            magic, version, column_count, row_count, names_offset, names_size = _BINARY_HEADER.unpack_from(mapped)
+            if magic != BINARY_MAGIC:
+                raise ValueError(f"'{path}' is not a binary result file")
+            if version not in BINARY_READABLE_VERSIONS:
+                raise ValueError(f"'{path}' uses binary format version {version}, expected {BINARY_FORMAT_VERSION}")
+            names_end = names_offset + _WORD_SIZE * (row_count + 1) + names_size
+            index_end = _BINARY_HEADER.size + _BINARY_COLUMN_ENTRY.size * column_count
+            metadata_offset = None if version == 1 else -(-names_end // _WORD_SIZE) * _WORD_SIZE
+            if max(names_end, index_end, (metadata_offset or 0) + _BINARY_METADATA_HEADER.size) > len(mapped):
+                raise ValueError(f"'{path}' is truncated")
+
+            column_offsets: dict[str, int] = {}
+            for position in range(_BINARY_HEADER.size, index_end, _BINARY_COLUMN_ENTRY.size):
+                name, offset = _BINARY_COLUMN_ENTRY.unpack_from(mapped, position)
+                column_offsets[name.rstrip(b"\0").decode()] = offset
+
+            yield mapped, _BinaryIndex(row_count, names_offset, names_size, column_offsets, metadata_offset)
+
+
+def _read_binary_names(mapped: mmap.mmap, index: _BinaryIndex) -> list[str]:
+    """Decode every benchmark name from the name table in one pass."""
+    if not index.row_count:
+        return []
+    blob_offset = index.names_offset + _WORD_SIZE * (index.row_count + 1)
+    blob = mapped[blob_offset : blob_offset + index.names_size]
+    return blob.decode().split("\n")[:-1]
+
+
+def _read_binary_column(mapped: mmap.mmap, index: _BinaryIndex, column_name: str) -> array[int]:
+    """Copy a single column out of the mapped file, leaving the others untouched.
+
+    Raises:
+        ValueError: If the file has no such column.
+
+    """
+    offset = index.column_offsets.get(column_name)
+    if offset is None:
+        raise ValueError(f"Binary result file has no column '{column_name}'")
+    column = array("q")
+    column.frombytes(mapped[offset : offset + _WORD_SIZE * index.row_count])
+    return _to_little_endian(column)
+
+
+def _read_binary_metadata(mapped: mmap.mmap, index: _BinaryIndex, path: str | Path) -> RunMetadata:
+    """Decode the run metadata section, empty for version 1 files.
+
+    Raises:
+        ValueError: If the section is truncated or its metadata is invalid.
+
+    """
+    metadata = RunMetadata()
+    if index.metadata_offset is None:
+        return metadata
+    (size,) = _BINARY_METADATA_HEADER.unpack_from(mapped, index.metadata_offset)
+    start = index.metadata_offset + _BINARY_METADATA_HEADER.size
+    if start + size > len(mapped):
+        raise ValueError(f"'{path}' is truncated")
+    try:
+        data = json.loads(mapped[start : start + size])
+    except ValueError as e:
+        raise ValueError(f"'{path}' has invalid run metadata: {e}") from e
+    return RunMetadata.from_dict(data)
+
+
+def read_binary_metadata(path: str | Path) -> RunMetadata:
+    """Read the run metadata of a binary result file, empty for files without any.
+
+    Raises:
+        ValueError: If the file is not a supported binary result file, or
+            its metadata is invalid.
+
+    """
+    with _map_binary(path) as (mapped, index):
+        return _read_binary_metadata(mapped, index, path)
+
+
+def read_binary_metric(path: str | Path, metric: str, duplicates: list[str] | None = None) -> dict[str, int | None]:
+    """Map benchmark names to one metric, reading only that column of a binary result file.
+
+    A name stored more than once maps to its last value.
+
+    Args:
+        path: Path to a file written by ResultTable.write_binary
+        metric: The column to read (one of RESULT_COLUMNS)
+        duplicates: List extended with each repeated name, if given
+
+    Returns:
+        Dictionary mapping benchmark names to values, None for missing values
+
+    Raises:
+        ValueError: If the file is not a supported binary result file, or
+            has no such column.
+
+    """
+    with _map_binary(path) as (mapped, index):
+        names = _read_binary_names(mapped, index)
+        values = _read_binary_column(mapped, index, metric)
+    result: dict[str, int | None] = {}
+    for name, value in zip(names, values, strict=True):
+        if duplicates is not None and name in result:
+            duplicates.append(name)
+        result[name] = None if value == MISSING else value
+    return result
+
+
+def is_binary_result_file(path: str | Path) -> bool:
+    """Check whether a file starts with the binary result format magic bytes."""
+    with Path(path).open("rb") as f:
+        return f.read(len(BINARY_MAGIC)) == BINARY_MAGIC
+
+
 def parse_time_to_ns(time_str: str) -> int | None:
     """Convert a time string to nanoseconds.
 
@@ -110,22 +759,17 @@ def parse_time_to_ns(time_str: str) -> int | None:
     if not time_str:
         return None
 
+    # Fast path for Divan's own "<number> <unit>" formatting
+    number, _, unit = time_str.partition(" ")
+    multiplier = TIME_UNIT_MULTIPLIERS.get(unit)
+    if multiplier is not None and number and not number.strip(NUMBER_CHARS):
+        return int(float(number) * multiplier)
+
     match = TIME_PATTERN.match(time_str)
     if not match:
         return None
 
-    value = float(match.group(1))
-    unit = match.group(2)
-
-    multipliers: dict[str, int] = {
-        "ns": 1,
-        "µs": 1_000,
-        "us": 1_000,
-        "ms": 1_000_000,
-        "s": 1_000_000_000,
-    }
-
-    return int(value * multipliers.get(unit, 1))
+    return int(float(match.group(1)) * TIME_UNIT_MULTIPLIERS[match.group(2)])
 
 
 def parse_int(value_str: str) -> int | None:
@@ -138,72 +782,117 @@ def parse_int(value_str: str) -> int | None:
         Parsed integer, or None if parsing fails
 
     """
-    value_str = value_str.strip()
-    if not value_str:
-        return None
+    # int() already ignores surrounding whitespace and rejects empty strings
     try:
         return int(value_str)
     except ValueError:
         return None
 
 
-def parse_line(line: str, current_group: str, current_subgroup: str) -> BenchmarkResult | str | None:
-    """Parse a single benchmark data line.
-
-    Args:
-        line: The line to parse (should match BENCH_LINE_PATTERN)
-        current_group: The current benchmark group name
-        current_subgroup: The current benchmark subgroup name (for nested benchmarks)
+def _tokenize_entry(line: str) -> tuple[int, str, list[str]] | None:
+    """Split a benchmark tree line into its indentation, name and raw columns in a single scan.
 
     Returns:
-        BenchmarkResult if line contains valid benchmark data,
-        str (new subgroup name) if line is a subgroup header,
-        None if line doesn't match.
+        Tuple of (column of the branch character, which grows with the
+        nesting depth, benchmark name, unstripped column values), or None if
+        the line is not a benchmark entry with enough columns.
 
     """
-    match = BENCH_LINE_PATTERN.match(line)
-    if not match:
+    marker = line.find("─")
+    if marker < 1 or line[marker - 1] not in BRANCH_CHARS or line[: marker - 1].strip(TREE_INDENT_CHARS):
         return None
 
-    bench_name = match.group(1)
-    rest = match.group(2)
+    try:
+        name, rest = line[marker + 1 :].split(None, 1)
+    except ValueError:
+        return None
 
-    # Split by │ to get timing columns
-    columns = COLUMN_SPLIT_PATTERN.split(rest)
+    columns = rest.split("│")
     if len(columns) < EXPECTED_COLUMN_COUNT:
         return None
 
+    return marker - 1, name, columns
+
+
+def tokenize_line(line: str) -> tuple[str, list[str]] | None:
+    """Split a benchmark tree line into its name and raw columns in a single scan.
+
+    Args:
+        line: A line starting with tree-drawing characters
+
+    Returns:
+        Tuple of (benchmark name, unstripped column values), or None if the
+        line is not a benchmark entry with enough columns.
+
+    """
+    entry = _tokenize_entry(line)
+    return None if entry is None else entry[1:]
+
+
+def _group_prefix(name_prefix: str, group: str, subgroups: Iterable[str]) -> str:
+    """Build the part of a benchmark name before its own, e.g. "group/subgroup/"."""
+    return name_prefix + "".join(f"{part}/" for part in (group, *subgroups) if part)
+
+
+def _columns_to_row(full_name: str, columns: list[str]) -> BenchmarkRow | None:
+    """Convert the raw columns of a benchmark entry into a row.
+
+    Returns:
+        The row, or None if the entry has no timing data, i.e. it is a
+        subgroup header.
+
+    """
     # Columns are: fastest, slowest, median, mean, samples, iters
-    fastest_ns = parse_time_to_ns(columns[0])
-    slowest_ns = parse_time_to_ns(columns[1])
-    median_ns = parse_time_to_ns(columns[2])
     mean_ns = parse_time_to_ns(columns[3])
-    samples = parse_int(columns[4])
-    iters = parse_int(columns[5])
-
-    # If no timing data, this is a subgroup header
     if mean_ns is None:
-        return bench_name
+        return None
 
-    # Build full benchmark name with optional subgroup
-    if current_subgroup:
-        full_name = f"{current_group}/{current_subgroup}/{bench_name}"
-    elif current_group:
-        full_name = f"{current_group}/{bench_name}"
-    else:
-        full_name = bench_name
-
-    return BenchmarkResult(
-        name=full_name,
-        fastest=TimeValue(fastest_ns),
-        slowest=TimeValue(slowest_ns),
-        median=TimeValue(median_ns),
-        mean=TimeValue(mean_ns),
-        samples=samples,
-        iters=iters,
+    return (
+        full_name,
+        parse_time_to_ns(columns[0]),
+        parse_time_to_ns(columns[1]),
+        parse_time_to_ns(columns[2]),
+        mean_ns,
+        parse_int(columns[4]),
+        parse_int(columns[5]),
     )
 
 
+def _parse_row(line: str, current_group: str, current_subgroup: str) -> BenchmarkRow | str | None:
+    """Parse a single benchmark data line into a row.
+
+    Same as parse_line, but returns a plain tuple instead of a BenchmarkResult.
+    """
+    tokens = tokenize_line(line)
+    if tokens is None:
+        return None
+
+    bench_name, columns = tokens
+    row = _columns_to_row(_group_prefix("", current_group, (current_subgroup,)) + bench_name, columns)
+    return bench_name if row is None else row
+
+
+def parse_line(line: str, current_group: str, current_subgroup: str) -> BenchmarkResult | str | None:
+    """Parse a single benchmark data line.
+
+    Args:
+        line: The line to parse (should start with tree-drawing characters)
+        current_group: The current benchmark group name
+        current_subgroup: The current benchmark subgroup name (for nested
+            benchmarks); iter_divan_rows tracks subgroups at any depth
+
+    Returns:
+        BenchmarkResult if line contains valid benchmark data,
+        str (new subgroup name) if line is a subgroup header,
+        None if line doesn't match.
+
+    """
+    row = _parse_row(line, current_group, current_subgroup)
+    if isinstance(row, tuple):
+        return BenchmarkResult.from_row(row)
+    return row
+
+
 def _extract_group_from_header(line: str) -> str | None:
     """Extract a group name from a Divan column header line.
 
@@ -242,6 +931,356 @@ def _extract_group_from_plain_line(line: str) -> str | None:
     return stripped.split()[0] if stripped.split() else None
 
 
+def _extract_group(line: str) -> str | None:
+    """Extract a group name from a non-tree line, either a column header or a plain line.
+
+    Returns:
+        The group name, or None if the line does not start a new group.
+
+    """
+    if "fastest" in line and "slowest" in line and "median" in line:
+        return _extract_group_from_header(line) or None
+    return _extract_group_from_plain_line(line)
+
+
+def parse_running_line(line: str) -> str | None:
+    """Extract the bench binary name from a cargo "Running" line.
+
+    Args:
+        line: A line that doesn't start with tree-drawing characters.
+
+    Returns:
+        The binary name without cargo's hash suffix (e.g. "parse" for
+        "Running benches/parse.rs (target/release/deps/parse-1a2b...)"),
+        or None if the line is not a "Running" line.
+
+    """
+    match = RUNNING_LINE_PATTERN.match(line)
+    if not match:
+        return None
+    binary = Path(match.group("path")).name.removesuffix(".exe")
+    return BINARY_HASH_SUFFIX_PATTERN.sub("", binary)
+
+
+def parse_timer_precision(line: str) -> int | None:
+    """Extract the precision from a line like "Timer precision: 41 ns".
+
+    Returns:
+        The precision in nanoseconds, or None if the line is not a timer
+        precision line.
+
+    """
+    stripped = line.strip()
+    if not stripped.startswith(TIMER_PRECISION_PREFIX):
+        return None
+    return parse_time_to_ns(stripped.removeprefix(TIMER_PRECISION_PREFIX))
+
+
+def parse_throughput(value_str: str) -> tuple[str, int] | None:
+    """Convert a throughput string to its base unit and value per second.
+
+    Accepts Divan's formats like '644.6 MB/s', '1.2 GiB/s', '324.7 Mitem/s',
+    '88 char/s' or '3.1 GHz'; values are rounded to whole units per second.
+
+    Args:
+        value_str: Throughput string to parse
+
+    Returns:
+        Tuple of (base unit from THROUGHPUT_BASE_UNITS, value), or None if
+        parsing fails
+
+    """
+    number, _, unit = value_str.strip().partition(" ")
+    known = THROUGHPUT_UNITS.get(unit)
+    if known is None or not number or number.strip(NUMBER_CHARS):
+        return None
+    base_unit, multiplier = known
+    return base_unit, round(float(number) * multiplier)
+
+
+def _parse_throughput_line(line: str) -> Throughput | None:
+    """Parse a counter's throughput line, printed below a benchmark's times.
+
+    Returns:
+        The throughput, or None if the line is not a throughput line.
+
+    """
+    content = line.lstrip(TREE_INDENT_CHARS)
+    if not content or content[0] not in NUMBER_CHARS:
+        return None
+    columns = content.split("│")
+    if len(columns) < THROUGHPUT_COLUMN_COUNT:
+        return None
+    rates = [parse_throughput(column) for column in columns[:THROUGHPUT_COLUMN_COUNT]]
+    units = {rate[0] for rate in rates if rate is not None}
+    if len(units) != 1:
+        return None
+    return Throughput(units.pop(), *(None if rate is None else rate[1] for rate in rates))
+
+
+def _header_line(line: str, stripped: str, metadata: RunMetadata) -> tuple[str | None, str] | None:
+    """Classify a line outside the tree of results, recording timer precision lines in metadata.
+
+    Returns:
+        (binary, "") for a cargo "Running" line, (None, group) for a group
+        header, or None for any other line.
+
+    """
+    if stripped.startswith(TIMER_PRECISION_PREFIX):
+        metadata.add_timer_precision(parse_timer_precision(stripped))
+        return None
+    binary = parse_running_line(line)
+    if binary is not None:
+        return binary, ""
+    group = _extract_group(line)
+    return None if group is None else (None, group)
+
+
+class _NameScope:
+    """The bench binary, group and open subgroups that result names are built from."""
+
+    def __init__(self, *, namespace_binaries: bool) -> None:
+        self.namespace_binaries = namespace_binaries
+        self.name_prefix = ""
+        self.group = ""
+        # Open subgroups, innermost last, as (column of their branch character, name)
+        self.subgroups: list[tuple[int, str]] = []
+        self.prefix = ""
+
+    def enter(self, binary: str | None, group: str) -> None:
+        """Start a group, or the output of a bench binary if one is given."""
+        if binary is not None:
+            self.name_prefix = f"{binary}{BINARY_SEPARATOR}" if self.namespace_binaries else ""
+        self.group = group
+        self.subgroups.clear()
+        self.prefix = _group_prefix(self.name_prefix, group, ())
+
+    def name(self, column: int, bench_name: str) -> str:
+        """Name a tree entry, closing the subgroups opened at its depth or deeper."""
+        subgroups = self.subgroups
+        if subgroups and subgroups[-1][0] >= column:
+            while subgroups and subgroups[-1][0] >= column:
+                subgroups.pop()
+            self.prefix = _group_prefix(self.name_prefix, self.group, (name for _, name in subgroups))
+        return self.prefix + bench_name
+
+    def open_subgroup(self, column: int, bench_name: str) -> None:
+        """Nest the names of the following entries below a tree entry without results."""
+        self.subgroups.append((column, bench_name))
+        self.prefix += f"{bench_name}/"
+
+
+def _divan_row_parser(
+    *,
+    namespace_binaries: bool,
+    throughput: dict[str, list[Throughput]],
+    metadata: RunMetadata,
+    counters: dict[str, int],
+) -> Generator[BenchmarkRow | None, str | None]:
+    """State machine behind DivanLineParser and iter_divan_rows, as a coroutine.
+
+    Each line sent in gets back the row it completes, or None. A row is
+    complete once a line other than a throughput line follows it; the
+    throughput lines in between are added to throughput under its name.
+    Timer precision lines are recorded in metadata, as is namespace_binaries.
+    Sending None ends the output: it gets back the last row, if still
+    pending, and stores the line and result counters in counters. Counters
+    and the pending row live in local variables, which keeps the per-line
+    cost of the hot loop low.
+    """
+    scope = _NameScope(namespace_binaries=namespace_binaries)
+    lines_scanned = tree_lines = header_lines = skipped_lines = results = subgroup_transitions = 0
+    throughput_lines = 0
+    pending: BenchmarkRow | None = None
+    output: BenchmarkRow | None = None
+    metadata.namespace_binaries = namespace_binaries
+
+    while True:
+        raw_line = yield output
+        if raw_line is None:
+            output, pending = pending, None
+            counters.update(
+                lines_scanned=lines_scanned,
+                tree_lines=tree_lines,
+                header_lines=header_lines,
+                skipped_lines=skipped_lines,
+                results=results,
+                subgroup_transitions=subgroup_transitions,
+                throughput_lines=throughput_lines,
+            )
+            continue
+
+        lines_scanned += 1
+        line = raw_line.rstrip("\r\n")
+        stripped = line.lstrip()
+        # Empty for a blank line, which no branch below matches
+        first = stripped[:1]
+        if first and (first == "│" or first in NUMBER_CHARS):
+            rates = _parse_throughput_line(line)
+            if rates is not None:
+                throughput_lines += 1
+                if pending is not None:
+                    throughput.setdefault(pending[0], []).append(rates)
+                output = None
+                continue
+        output, pending = pending, None
+
+        if not first or first not in TREE_CHARS:
+            header = _header_line(line, stripped, metadata)
+            if header is None:
+                skipped_lines += 1
+            else:
+                header_lines += 1
+                scope.enter(*header)
+            continue
+
+        tree_lines += 1
+        entry = _tokenize_entry(line)
+        if entry is None:
+            skipped_lines += 1
+            continue
+        column, bench_name, columns = entry
+        row = _columns_to_row(scope.name(column, bench_name), columns)
+        if row is None:
+            subgroup_transitions += 1
+            scope.open_subgroup(column, bench_name)
+        else:
+            results += 1
+            pending = row
+
+
+class DivanLineParser:
+    """Push-style parser of Divan output, fed one line at a time.
+
+    For callers that receive lines as they are produced (e.g. from a running
+    bench process) rather than from an iterable; iter_divan_rows parses the
+    same way. Only the current binary, group and subgroup, and the last row
+    until it is complete, are kept between lines.
+    """
+
+    def __init__(self, *, namespace_binaries: bool = False) -> None:
+        """Create a parser at the start of the output.
+
+        Args:
+            namespace_binaries: Prefix names with the bench binary they ran in
+                (e.g. "parse::parse/parse_small"), as announced by cargo's
+                "Running" lines, so identically named benchmarks from different
+                binaries stay distinct.
+
+        """
+        self.throughput: dict[str, list[Throughput]] = {}
+        self.metadata = RunMetadata()
+        self._counters: dict[str, int] = {}
+        self._machine = _divan_row_parser(
+            namespace_binaries=namespace_binaries,
+            throughput=self.throughput,
+            metadata=self.metadata,
+            counters=self._counters,
+        )
+        next(self._machine)
+
+    def feed(self, raw_line: str) -> BenchmarkRow | None:
+        """Parse the next line of output.
+
+        A row is only returned once it is complete, i.e. when the line
+        after it (or after its throughput lines) is fed; its throughput, if
+        any, is then in self.throughput under its name.
+
+        Args:
+            raw_line: The line, with or without its trailing newline.
+
+        Returns:
+            The row of the benchmark name followed by the RESULT_COLUMNS
+            values if this line completes one, otherwise None
+
+        """
+        return self._machine.send(raw_line)
+
+    def close(self) -> BenchmarkRow | None:
+        """End the output, returning the last row if it was still pending."""
+        return self._machine.send(None)
+
+    def counters(self) -> dict[str, int]:
+        """Line and result counters of the output, as reported to stats hooks, once closed."""
+        return dict(self._counters)
+
+
+def iter_divan_rows(
+    lines: Iterable[str],
+    *,
+    namespace_binaries: bool = False,
+    throughput: dict[str, list[Throughput]] | None = None,
+    metadata: RunMetadata | None = None,
+) -> Iterator[BenchmarkRow]:
+    """Parse Divan benchmark output incrementally, yielding plain rows.
+
+    This is the allocation-light core of iter_divan_results: each row is a
+    tuple of the benchmark name followed by the RESULT_COLUMNS values.
+
+    Args:
+        lines: Any iterable of lines, such as a list of strings or an open file.
+            Trailing newlines are ignored.
+        namespace_binaries: Prefix names with the bench binary they ran in, see
+            DivanLineParser.
+        throughput: Dictionary receiving the throughput of benchmarks with
+            counters, keyed by name; a row's throughput is in it by the time
+            the row is yielded.
+        metadata: Run metadata updated from the output as it is parsed.
+
+    Yields:
+        Parsed rows, in input order
+
+    Once the lines are exhausted, line and result counters are reported
+    to the stats_divan hooks, if any are attached.
+
+    """
+    counters: dict[str, int] = {}
+    machine = _divan_row_parser(
+        namespace_binaries=namespace_binaries,
+        throughput={} if throughput is None else throughput,
+        metadata=RunMetadata() if metadata is None else metadata,
+        counters=counters,
+    )
+    next(machine)
+    feed = machine.send
+    for raw_line in lines:
+        row = feed(raw_line)
+        if row is not None:
+            yield row
+
+    row = feed(None)
+    if row is not None:
+        yield row
+    if stats_divan.hooks_attached():
+        stats_divan.report_counters("parse", counters)
+
+
+def iter_divan_results(
+    lines: Iterable[str], *, namespace_binaries: bool = False, metadata: RunMetadata | None = None
+) -> Iterator[BenchmarkResult]:
+    """Parse Divan benchmark output incrementally, yielding results as they are found.
+
+    Only the current group and subgroup are kept between lines, so memory use
+    does not grow with the size of the input. A result is yielded once the
+    next line shows that no more of its throughput lines follow.
+
+    Args:
+        lines: Any iterable of lines, such as a list of strings or an open file.
+            Trailing newlines are ignored.
+        namespace_binaries: Prefix names with the bench binary they ran in.
+        metadata: Run metadata updated from the output as it is parsed;
+            complete once the results are exhausted.
+
+    Yields:
+        BenchmarkResult objects, in input order
+
+    """
+    throughput: dict[str, list[Throughput]] = {}
+    rows = iter_divan_rows(lines, namespace_binaries=namespace_binaries, throughput=throughput, metadata=metadata)
+    for row in rows:
+        yield BenchmarkResult.from_row(row, throughput.pop(row[0], None))
+
+
 def parse_divan_output(content: str) -> list[BenchmarkResult]:
     """Parse Divan benchmark output and return list of benchmark results.
 
@@ -254,41 +1293,115 @@ def parse_divan_output(content: str) -> list[BenchmarkResult]:
         List of BenchmarkResult objects
 
     """
-    results: list[BenchmarkResult] = []
-    current_group = ""
-    current_subgroup = ""
+    return list(iter_divan_results(content.splitlines()))
 
-    for line in content.splitlines():
-        if not line.strip():
-            continue
 
-        if "fastest" in line and "slowest" in line and "median" in line:
-            group = _extract_group_from_header(line)
-            if group:
-                current_group = group
-                current_subgroup = ""
-            continue
+@stats_divan.timed("parse")
+def parse_divan_table(lines: Iterable[str], *, namespace_binaries: bool = False) -> ResultTable:
+    """Parse Divan benchmark output into a columnar ResultTable.
 
-        if not TREE_LINE_PATTERN.match(line):
-            group = _extract_group_from_plain_line(line)
-            if group is not None:
-                current_group = group
-                current_subgroup = ""
-            continue
+    No per-benchmark objects are created, which keeps memory low for runs with
+    many (e.g. parameterized) benchmarks.
 
-        is_nested = line.lstrip().startswith("│")
-        if not is_nested:
-            current_subgroup = ""
+    Args:
+        lines: Any iterable of lines, such as a list of strings or an open file
+        namespace_binaries: Prefix names with the bench binary they ran in.
 
-        result = parse_line(line, current_group, current_subgroup)
-        if isinstance(result, str):
-            current_subgroup = result
-        elif isinstance(result, BenchmarkResult):
-            results.append(result)
+    Returns:
+        ResultTable holding every parsed benchmark, in input order
 
-    return results
+    """
+    throughput: dict[str, list[Throughput]] = {}
+    metadata = RunMetadata()
+    return ResultTable.from_rows(
+        iter_divan_rows(lines, namespace_binaries=namespace_binaries, throughput=throughput, metadata=metadata),
+        throughput,
+        metadata,
+    )
+
+
+def split_sections(lines: Iterable[str]) -> Iterator[list[str]]:
+    """Split a cargo bench log into one section per bench binary.
+
+    A new section starts at every cargo "Running" line. Lines before the
+    first one (e.g. compiler output) form their own leading section. Parsing
+    each section separately gives the same results as parsing the whole log,
+    since cargo's "Running" line resets the parser state.
+
+    Args:
+        lines: Any iterable of lines, such as a list of strings or an open file
+
+    Yields:
+        Lists of lines, one per section, in input order
+
+    """
+    section: list[str] = []
+    for line in lines:
+        if section and parse_running_line(line) is not None:
+            yield section
+            section = []
+        section.append(line)
+    if section:
+        yield section
+
+
+def _parse_section_rows(
+    section: list[str], *, namespace_binaries: bool
+) -> tuple[list[BenchmarkRow], dict[str, list[Throughput]], RunMetadata]:
+    """Parse one section into rows, their throughput and its metadata; runs inside worker processes."""
+    throughput: dict[str, list[Throughput]] = {}
+    metadata = RunMetadata()
+    rows = iter_divan_rows(section, namespace_binaries=namespace_binaries, throughput=throughput, metadata=metadata)
+    return list(rows), throughput, metadata
+
+
+def parse_sections(
+    sections: Iterable[list[str]],
+    jobs: int,
+    *,
+    namespace_binaries: bool = False,
+    metadata: RunMetadata | None = None,
+) -> Iterator[BenchmarkResult]:
+    """Parse sections across a pool of worker processes.
+
+    Results are yielded in section order, regardless of which worker
+    finishes first, so the output is deterministic.
+
+    Args:
+        sections: Sections to parse, as produced by split_sections
+        jobs: Number of worker processes
+        namespace_binaries: Prefix names with the bench binary they ran in.
+        metadata: Run metadata updated with that of each section.
+
+    Yields:
+        BenchmarkResult objects, in input order
+
+    """
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        parse_section = functools.partial(_parse_section_rows, namespace_binaries=namespace_binaries)
+        for rows, throughput, section_metadata in executor.map(parse_section, sections):
+            if metadata is not None:
+                metadata.update(section_metadata)
+            for row in rows:
+                yield BenchmarkResult.from_row(row, throughput.get(row[0]))
+
+
+def open_input(path: str) -> TextIO:
+    """Open input from file or stdin for line-by-line reading.
+
+    Args:
+        path: File path, or '-' to read from stdin
+
+    Returns:
+        Text stream to iterate over
+
+    """
+    if path == "-":
+        return sys.stdin
+    return Path(path).open(encoding="utf-8")
 
 
+@stats_divan.timed("read_input")
 def read_input(path: str) -> str:
     """Read input from file or stdin.
 
@@ -318,6 +1431,144 @@ def write_output(content: str, path: str | None) -> None:
         Path(path).write_text(content)
 
 
+def _iter_input_results(
+    paths: list[str], *, tee: bool, namespace_binaries: bool, metadata: RunMetadata
+) -> Iterator[BenchmarkResult]:
+    """Parse each input in turn, streaming results as they are found."""
+    for path in paths:
+        with open_input(path) as stream:
+            lines = tee_lines(stream, sys.stderr) if tee else stream
+            yield from iter_divan_results(lines, namespace_binaries=namespace_binaries, metadata=metadata)
+
+
+def _iter_input_sections(paths: list[str]) -> Iterator[list[str]]:
+    """Split each input in turn into per-bench-binary sections."""
+    for path in paths:
+        with open_input(path) as stream:
+            yield from split_sections(stream)
+
+
+def parse_inputs_table(paths: list[str], jobs: int, *, namespace_binaries: bool = False) -> ResultTable:
+    """Read every input, then parse them all into a single ResultTable.
+
+    Unlike the streaming CLI path, each step runs to completion before the
+    next one starts, so the read_input and parse phases can be measured on
+    their own (see stats_divan).
+
+    Args:
+        paths: Input file paths, or '-' to read from stdin
+        jobs: Number of worker processes parsing per-binary sections
+        namespace_binaries: Prefix names with the bench binary they ran in.
+
+    Returns:
+        ResultTable holding every parsed benchmark, in input order
+
+    """
+    inputs = [read_input(path).splitlines() for path in paths]
+    with stats_divan.phase("parse"):
+        metadata = RunMetadata()
+        if jobs > 1:
+            sections = (section for lines in inputs for section in split_sections(lines))
+            table = ResultTable.from_results(
+                parse_sections(sections, jobs, namespace_binaries=namespace_binaries, metadata=metadata)
+            )
+            table.metadata = metadata
+            return table
+        throughput: dict[str, list[Throughput]] = {}
+        return ResultTable.from_rows(
+            (
+                row
+                for lines in inputs
+                for row in iter_divan_rows(
+                    lines, namespace_binaries=namespace_binaries, throughput=throughput, metadata=metadata
+                )
+            ),
+            throughput,
+            metadata,
+        )
+
+
+def tee_lines(lines: Iterable[str], stream: TextIO) -> Iterator[str]:
+    """Echo each line to a stream, unchanged, before passing it on.
+
+    The stream is flushed after every line so the output stays live when
+    the input comes from a long-running process.
+
+    Args:
+        lines: Lines to pass through
+        stream: Text stream to echo lines to
+
+    Yields:
+        The input lines, unchanged
+
+    """
+    for line in lines:
+        stream.write(line)
+        stream.flush()
+        yield line
+
+
+def write_ndjson(results: Iterable[BenchmarkResult], stream: TextIO) -> None:
+    """Write results as newline-delimited JSON, one object per line.
+
+    The stream is flushed after every result so consumers can start
+    processing before the input is exhausted.
+
+    Args:
+        results: Benchmark results to serialize
+        stream: Text stream to write to
+
+    """
+    for result in results:
+        stream.write(json.dumps(result.to_dict()) + "\n")
+        stream.flush()
+
+
+def write_json_document(
+    results: Iterable[BenchmarkResult], stream: TextIO, metadata: RunMetadata | None = None
+) -> None:
+    """Write results and run metadata as a JSON document, one result at a time.
+
+    The output is identical to ``json.dumps({"results": [...], "metadata":
+    {...}}, indent=2)`` followed by a newline. The metadata is written after
+    the last result, so it may be filled in while results are produced
+    (see iter_divan_results).
+
+    Args:
+        results: Benchmark results to serialize
+        stream: Text stream to write to
+        metadata: Metadata of the run, if known
+
+    """
+    separator = _JSON_DOCUMENT_START
+    for result in results:
+        element = _format_json_element(*result.to_row(), throughput=result.throughput, nested=True)
+        stream.write(separator + element)
+        separator = ",\n"
+    stream.write(_JSON_DOCUMENT_NO_RESULTS if separator == _JSON_DOCUMENT_START else "\n  ],\n")
+    stream.write(_format_json_metadata(metadata) + "\n}\n")
+
+
+def write_json_array(results: Iterable[BenchmarkResult], stream: TextIO) -> None:
+    """Write results as a bare JSON array, one element at a time.
+
+    The output is identical to ``json.dumps([...], indent=2)`` followed by a
+    newline, without holding the whole document in memory. This is the
+    format from before run metadata was stored; write_json_document writes
+    the current one.
+
+    Args:
+        results: Benchmark results to serialize
+        stream: Text stream to write to
+
+    """
+    separator = "[\n"
+    for result in results:
+        stream.write(separator + _format_json_element(*result.to_row(), throughput=result.throughput))
+        separator = ",\n"
+    stream.write("[]\n" if separator == "[\n" else "\n]\n")
+
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(
         description="Parse Divan benchmark output to JSON format.",
@@ -325,36 +1576,120 @@ if __name__ == "__main__":
     )
     parser.add_argument(
         "input",
-        help="Input file path, or '-' to read from stdin",
+        nargs="+",
+        help="Input file paths, or '-' to read from stdin",
     )
     parser.add_argument(
         "-o",
         "--output",
         help="Output file path",
     )
+    parser.add_argument(
+        "--tee",
+        action="store_true",
+        help="Echo input lines to stderr and write one JSON object per benchmark (NDJSON) as soon as it is parsed",
+    )
+    parser.add_argument(
+        "--format",
+        choices=["json", "binary"],
+        default="json",
+        help="Output format; 'binary' is a compact columnar layout that compare_divan can memory-map",
+    )
+    parser.add_argument(
+        "--namespace-binaries",
+        action="store_true",
+        help="Prefix benchmark names with their bench binary (from cargo's 'Running' lines)",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help="Parse bench binary sections across this many worker processes",
+    )
+    parser.add_argument(
+        "--stats",
+        action="store_true",
+        help="Report wall time, peak memory and line counters of each phase to stderr; "
+        "phases then run one after the other instead of streaming",
+    )
+    parser.add_argument(
+        "--sort",
+        action="store_true",
+        help="Sort results by benchmark name, as merge_divan.py expects of shards",
+    )
+    parser.add_argument(
+        "--capture-env",
+        action="store_true",
+        help="Record a fingerprint of this host (CPU, cores, governor, kernel, load, rustc) in the results; "
+        "use it on the machine running the benchmarks, e.g. with 'cargo bench' piped in",
+    )
 
     args = parser.parse_args()
-
-    # Read input
+    if args.jobs < 1:
+        parser.error("--jobs must be at least 1")
+    if args.tee and args.jobs > 1:
+        parser.error("--tee cannot be combined with --jobs")
+    if args.format == "binary" and (args.tee or args.output is None):
+        parser.error("--format binary requires --output and cannot be combined with --tee")
+    if args.stats and args.tee:
+        parser.error("--stats cannot be combined with --tee")
+    if args.sort and args.tee:
+        parser.error("--sort cannot be combined with --tee")
+    if args.capture_env and args.tee:
+        parser.error("--capture-env cannot be combined with --tee")
+
+    # Parse and write results as they are produced, unless phases are measured
+    stats = stats_divan.collect_stats() if args.stats else nullcontext()
+    metadata = RunMetadata()
     try:
-        content = read_input(args.input)
-    except FileNotFoundError:
-        print(f"Error: File '{args.input}' not found", file=sys.stderr)
-        sys.exit(1)
-    except OSError as e:
-        print(f"Error: Failed to read '{args.input}': {e}", file=sys.stderr)
+        with stats as collector:
+            if args.stats:
+                results = parse_inputs_table(args.input, args.jobs, namespace_binaries=args.namespace_binaries)
+            elif args.jobs > 1:
+                results = parse_sections(
+                    _iter_input_sections(args.input),
+                    args.jobs,
+                    namespace_binaries=args.namespace_binaries,
+                    metadata=metadata,
+                )
+            else:
+                results = _iter_input_results(
+                    args.input, tee=args.tee, namespace_binaries=args.namespace_binaries, metadata=metadata
+                )
+            if args.sort:
+                if not isinstance(results, ResultTable):
+                    results = ResultTable.from_results(results)
+                    results.metadata = metadata
+                results = results.sorted_by_name()
+            if args.capture_env:
+                (results.metadata if isinstance(results, ResultTable) else metadata).host = capture_fingerprint()
+            if isinstance(results, ResultTable):
+                write_results = ResultTable.write_json
+            elif args.tee:
+                write_results = write_ndjson
+            else:
+                write_results = functools.partial(write_json_document, metadata=metadata)
+            if args.format == "binary":
+                if not isinstance(results, ResultTable):
+                    results = ResultTable.from_results(results)
+                    results.metadata = metadata
+                with Path(args.output).open("wb") as binary_stream:
+                    results.write_binary(binary_stream)
+                if results.throughput:
+                    print(
+                        "Warning: Throughput is not stored in the binary format; use JSON to keep it", file=sys.stderr
+                    )
+            elif args.output is None:
+                write_results(results, sys.stdout)
+            else:
+                with Path(args.output).open("w", encoding="utf-8") as output_stream:
+                    write_results(results, output_stream)
+        if collector is not None:
+            sys.stderr.write(collector.format_report())
+    except FileNotFoundError as e:
+        print(f"Error: File '{e.filename}' not found", file=sys.stderr)
         sys.exit(1)
-
-    # Parse benchmark output
-    results = parse_divan_output(content)
-
-    # Convert to JSON
-    json_data = [result.to_dict() for result in results]
-    json_output = json.dumps(json_data, indent=2) + "\n"
-
-    # Write output
-    try:
-        write_output(json_output, args.output)
     except OSError as e:
-        print(f"Error: Failed to write output: {e}", file=sys.stderr)
+        print(f"Error: Failed to process input: {e}", file=sys.stderr)
         sys.exit(1)
@@ -0,0 +1,400 @@
+#!/usr/bin/env python3
+"""Serve benchmark comparisons from a long-lived process over a Unix socket.
+
+Every compare_divan.py run starts a fresh interpreter, imports its
+dependencies and loads the base file again. The "serve" command keeps
+baselines resident instead, with every metric indexed by benchmark name,
+and the "compare" command is a thin client returning the same report as
+compare_divan.py. A baseline is reloaded when its file changes.
+
+Requests and responses are single JSON documents: the client writes its
+request, shuts down its side of the connection, and reads the response.
+The client only needs the standard library; the comparison modules are
+imported by the server when it handles its first request.
+"""
+
+from __future__ import annotations
+
+import argparse
+import io
+import json
+import os
+import signal
+import socket
+import socketserver
+import sys
+from contextlib import redirect_stderr, suppress
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from collections.abc import Sequence
+
+    from parse_divan import RunMetadata
+
+# Size of each read from the socket
+RECEIVE_SIZE = 64 * 1024
+
+# Seconds the server waits on each read from or write to a client, so a
+# stalled client cannot hold up the requests queued behind it
+REQUEST_TIMEOUT = 30.0
+
+
+@dataclass
+class _ResidentBaseline:
+    """A loaded baseline and the state of its file when it was loaded."""
+
+    signature: tuple[int, int, int]
+    columns: dict[str, dict[str, int | None]]
+    metadata: RunMetadata
+
+
+def _file_signature(path: Path) -> tuple[int, int, int]:
+    """Identify the current version of a file by inode, size and modification time."""
+    stat = path.stat()
+    return (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+
+
+class BaselineStore:
+    """Baselines kept in memory, keyed by base file path or history spec.
+
+    Every metric of RESULT_COLUMNS is loaded at once, so a baseline serves
+    comparisons of any metric; the throughput metrics, which only JSON files
+    store, are added when first requested. Before a baseline is used, its
+    file (or history database) is checked, and it is reloaded if it changed.
+    """
+
+    def __init__(self) -> None:
+        """Create an empty store."""
+        self.baselines: dict[str, _ResidentBaseline] = {}
+        self.loads = 0
+
+    def get(self, spec: str, metrics: Sequence[str] = ()) -> dict[str, dict[str, int | None]]:
+        """Return the columns of a baseline, loading it if needed.
+
+        The baseline's run metadata is then available from metadata().
+
+        Args:
+            spec: Path to a benchmark file, or a history spec.
+            metrics: Metrics needed besides RESULT_COLUMNS, if any.
+
+        Raises:
+            SystemExit: If the baseline cannot be loaded (the error is
+                printed to stderr, as by compare_divan.load_baseline_columns).
+
+        """
+        # Imported on first use, so the client needs only the standard library
+        from compare_divan import load_baseline_columns  # noqa: PLC0415
+        from history_divan import parse_history_spec  # noqa: PLC0415
+        from parse_divan import RESULT_COLUMNS, RunMetadata  # noqa: PLC0415
+
+        history = parse_history_spec(spec)
+        path = Path(spec) if history is None else history.path
+        try:
+            signature = _file_signature(path)
+        except FileNotFoundError:
+            self.baselines.pop(spec, None)
+            print(f"Error: File '{path}' not found", file=sys.stderr)
+            raise SystemExit(1) from None
+
+        resident = self.baselines.get(spec)
+        if resident is not None and resident.signature != signature:
+            resident = None
+        if resident is None or not resident.columns.keys() >= set(metrics):
+            loaded = list(RESULT_COLUMNS if resident is None else resident.columns)
+            loaded += [metric for metric in metrics if metric not in loaded]
+            metadata = RunMetadata()
+            resident = _ResidentBaseline(signature, load_baseline_columns(spec, loaded, metadata), metadata)
+            self.baselines[spec] = resident
+            self.loads += 1
+        return resident.columns
+
+    def metadata(self, spec: str) -> RunMetadata:
+        """Return the run metadata of a baseline loaded by get."""
+        return self.baselines[spec].metadata
+
+
+def handle_request(store: BaselineStore, request: dict[str, Any]) -> str:
+    """Build the report for a compare request.
+
+    Args:
+        store: Resident baselines.
+        request: The "base" spec and "pr" file, plus the options of
+            compare_divan.py ("metric", "title", "subtitle", "thresholds",
+            "confidence", "noise_floor", "strict_env", "max_bytes", "top" and
+            "summary_depth").
+
+    Returns:
+        The markdown report, identical to what compare_divan.py writes.
+
+    Raises:
+        SystemExit: If an option is invalid, as compare_divan.py checks them,
+            or an input cannot be loaded (the error is printed to stderr).
+        KeyError: If a required field of the request is missing.
+        OSError: If the PR file cannot be read.
+
+    """
+    # Imported on first use, so the client needs only the standard library
+    from compare_divan import (  # noqa: PLC0415
+        DEFAULT_TOP_CHANGES,
+        CompareOptions,
+        ComparisonThresholds,
+        ReportOptions,
+        check_options,
+        compare_columns,
+        comparison_metrics,
+        environment_mismatches,
+        generate_markdown,
+        load_metric_columns,
+        render_markdown,
+        timer_noise_floor,
+    )
+    from parse_divan import RunMetadata  # noqa: PLC0415
+
+    metric = request.get("metric", "mean")
+    confidence = request.get("confidence")
+    try:
+        check_options(
+            metric,
+            confidence=confidence,
+            noise_floor=request.get("noise_floor"),
+            summary_depth=request.get("summary_depth"),
+            max_bytes=request.get("max_bytes"),
+        )
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        raise SystemExit(1) from None
+    thresholds = ComparisonThresholds(**request.get("thresholds", {}))
+    metrics = comparison_metrics(metric, confidence)
+
+    base_columns = store.get(request["base"], metrics)
+    pr_metadata = RunMetadata()
+    pr_columns = load_metric_columns(request["pr"], metrics, pr_metadata)
+    base_metadata = store.metadata(request["base"])
+    try:
+        env_mismatches = environment_mismatches(base_metadata, pr_metadata, strict=request.get("strict_env", False))
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        raise SystemExit(1) from None
+    noise_floor = None
+    if request.get("noise_floor") is not None:
+        noise_floor = timer_noise_floor(request["noise_floor"], [base_metadata, pr_metadata])
+    comparisons = compare_columns(
+        base_columns, pr_columns, metric, CompareOptions(thresholds, confidence, noise_floor=noise_floor)
+    )
+
+    title = request.get("title", "Benchmarks")
+    options = ReportOptions(
+        subtitle=request.get("subtitle"),
+        thresholds=thresholds,
+        confidence=confidence,
+        summary_depth=request.get("summary_depth"),
+        noise_floor=noise_floor,
+        env_mismatches=env_mismatches,
+        max_bytes=request.get("max_bytes"),
+        top=request.get("top", DEFAULT_TOP_CHANGES),
+    )
+    if options.max_bytes is None:
+        return generate_markdown(comparisons, title, options=options)
+    stream = io.StringIO()
+    render_markdown(comparisons, stream, title, options=options)
+    return stream.getvalue()
+
+
+def _receive_all(connection: socket.socket) -> bytes:
+    """Read until the peer shuts down its side of the connection."""
+    chunks = []
+    while chunk := connection.recv(RECEIVE_SIZE):
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+
+class _CompareHandler(socketserver.BaseRequestHandler):
+    """Answers one compare request per connection."""
+
+    server: ComparisonServer
+
+    def setup(self) -> None:
+        self.request.settimeout(REQUEST_TIMEOUT)
+
+    def handle(self) -> None:
+        try:
+            data = _receive_all(self.request)
+        except TimeoutError:
+            # The client never finished its request: drop it and serve the next one
+            return
+        if not data:
+            # A probe checking whether the server is alive, see ComparisonServer
+            return
+        errors = io.StringIO()
+        try:
+            request = json.loads(data)
+            # Requests are handled one at a time, so stderr can be captured
+            with redirect_stderr(errors):
+                response = {"markdown": handle_request(self.server.store, request)}
+        except SystemExit:
+            response = {"error": errors.getvalue().strip() or "Comparison failed"}
+        except (ValueError, KeyError, TypeError) as e:
+            response = {"error": f"Error: Invalid request: {e}"}
+        except OSError as e:
+            response = {"error": f"Error: {e}"}
+        with suppress(BrokenPipeError, TimeoutError):
+            self.request.sendall(json.dumps(response).encode())
+
+
+class ComparisonServer(socketserver.UnixStreamServer):
+    """Unix socket server answering compare requests from resident baselines.
+
+    Requests are handled one after the other: comparisons are CPU-bound, so
+    threads would not make them faster.
+    """
+
+    def __init__(self, socket_path: str | Path) -> None:
+        """Bind to socket_path, replacing a stale socket left by a server that is gone.
+
+        Raises:
+            OSError: If another server is listening on socket_path.
+
+        """
+        self.store = BaselineStore()
+        path = Path(socket_path)
+        if path.exists():
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+                try:
+                    probe.connect(str(path))
+                except ConnectionRefusedError:
+                    path.unlink()
+                else:
+                    raise OSError(f"Another server is listening on '{path}'")
+        super().__init__(str(path), _CompareHandler)
+
+    def server_close(self) -> None:
+        """Close the socket and remove its file."""
+        super().server_close()
+        Path(self.server_address).unlink(missing_ok=True)
+
+
+def request_comparison(socket_path: str | Path, request: dict[str, Any]) -> str:
+    """Send a compare request to a running server and return the report.
+
+    Raises:
+        OSError: If the server cannot be reached.
+        RuntimeError: If the server could not build the report, or its reply
+            is empty or invalid (for example, if it stopped while answering).
+
+    """
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+        connection.connect(str(socket_path))
+        connection.sendall(json.dumps(request).encode())
+        connection.shutdown(socket.SHUT_WR)
+        reply = _receive_all(connection)
+    if not reply:
+        msg = "Error: The server closed the connection without replying"
+        raise RuntimeError(msg)
+    msg = "Error: The server sent an invalid reply"
+    try:
+        response = json.loads(reply)
+    except ValueError:
+        raise RuntimeError(msg) from None
+    # A reply without a report is the server's failure, not a type error of the caller
+    if not isinstance(response, dict) or not isinstance(response.get("error", response.get("markdown")), str):
+        raise RuntimeError(msg)  # noqa: TRY004
+    if "error" in response:
+        raise RuntimeError(response["error"])
+    return response["markdown"]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Serve benchmark comparisons over a Unix socket, with baselines kept in memory.",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument("--socket", required=True, help="Path to the Unix socket")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    subparsers.add_parser("serve", help="Run the server until interrupted")
+
+    compare_parser = subparsers.add_parser(
+        "compare",
+        help="Compare a PR file against a base through the server, like compare_divan.py",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    compare_parser.add_argument("base_file", help="Path to base benchmark file, or a history spec")
+    compare_parser.add_argument("pr_file", help="Path to PR benchmark file (JSON or binary)")
+    compare_parser.add_argument("--title", default="Benchmarks", help="Title for the report header")
+    compare_parser.add_argument("--subtitle", help="Subtitle displayed below the title")
+    compare_parser.add_argument(
+        "--metric",
+        default="mean",
+        choices=["fastest", "slowest", "median", "mean", "throughput"],
+        help="Metric to use for comparison",
+    )
+    compare_parser.add_argument(
+        "--improvement-threshold", type=float, default=1.0, help="Threshold for detecting improvements (in %%)"
+    )
+    compare_parser.add_argument("--warn-threshold", type=float, default=5.0, help="Threshold for warning (in %%)")
+    compare_parser.add_argument(
+        "--error-threshold", type=float, default=10.0, help="Threshold for regression indicator (in %%)"
+    )
+    compare_parser.add_argument("--confidence", type=float, help="Statistical mode confidence level (in %%)")
+    compare_parser.add_argument(
+        "--noise-floor",
+        type=float,
+        metavar="MULTIPLE",
+        help="Do not flag changes within this multiple of the timer precision",
+    )
+    compare_parser.add_argument(
+        "--strict-env", action="store_true", help="Refuse to compare results from hosts with different fingerprints"
+    )
+    compare_parser.add_argument("--max-bytes", type=int, help="Write a compact report of at most this many bytes")
+    compare_parser.add_argument("--top", type=int, default=10, help="Top changes listed first in a compact report")
+    compare_parser.add_argument(
+        "--summary-depth", type=int, help="Add a table summarizing each group down to this depth"
+    )
+    compare_parser.add_argument("-o", "--output", help="Output file")
+
+    args = parser.parse_args()
+
+    if args.command == "serve":
+        # Stop on SIGTERM as on Ctrl-C, so the socket file is removed either way
+        signal.signal(signal.SIGTERM, signal.default_int_handler)
+        try:
+            with ComparisonServer(args.socket) as server:
+                print(f"Serving comparisons on '{args.socket}' (pid {os.getpid()})", file=sys.stderr)
+                with suppress(KeyboardInterrupt):
+                    server.serve_forever()
+        except OSError as e:
+            print(f"Error: Cannot serve on '{args.socket}': {e}", file=sys.stderr)
+            sys.exit(1)
+    else:
+        request = {
+            "base": args.base_file if args.base_file.startswith("history:") else str(Path(args.base_file).resolve()),
+            "pr": str(Path(args.pr_file).resolve()),
+            "metric": args.metric,
+            "title": args.title,
+            "subtitle": args.subtitle,
+            "thresholds": {
+                "improvement": -abs(args.improvement_threshold),
+                "warn": args.warn_threshold,
+                "error": args.error_threshold,
+            },
+            "confidence": args.confidence,
+            "noise_floor": args.noise_floor,
+            "strict_env": args.strict_env,
+            "max_bytes": args.max_bytes,
+            "top": args.top,
+            "summary_depth": args.summary_depth,
+        }
+        try:
+            markdown = request_comparison(args.socket, request)
+        except OSError as e:
+            print(f"Error: Cannot reach server on '{args.socket}': {e}", file=sys.stderr)
+            sys.exit(1)
+        except RuntimeError as e:
+            print(e, file=sys.stderr)
+            sys.exit(1)
+        if args.output:
+            Path(args.output).write_text(markdown)
+        else:
+            print(markdown, end="" if args.max_bytes is not None else "\n")
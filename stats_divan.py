@@ -0,0 +1,225 @@
+"""Phase timing and counters for the divan bench tools.
+
+The main steps of parse_divan and compare_divan run inside named phases
+(see PHASES) and report counters such as the number of lines scanned. Both
+are delivered to hooks attached with add_hook; the ``--stats`` flag of
+either CLI attaches a StatsCollector and prints its report to stderr.
+
+With no hook attached, a phase only costs a check of the hook list.
+"""
+
+from __future__ import annotations
+
+import time
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from functools import wraps
+from typing import TYPE_CHECKING, ParamSpec, TypeVar
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterator
+
+P = ParamSpec("P")
+R = TypeVar("R")
+
+# Phases reported by the tools, in pipeline order
+PHASES = (
+    "read_input",
+    "parse",
+    "serialize",
+    "load_benchmarks",
+    "generate_comparison",
+    "generate_markdown",
+)
+
+BYTES_PER_KIB = 1024
+BYTES_PER_MIB = 1024 * 1024
+
+
+@dataclass
+class PhaseStats:
+    """Wall time and peak memory of a single run of a phase."""
+
+    name: str
+    seconds: float
+    peak_bytes: int | None = None
+
+
+class StatsHook:
+    """Receives phase and counter events; subclasses override what they need."""
+
+    def on_phase(self, stats: PhaseStats) -> None:
+        """Handle a finished phase."""
+
+    def on_counters(self, phase: str, counters: dict[str, int]) -> None:
+        """Handle counters reported at the end of a phase."""
+
+
+_hooks: list[StatsHook] = []
+
+# Peak traced memory seen by each running phase before its last reset, innermost last
+_peak_stack: list[int] = []
+
+
+def add_hook(hook: StatsHook) -> None:
+    """Attach a hook, which receives every event until it is removed."""
+    _hooks.append(hook)
+
+
+def remove_hook(hook: StatsHook) -> None:
+    """Detach a hook attached with add_hook."""
+    _hooks.remove(hook)
+
+
+def hooks_attached() -> bool:
+    """Tell whether any hook is attached, e.g. to skip computing counters."""
+    return bool(_hooks)
+
+
+@contextmanager
+def phase(name: str) -> Iterator[None]:
+    """Time the enclosed block and report it to the attached hooks.
+
+    Peak memory is only measured while tracemalloc is tracing, as it slows
+    down every allocation. Nested phases each report their own peak.
+
+    Args:
+        name: Name of the phase, usually one of PHASES.
+
+    """
+    if not _hooks:
+        yield
+        return
+
+    tracing = tracemalloc.is_tracing()
+    if tracing:
+        # Resetting the peak hides it from enclosing phases, so save theirs first
+        if _peak_stack:
+            _peak_stack[-1] = max(_peak_stack[-1], tracemalloc.get_traced_memory()[1])
+        _peak_stack.append(0)
+        tracemalloc.reset_peak()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - start
+        peak_bytes = None
+        if tracing:
+            peak_bytes = max(_peak_stack.pop(), tracemalloc.get_traced_memory()[1])
+            if _peak_stack:
+                _peak_stack[-1] = max(_peak_stack[-1], peak_bytes)
+        for hook in _hooks:
+            hook.on_phase(PhaseStats(name, seconds, peak_bytes))
+
+
+def timed(name: str) -> Callable[[Callable[P, R]], Callable[P, R]]:
+    """Decorate a function so that each call runs inside a phase.
+
+    Args:
+        name: Name of the phase, usually one of PHASES.
+
+    """
+
+    def decorator(function: Callable[P, R]) -> Callable[P, R]:
+        @wraps(function)
+        def wrapper(*args: P.args, **kwargs: P.kwargs) -> R:
+            if not _hooks:
+                return function(*args, **kwargs)
+            with phase(name):
+                return function(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def report_counters(phase_name: str, counters: dict[str, int]) -> None:
+    """Report counters of a phase to the attached hooks."""
+    for hook in _hooks:
+        hook.on_counters(phase_name, counters)
+
+
+def format_bytes(size: int | None) -> str:
+    """Format a byte count to a human-readable string."""
+    if size is None:
+        return "N/A"
+    if size >= BYTES_PER_MIB:
+        return f"{size / BYTES_PER_MIB:.1f} MiB"
+    if size >= BYTES_PER_KIB:
+        return f"{size / BYTES_PER_KIB:.1f} KiB"
+    return f"{size} B"
+
+
+@dataclass
+class PhaseTotals:
+    """Accumulated stats of every run of a phase."""
+
+    calls: int = 0
+    seconds: float = 0.0
+    peak_bytes: int | None = None
+
+
+@dataclass
+class StatsCollector(StatsHook):
+    """Hook accumulating events into a report.
+
+    Runs of the same phase are added up (e.g. loading both benchmark files),
+    keeping the highest peak, and counters with the same name are summed.
+    """
+
+    phases: dict[str, PhaseTotals] = field(default_factory=dict)
+    counters: dict[str, int] = field(default_factory=dict)
+
+    def on_phase(self, stats: PhaseStats) -> None:
+        """Add a finished phase to its totals."""
+        totals = self.phases.setdefault(stats.name, PhaseTotals())
+        totals.calls += 1
+        totals.seconds += stats.seconds
+        if stats.peak_bytes is not None:
+            totals.peak_bytes = max(totals.peak_bytes or 0, stats.peak_bytes)
+
+    def on_counters(self, phase: str, counters: dict[str, int]) -> None:  # noqa: ARG002
+        """Add counters to their running sums."""
+        for name, value in counters.items():
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def format_report(self) -> str:
+        """Format the collected stats as an aligned plain-text table."""
+        lines = [f"{'phase':<20} {'calls':>5} {'wall time':>12} {'peak memory':>12}"]
+        order = {name: index for index, name in enumerate(PHASES)}
+        for name in sorted(self.phases, key=lambda name: (order.get(name, len(order)), name)):
+            totals = self.phases[name]
+            lines.append(
+                f"{name:<20} {totals.calls:>5} {totals.seconds * 1000:>9.3f} ms {format_bytes(totals.peak_bytes):>12}"
+            )
+        if self.counters:
+            lines.append("")
+            lines.append(f"{'counter':<20} {'value':>12}")
+            lines.extend(f"{name:<20} {value:>12}" for name, value in self.counters.items())
+        return "\n".join(lines) + "\n"
+
+
+@contextmanager
+def collect_stats(*, trace_memory: bool = True) -> Iterator[StatsCollector]:
+    """Attach a StatsCollector for the duration of the block.
+
+    Args:
+        trace_memory: Trace allocations to measure the peak memory of each
+            phase, at a noticeable cost in speed.
+
+    Yields:
+        The collector, which holds every event once the block exits.
+
+    """
+    collector = StatsCollector()
+    started_tracing = trace_memory and not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    add_hook(collector)
+    try:
+        yield collector
+    finally:
+        remove_hook(collector)
+        if started_tracing:
+            tracemalloc.stop()
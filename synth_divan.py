@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""Generate synthetic Divan benchmark logs and results at any scale.
+
+The generated logs look like a real workspace `cargo bench` run: groups
+with nested subgroups, cargo's compile and "Running" lines between bench
+binaries, and rows with missing columns. Results are written in the JSON
+format of parse_divan.py, and parsing a generated log gives exactly the
+generated results, so both can be used together.
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import sys
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from parse_divan import ResultTable, parse_time_to_ns
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Iterator
+
+    from parse_divan import BenchmarkRow
+
+# Benchmarks per group, and per subgroup within a group
+GROUP_SIZE = 40
+SUBGROUP_SIZE = 8
+
+# Subgroups per group; the remaining benchmarks sit directly in the group
+SUBGROUPS_PER_GROUP = 3
+
+# Groups per bench binary, each binary preceded by cargo's compile noise
+GROUPS_PER_BINARY = 25
+
+# One row in this many has no samples/iters columns, or no slowest column
+MISSING_COUNTS_EVERY = 97
+MISSING_SLOWEST_EVERY = 89
+
+# Width of the name column, as Divan pads it
+NAME_WIDTH = 40
+
+# Time units by decreasing size, as Divan prints them
+TIME_UNITS = (("s", 1_000_000_000), ("ms", 1_000_000), ("µs", 1_000), ("ns", 1))
+
+# Significant digits Divan prints for times
+SIGNIFICANT_DIGITS = 4
+
+
+def format_divan_time(ns: int | None) -> str:
+    """Format nanoseconds the way Divan does, with 4 significant digits.
+
+    Values rounded with _round_time are printed so that
+    parse_divan.parse_time_to_ns gives them back unchanged.
+    """
+    if ns is None:
+        return ""
+    for unit, size in TIME_UNITS:
+        if ns >= size or unit == "ns":
+            whole_digits = len(str(ns // size))
+            decimals = max(SIGNIFICANT_DIGITS - whole_digits, 0)
+            return f"{ns / size:.{decimals}f} {unit}"
+    return f"{ns} ns"
+
+
+def _round_time(ns: int) -> int:
+    """Round nanoseconds to what parse_divan reads back from Divan's output."""
+    return parse_time_to_ns(format_divan_time(max(ns, 1)))
+
+
+def synthetic_rows(count: int, *, seed: int = 0, drift: float = 0.0) -> Iterator[BenchmarkRow]:
+    """Generate benchmark rows in Divan's tree order.
+
+    Names look like "group_0001/sub_02/bench_0007" for benchmarks in a
+    subgroup and "group_0001/bench_0031" for the others. Values depend only
+    on the name and seed, so the same seed gives the same rows at any scale.
+
+    Args:
+        count: Number of benchmarks.
+        seed: Seed of the generated values.
+        drift: Maximum relative change applied to each benchmark (e.g. 0.1
+            for up to ±10%), to produce the results of a "PR" run.
+
+    Yields:
+        Rows of the benchmark name followed by the RESULT_COLUMNS values.
+
+    """
+    # Seeded for reproducible data; nothing here needs cryptographic randomness
+    rng = random.Random(seed)  # noqa: S311
+    drift_rng = random.Random(seed + 1)  # noqa: S311
+    for index in range(count):
+        group, position = divmod(index, GROUP_SIZE)
+        subgroup, sub_position = divmod(position, SUBGROUP_SIZE)
+        if subgroup < SUBGROUPS_PER_GROUP:
+            name = f"group_{group:04d}/sub_{subgroup:02d}/bench_{sub_position:04d}"
+        else:
+            name = f"group_{group:04d}/bench_{position:04d}"
+
+        mean = int(10 ** rng.uniform(1, 9))
+        if drift:
+            mean = int(mean * (1 + drift_rng.uniform(-drift, drift)))
+        spread = rng.uniform(0.01, 0.5)
+        fastest = _round_time(int(mean * (1 - spread / 2)))
+        slowest = _round_time(int(mean * (1 + spread)))
+        if index % MISSING_SLOWEST_EVERY == MISSING_SLOWEST_EVERY - 1:
+            slowest = None
+        median = _round_time(int(mean * (1 - spread / 10)))
+        samples = iters = None
+        if index % MISSING_COUNTS_EVERY != MISSING_COUNTS_EVERY - 1:
+            samples = 100
+            iters = rng.choice((1, 10, 100, 1000))
+        yield (name, fastest, slowest, median, _round_time(mean), samples, iters)
+
+
+def _format_columns(*values: str) -> str:
+    """Join column values with Divan's separators."""
+    return " │ ".join(f"{value:<13}" for value in values).rstrip()
+
+
+def _binary_noise(binary: int) -> list[str]:
+    """Cargo output printed before a bench binary starts."""
+    return [
+        f"   Compiling bench_crate_{binary} v0.1.0 (/work/crates/bench_crate_{binary})",
+        "    Finished `bench` profile [optimized] target(s) in 12.34s",
+        f"     Running benches/bench_{binary}.rs (target/release/deps/bench_{binary}-{binary:016x})",
+        "Timer precision: 20 ns",
+    ]
+
+
+def divan_log_lines(rows: Iterable[BenchmarkRow]) -> Iterator[str]:
+    """Render rows as Divan tree-table output, with cargo noise between binaries.
+
+    Rows must come in tree order, as produced by synthetic_rows; subgroups
+    may be nested to any depth. Lines have no trailing newline.
+    """
+    header = _format_columns("fastest", "slowest", "median", "mean", "samples", "iters")
+    empty = _format_columns("", "", "", "", "", "")
+    iterator = iter(rows)
+    row = next(iterator, None)
+    groups = 0
+    current_group = None
+    open_subgroups: list[str] = []
+    while row is not None:
+        following = next(iterator, None)
+        group, *subgroups, bench = row[0].split("/")
+        next_parts = following[0].split("/") if following is not None else []
+        last_in_group = not next_parts or next_parts[0] != group
+
+        if group != current_group:
+            if groups % GROUPS_PER_BINARY == 0:
+                yield from _binary_noise(groups // GROUPS_PER_BINARY)
+            groups += 1
+            current_group = group
+            open_subgroups = []
+            yield f"{group:<{NAME_WIDTH}}{header}"
+
+        # Subgroups this row shares with the previous one stay open, the others start here
+        shared = 0
+        while shared < min(len(open_subgroups), len(subgroups)) and open_subgroups[shared] == subgroups[shared]:
+            shared += 1
+        del open_subgroups[shared:]
+        for depth in range(shared, len(subgroups)):
+            yield f"{'│  ' * depth}├─ {subgroups[depth]:<{NAME_WIDTH - 3 * (depth + 1)}}{empty}"
+            open_subgroups.append(subgroups[depth])
+
+        _, fastest, slowest, median, mean, samples, iters = row
+        columns = _format_columns(
+            *(format_divan_time(value) for value in (fastest, slowest, median, mean)),
+            "" if samples is None else str(samples),
+            "" if iters is None else str(iters),
+        )
+        if subgroups:
+            branch = "├─" if next_parts[:-1] == [group, *subgroups] else "╰─"
+        else:
+            branch = "╰─" if last_in_group else "├─"
+        yield f"{'│  ' * len(subgroups)}{branch} {bench:<{NAME_WIDTH - 3 * (len(subgroups) + 1)}}{columns}"
+        row = following
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Generate synthetic Divan benchmark logs and results.",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument("count", type=int, help="Number of benchmarks")
+    parser.add_argument(
+        "--format",
+        choices=["log", "json"],
+        default="log",
+        help="Write Divan output ('log') or parse_divan.py results ('json')",
+    )
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the generated values")
+    parser.add_argument(
+        "--drift",
+        type=float,
+        default=0.0,
+        help="Maximum relative change of each benchmark (e.g. 0.1 for ±10%%), to generate a PR run",
+    )
+    parser.add_argument("-o", "--output", help="Output file path")
+
+    args = parser.parse_args()
+    if args.count < 0:
+        parser.error("count must not be negative")
+
+    rows = synthetic_rows(args.count, seed=args.seed, drift=args.drift)
+    output_stream = sys.stdout if args.output is None else Path(args.output).open("w", encoding="utf-8")  # noqa: SIM115
+    with output_stream:
+        if args.format == "json":
+            ResultTable.from_rows(rows).write_json(output_stream)
+        else:
+            output_stream.writelines(line + "\n" for line in divan_log_lines(rows))
@@ -0,0 +1,32 @@
+"""Tests for bench_divan module."""
+
+from __future__ import annotations
+
+import unittest
+
+from bench_divan import format_summary, run_benchmarks
+
+
+class TestRunBenchmarks(unittest.TestCase):
+    def test_small_scale(self) -> None:
+        benchmarks = list(run_benchmarks([50], repeat=2))
+
+        self.assertEqual(
+            [benchmark.to_dict()["name"] for benchmark in benchmarks],
+            [
+                "parse/parse_divan_output/50",
+                "compare/load_benchmarks/50",
+                "compare/generate_comparison/50",
+                "compare/generate_markdown/50",
+            ],
+        )
+        for benchmark in benchmarks:
+            result = benchmark.to_dict()
+            self.assertEqual(result["samples"], 2)
+            self.assertLessEqual(result["fastest"]["value"], result["median"]["value"])
+            self.assertGreater(result["peak_bytes"], 0)
+        self.assertIn("parse/parse_divan_output/50", format_summary(benchmarks))
+
+
+if __name__ == "__main__":
+    unittest.main()
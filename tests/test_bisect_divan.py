@@ -0,0 +1,148 @@
+"""Tests for bisect_divan module."""
+
+from __future__ import annotations
+
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+from bisect_divan import (
+    BisectError,
+    CommitMeasurer,
+    Verdict,
+    bisect_indices,
+    generate_bisect_markdown,
+    list_commits,
+    run_bisect,
+)
+from cache_divan import ReportCache
+
+BENCH_SCRIPT = """\
+import sys
+from pathlib import Path
+
+with open(sys.argv[1], "a") as log:
+    log.write("run\\n")
+mean = Path("mean.txt").read_text().strip()
+if mean == "broken":
+    sys.exit(101)
+print("lib       fastest  │ slowest  │ median   │ mean     │ samples │ iters")
+print(f"├─ work   {mean} µs │ {mean} µs │ {mean} µs │ {mean} µs │ 100     │ 100")
+print("╰─ other  5.000 µs │ 5.000 µs │ 5.000 µs │ 5.000 µs │ 100     │ 100")
+"""
+
+GIT_ENV = {
+    "GIT_AUTHOR_NAME": "Test",
+    "GIT_AUTHOR_EMAIL": "test@example.com",
+    "GIT_COMMITTER_NAME": "Test",
+    "GIT_COMMITTER_EMAIL": "test@example.com",
+}
+
+
+class TestBisectIndices(unittest.TestCase):
+    def test_finds_first_bad(self) -> None:
+        for first_bad in range(1, 10):
+            tested: list[int] = []
+
+            def test(index: int, first_bad: int = first_bad, tested: list[int] = tested) -> Verdict:
+                tested.append(index)
+                return Verdict.BAD if index >= first_bad else Verdict.GOOD
+
+            with self.subTest(first_bad=first_bad):
+                self.assertEqual(bisect_indices(10, test), (first_bad - 1, first_bad))
+                self.assertLessEqual(len(tested), 4)
+
+    def test_steps_around_skipped(self) -> None:
+        first_bad = 5
+
+        def test(index: int) -> Verdict:
+            if index in {4, first_bad}:
+                return Verdict.SKIP
+            return Verdict.BAD if index >= first_bad else Verdict.GOOD
+
+        self.assertEqual(bisect_indices(10, test), (3, 6))
+
+
+class TestBisect(unittest.TestCase):
+    def setUp(self) -> None:
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.tmp = Path(tmp.name)
+        self.repo = self.tmp / "repo"
+        self.repo.mkdir()
+        self.runs = self.tmp / "runs.log"
+        self.cache = ReportCache(self.tmp / "cache", suffix=".json")
+        self._git("init", "--quiet", "--initial-branch=main")
+        (self.repo / "bench.py").write_text(BENCH_SCRIPT)
+
+    def _git(self, *args: str) -> str:
+        return subprocess.run(  # noqa: S603
+            ["git", *args],  # noqa: S607
+            cwd=self.repo,
+            env={**os.environ, **GIT_ENV},
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+
+    def _commits(self, means: list[str]) -> None:
+        for index, mean in enumerate(means):
+            (self.repo / "mean.txt").write_text(mean)
+            self._git("add", ".")
+            self._git("commit", "--quiet", "--allow-empty", "-m", f"commit {index}")
+
+    def _bisect(self, good: str = "HEAD~5", bad: str = "HEAD") -> tuple[str, int]:
+        measurer = CommitMeasurer(self.repo, [sys.executable, "bench.py", str(self.runs)], "work", self.cache)
+        try:
+            result = run_bisect(list_commits(self.repo, good, bad), measurer.measure)
+        finally:
+            measurer.restore()
+        runs = len(self.runs.read_text().splitlines()) if self.runs.exists() else 0
+        self.runs.unlink(missing_ok=True)
+        return generate_bisect_markdown(result, "Bisect"), runs
+
+    def test_finds_culprit_and_caches(self) -> None:
+        self._commits(["100.0", "101.0", "100.0", "130.0", "131.0", "129.0"])
+        culprit = self._git("rev-parse", "HEAD~2").strip()
+
+        markdown, runs = self._bisect()
+
+        self.assertIn(f"**First bad commit:** `{culprit[:12]}` commit 3", markdown)
+        self.assertIn("| bad | `lib/work` | 130.000 µs | +30.0% ❌ |", markdown)
+        self.assertNotIn("lib/other", markdown)
+        self.assertEqual(runs, 4)
+        self.assertEqual(self._git("rev-parse", "--abbrev-ref", "HEAD").strip(), "main")
+
+        markdown, runs = self._bisect()
+        self.assertEqual(runs, 0)
+        self.assertIn("4 tested (4 from cache)", markdown)
+
+    def test_skips_broken_commits(self) -> None:
+        self._commits(["100.0", "100.0", "broken", "broken", "130.0", "130.0"])
+
+        markdown, _ = self._bisect()
+
+        self.assertIn("**The first bad commit is one of 3**", markdown)
+        self.assertIn("- `", markdown)
+
+    def test_no_regression(self) -> None:
+        self._commits(["100.0", "100.0", "100.0", "100.0", "100.0", "105.0"])
+
+        with self.assertRaisesRegex(BisectError, "crossed the 10% error threshold"):
+            self._bisect()
+
+    def test_rejects_bad_ranges_and_dirty_tree(self) -> None:
+        self._commits(["100.0", "130.0"])
+
+        with self.assertRaisesRegex(BisectError, "not an ancestor"):
+            list_commits(self.repo, "HEAD", "HEAD~1")
+        (self.repo / "mean.txt").write_text("120.0")
+        with self.assertRaisesRegex(BisectError, "uncommitted changes"):
+            CommitMeasurer(self.repo, ["true"], "work")
+
+
+if __name__ == "__main__":
+    unittest.main()
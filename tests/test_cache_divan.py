@@ -0,0 +1,126 @@
+"""Tests for cache_divan module."""
+
+from __future__ import annotations
+
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+from cache_divan import STALE_TEMPORARY_AGE, ReportCache, cache_key
+from compare_divan import report_cache_key
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+
+class TestCacheKey(unittest.TestCase):
+    def setUp(self) -> None:
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.tmp = Path(tmp.name)
+
+    def test_depends_on_contents_not_names(self) -> None:
+        copy = self.tmp / "copy.json"
+        shutil.copy(FIXTURES / "base_benchmarks.json", copy)
+
+        self.assertEqual(
+            cache_key([FIXTURES / "base_benchmarks.json"], {"metric": "mean"}),
+            cache_key([copy], {"metric": "mean"}),
+        )
+        copy.write_text("[]")
+        self.assertNotEqual(
+            cache_key([FIXTURES / "base_benchmarks.json"], {"metric": "mean"}),
+            cache_key([copy], {"metric": "mean"}),
+        )
+
+    def test_depends_on_order_and_options(self) -> None:
+        base = FIXTURES / "base_benchmarks.json"
+        pr = FIXTURES / "pr_benchmarks.json"
+        key = cache_key([base, pr], {"metric": "mean"})
+
+        self.assertNotEqual(key, cache_key([pr, base], {"metric": "mean"}))
+        self.assertNotEqual(key, cache_key([base, pr], {"metric": "median"}))
+
+    def test_report_key_ignores_output(self) -> None:
+        base = [str(FIXTURES / "base_benchmarks.json")]
+        pr = str(FIXTURES / "pr_benchmarks.json")
+
+        self.assertEqual(
+            report_cache_key(base, pr, {"title": "Benchmarks", "output": "a.md"}),
+            report_cache_key(base, pr, {"title": "Benchmarks", "output": "b.md"}),
+        )
+        self.assertNotEqual(
+            report_cache_key(base, pr, {"title": "Benchmarks"}),
+            report_cache_key(base, pr, {"title": "Other"}),
+        )
+
+    def test_missing_input_is_not_cached(self) -> None:
+        self.assertIsNone(report_cache_key([str(self.tmp / "missing.json")], str(FIXTURES / "pr_benchmarks.json"), {}))
+
+
+class TestReportCache(unittest.TestCase):
+    def setUp(self) -> None:
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.directory = Path(tmp.name) / "cache"
+
+    def test_round_trip(self) -> None:
+        cache = ReportCache(self.directory)
+
+        self.assertIsNone(cache.get("a"))
+        cache.put("a", "## Report ✅")
+        self.assertEqual(cache.get("a"), "## Report ✅")
+        self.assertEqual([path.suffix for path in self.directory.iterdir()], [".md"])
+
+    def test_suffix_separates_caches(self) -> None:
+        reports, measurements = ReportCache(self.directory), ReportCache(self.directory, max_bytes=0, suffix=".json")
+        reports.put("a", "## Report")
+        measurements.put("a", "{}")
+
+        self.assertEqual(reports.get("a"), "## Report")
+        self.assertIsNone(measurements.get("a"))
+
+    def test_evicts_least_recently_used(self) -> None:
+        cache = ReportCache(self.directory, max_bytes=25)
+        for index, key in enumerate(("a", "b")):
+            cache.put(key, "x" * 10)
+            os.utime(self.directory / f"{key}.md", (index, index))
+
+        # Reading "a" makes "b" the least recently used entry
+        cache.get("a")
+        cache.put("c", "x" * 10)
+
+        self.assertEqual(cache.get("a"), "x" * 10)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("c"), "x" * 10)
+
+    def test_failed_write_leaves_no_trace(self) -> None:
+        cache = ReportCache(self.directory)
+        # An entry path taken by a non-empty directory cannot be replaced
+        (self.directory / "a.md" / "taken").mkdir(parents=True)
+
+        cache.put("a", "## Report")
+        self.assertEqual([path.name for path in self.directory.iterdir()], ["a.md"])
+
+        shutil.rmtree(self.directory)
+        cache.put("b", "## Report")
+        self.assertFalse(self.directory.exists())
+
+    def test_evicts_stale_temporary_files(self) -> None:
+        cache = ReportCache(self.directory)
+        stale, fresh = self.directory / "stale.tmp", self.directory / "fresh.tmp"
+        stale.write_text("partial")
+        fresh.write_text("partial")
+        old = time.time() - STALE_TEMPORARY_AGE - 60
+        os.utime(stale, (old, old))
+
+        cache.evict()
+
+        self.assertFalse(stale.exists())
+        self.assertTrue(fresh.exists())
+
+
+if __name__ == "__main__":
+    unittest.main()
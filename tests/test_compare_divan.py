@@ -2,21 +2,62 @@
 
 from __future__ import annotations
 
+import asyncio
+import io
 import json
+import os
+import sys
+import tempfile
+import time
 import unittest
+from contextlib import redirect_stderr
 from pathlib import Path
-from typing import Any
+from typing import Any, ClassVar
+from unittest import mock
 
+import compare_divan
 from compare_divan import (
     BenchmarkComparison,
+    BenchOptions,
+    CompareOptions,
     ComparisonStatus,
     ComparisonThresholds,
+    ReportOptions,
+    aggregate_baseline_columns,
+    apply_base_ranges,
+    apply_confidence,
+    calculate_change,
+    compare_columns,
+    comparison_metrics,
+    confirm_rerun,
+    environment_mismatches,
+    estimate_standard_error,
+    expand_base_specs,
+    format_table_row,
+    format_throughput,
     generate_comparison,
     generate_markdown,
+    iter_json_array,
+    iter_json_results,
+    load_metric_columns,
+    load_metric_values,
+    render_markdown,
+    rerun_filter,
+    run_bench_command,
+    summarize_groups,
+    timer_noise_floor,
+    trimmed_mean,
+    write_rerun_filter,
 )
+from env_divan import HostFingerprint
+from parse_divan import ResultTable, RunMetadata, parse_divan_table
 
 FIXTURES = Path(__file__).parent / "fixtures"
 
+# The NumPy parity tests are skipped without NumPy, except in CI (which sets CI),
+# where they fail instead so the vectorized engine is always covered there
+skip_without_numpy = unittest.skipIf(compare_divan.np is None and not os.environ.get("CI"), "NumPy is not installed")
+
 
 def _load_as_dict(path: Path) -> dict[str, dict[str, Any]]:
     data = json.loads(path.read_text())
@@ -131,6 +172,18 @@ class TestGenerateComparison(unittest.TestCase):
         for c in comparisons:
             self.assertEqual(c.status, ComparisonStatus.NEW)
 
+    def test_result_tables(self) -> None:
+        base_dict = _load_as_dict(FIXTURES / "base_benchmarks.json")
+        pr_dict = _load_as_dict(FIXTURES / "pr_benchmarks.json")
+        base = ResultTable()
+        pr = ResultTable()
+        for table, entries in ((base, base_dict), (pr, pr_dict)):
+            for entry in entries.values():
+                metrics = [entry[m]["value"] for m in ("fastest", "slowest", "median", "mean")]
+                table.append_row((entry["name"], *metrics, entry["samples"], entry["iters"]))
+
+        self.assertEqual(generate_comparison(base, pr), generate_comparison(base_dict, pr_dict))
+
     def test_all_removed_benchmarks(self) -> None:
         base = {"a": {"mean": {"value": 100}}, "b": {"mean": {"value": 200}}}
         comparisons = generate_comparison(base, {})
@@ -140,6 +193,45 @@ class TestGenerateComparison(unittest.TestCase):
             self.assertEqual(c.status, ComparisonStatus.REMOVED)
 
 
+class TestComparisonEngines(unittest.TestCase):
+    def _sample_values(self, seed: int) -> tuple[dict[str, int], dict[str, int]]:
+        # Mix of exact threshold hits, zero bases and large arbitrary values
+        choices = [0, 99, 100, 105, 111, 123_456_789]
+        names = [f"group_{i % 5}/bench_{i}" for i in range(500)]
+        base = {name: choices[(i * seed) % 6] for i, name in enumerate(names[:450])}
+        pr = {name: choices[(i * (seed + 1)) % 6] for i, name in enumerate(names[50:])}
+        return base, pr
+
+    @skip_without_numpy
+    def test_vectorized_matches_pure_python(self) -> None:
+        self.assertIsNotNone(compare_divan.np, "NumPy is required in CI")
+        thresholds = ComparisonThresholds(improvement=-1.0, warn=5.0, error=11.0)
+        for seed in range(1, 6):
+            base, pr = self._sample_values(seed)
+
+            vectorized = generate_comparison(base, pr, thresholds=thresholds)
+            with mock.patch.object(compare_divan, "np", None):
+                sequential = generate_comparison(base, pr, thresholds=thresholds)
+
+            self.assertEqual(vectorized, sequential)
+
+    def test_pure_python_fallback(self) -> None:
+        base = _load_as_dict(FIXTURES / "base_benchmarks.json")
+        pr = _load_as_dict(FIXTURES / "pr_benchmarks.json")
+
+        with mock.patch.object(compare_divan, "np", None):
+            comparisons = generate_comparison(base, pr)
+
+        self.assertEqual(comparisons, generate_comparison(base, pr))
+
+    def test_missing_values_use_pure_python(self) -> None:
+        comparisons = generate_comparison({"a": 100, "b": None}, {"a": 120})
+        by_name = {c.name: c for c in comparisons}
+
+        self.assertEqual(by_name["a"].indicator, "❌")
+        self.assertEqual(by_name["b"].status, ComparisonStatus.REMOVED)
+
+
 class TestGenerateMarkdown(unittest.TestCase):
     def test_full_report(self) -> None:
         base = _load_as_dict(FIXTURES / "base_benchmarks.json")
@@ -171,6 +263,19 @@ class TestGenerateMarkdown(unittest.TestCase):
         self.assertIn("## My Title", markdown)
         self.assertIn("<sub>run #42</sub>", markdown)
 
+    def test_report_options(self) -> None:
+        comparisons = generate_comparison({"a/b": 100}, {"a/b": 105})
+        options = ReportOptions(subtitle="run #42", summary_depth=1)
+
+        self.assertEqual(
+            generate_markdown(comparisons, "Benchmarks", options=options),
+            generate_markdown(comparisons, "Benchmarks", "run #42", summary_depth=1),
+        )
+        # Arguments given explicitly take precedence over the options
+        markdown = generate_markdown(comparisons, "Benchmarks", "run #43", options=options)
+        self.assertIn("<sub>run #43</sub>", markdown)
+        self.assertIn("Group summary", markdown)
+
     def test_regression_summary(self) -> None:
         base = _load_as_dict(FIXTURES / "base_benchmarks.json")
         pr = _load_as_dict(FIXTURES / "pr_benchmarks.json")
@@ -192,5 +297,612 @@ class TestGenerateMarkdown(unittest.TestCase):
         self.assertIn("### Transform", markdown)
 
 
+class TestGroupSummary(unittest.TestCase):
+    BASE: ClassVar[dict[str, int]] = {
+        "sort/vec/10/t=1": 100,
+        "sort/vec/10/t=4": 100,
+        "sort/vec/1000": 100,
+        "sort/slice": 100,
+        "hash/u64": 100,
+    }
+    PR: ClassVar[dict[str, int]] = {
+        "sort/vec/10/t=1": 200,
+        "sort/vec/10/t=4": 50,
+        "sort/vec/1000": 400,
+        "sort/slice": 100,
+        "sort/new": 1,
+    }
+
+    def test_nested_rollups(self) -> None:
+        groups = dict(summarize_groups(generate_comparison(self.BASE, self.PR)))
+
+        self.assertEqual(list(groups), ["hash", "sort", "sort/vec", "sort/vec/10"])
+        # A 2x slowdown and a 2x speedup cancel out
+        self.assertAlmostEqual(groups["sort/vec/10"].geomean_change_pct, 0.0)
+        self.assertAlmostEqual(groups["sort/vec"].geomean_change_pct, 100 * (4 ** (1 / 3) - 1))
+        self.assertEqual((groups["sort"].benchmarks, groups["sort"].compared), (5, 4))
+        self.assertEqual((groups["sort"].regressions, groups["sort"].improvements), (2, 1))
+        self.assertIsNone(groups["hash"].geomean_change_pct)
+
+    def test_report_table(self) -> None:
+        comparisons = generate_comparison(self.BASE, self.PR)
+
+        markdown = generate_markdown(comparisons, "Benchmarks", summary_depth=2)
+        stream = io.StringIO()
+        render_markdown(comparisons, stream, "Benchmarks", max_bytes=10_000, summary_depth=2)
+
+        for report in (markdown, stream.getvalue()):
+            self.assertIn("| `sort/vec` | 3 | +58.7% ❌ | 2 | 1 |", report)
+            self.assertNotIn("`sort/vec/10`", report.split("### Group summary")[1].split("\n\n###")[0])
+        self.assertNotIn("Group summary", generate_markdown(comparisons, "Benchmarks"))
+
+
+class TestRenderMarkdown(unittest.TestCase):
+    def _comparisons(self) -> list[BenchmarkComparison]:
+        base = {f"steady_{g}/bench_{i}": 1000 for g in range(3) for i in range(50)}
+        base |= {f"changed/bench_{i}": 1000 for i in range(20)}
+        pr = dict(base)
+        pr |= {f"changed/bench_{i}": 1000 + 50 * (i - 10) for i in range(20)}
+        return generate_comparison(base, pr)
+
+    def _render(self, max_bytes: int | None = None, top: int = 3) -> tuple[str, bool]:
+        stream = io.StringIO()
+        truncated = render_markdown(self._comparisons(), stream, "Benchmarks", max_bytes=max_bytes, top=top)
+        return stream.getvalue(), truncated
+
+    def test_top_changes_first(self) -> None:
+        markdown, truncated = self._render()
+
+        self.assertFalse(truncated)
+        top_regressions = markdown.split("### Top regressions")[1].split("###")[0]
+        self.assertLess(top_regressions.index("bench_19"), top_regressions.index("bench_18"))
+        self.assertNotIn("bench_16", top_regressions)
+        self.assertLess(markdown.index("### Top improvements"), markdown.index("### Changed"))
+
+    def test_unchanged_groups_collapsed(self) -> None:
+        markdown, _ = self._render()
+
+        self.assertEqual(markdown.count("<details>"), 3)
+        self.assertEqual(markdown.count("</details>"), 3)
+        self.assertIn("<summary>Steady 0: 50 unchanged benchmark(s)</summary>", markdown)
+        self.assertLess(markdown.index("### Changed"), markdown.index("<details>"))
+
+    def test_truncated_to_budget(self) -> None:
+        for max_bytes in (1024, 3000, 6000):
+            with self.subTest(max_bytes=max_bytes):
+                markdown, truncated = self._render(max_bytes)
+
+                self.assertTrue(truncated)
+                self.assertLessEqual(len(markdown.encode()), max_bytes)
+                self.assertEqual(markdown.count("<details>"), markdown.count("</details>"))
+                self.assertRegex(markdown, rf"_Report truncated to {max_bytes} bytes: \d+ of 170 benchmark")
+
+    def test_empty_comparisons(self) -> None:
+        stream = io.StringIO()
+        render_markdown([], stream, "Empty Report", max_bytes=1024)
+        self.assertIn("No benchmark data available.", stream.getvalue())
+
+
+class TestRunBenchCommand(unittest.TestCase):
+    LOG = (
+        "parse        fastest  │ slowest  │ median   │ mean     │ samples │ iters\n"
+        "├─ parse_small  1.551 ms │ 1.738 ms │ 1.590 ms │ 1.600 ms │ 100     │ 100\n"
+        "├─ parse_medium 3.000 ms │ 3.500 ms │ 3.100 ms │ 3.000 ms │ 100     │ 100\n"
+        "╰─ parse_large  309.8 µs │ 453.3 µs │ 319.3 µs │ 321.8 µs │ 100     │ 100\n"
+    )
+    BASE: ClassVar[dict[str, int]] = {
+        "parse/parse_small": 1_000_000,
+        "parse/parse_medium": 1_000_000,
+        "parse/parse_large": 321_800,
+    }
+
+    def _run(self, *, then: str = "", max_regressions: int | None = None) -> compare_divan.BenchRun:
+        script = f"import sys, time\nsys.stdout.write({self.LOG!r})\nsys.stdout.flush()\n{then}"
+        return asyncio.run(
+            run_bench_command([sys.executable, "-c", script], self.BASE, BenchOptions(max_regressions=max_regressions))
+        )
+
+    def test_complete_run(self) -> None:
+        run = self._run(then="sys.exit(3)")
+
+        self.assertFalse(run.aborted)
+        self.assertEqual(run.returncode, 3)
+        self.assertEqual(run.regressions, ["parse/parse_small", "parse/parse_medium"])
+        self.assertEqual(run.pr_columns["mean"]["parse/parse_large"], 321_800)
+        self.assertEqual(run.pr_columns["samples"]["parse/parse_small"], 100)
+
+    def test_aborts_after_max_regressions(self) -> None:
+        start = time.perf_counter()
+        run = self._run(then="time.sleep(60)", max_regressions=2)
+
+        self.assertLess(time.perf_counter() - start, 30)
+        self.assertTrue(run.aborted)
+        self.assertNotEqual(run.returncode, 0)
+        self.assertEqual(run.regressions, ["parse/parse_small", "parse/parse_medium"])
+        self.assertNotIn("parse/parse_large", run.pr_columns["mean"])
+
+    def test_missing_command(self) -> None:
+        with self.assertRaises(OSError):
+            asyncio.run(run_bench_command(["./no-such-bench-command"], self.BASE))
+
+
+class TestConfidenceMode(unittest.TestCase):
+    @staticmethod
+    def _spread(fastest: int, slowest: int, samples: int) -> dict[str, dict[str, int | None]]:
+        return {"fastest": {"a/b": fastest}, "slowest": {"a/b": slowest}, "samples": {"a/b": samples}}
+
+    def _compare(self, pr: int, pr_spread: dict[str, dict[str, int | None]]) -> BenchmarkComparison:
+        comparisons = generate_comparison({"a/b": 1000}, {"a/b": pr})
+        apply_confidence(comparisons, self._spread(900, 1100, 100), pr_spread, 95)
+        return comparisons[0]
+
+    def test_standard_error_from_range(self) -> None:
+        self.assertEqual(estimate_standard_error(900, 1100, 100), 5.0)
+        self.assertIsNone(estimate_standard_error(None, 1100, 100))
+        self.assertIsNone(estimate_standard_error(900, 1100, 0))
+
+    def test_noisy_change_not_flagged(self) -> None:
+        comparison = self._compare(1200, self._spread(100, 3000, 4))
+
+        self.assertAlmostEqual(comparison.change_pct, 20.0)
+        self.assertGreater(comparison.ci_pct, 20.0)
+        self.assertEqual(comparison.indicator, "")
+
+    def test_significant_change_flagged(self) -> None:
+        comparison = self._compare(1200, self._spread(1100, 1300, 100))
+
+        self.assertAlmostEqual(comparison.ci_pct, 1.96 * 50**0.5 / 10, places=2)
+        self.assertEqual(comparison.indicator, "❌")
+
+    def test_missing_spread_keeps_thresholds(self) -> None:
+        comparison = self._compare(1200, self._spread(1100, 1300, 0))
+
+        self.assertIsNone(comparison.ci_pct)
+        self.assertEqual(comparison.indicator, "❌")
+
+    def test_report_shows_interval(self) -> None:
+        comparison = self._compare(1200, self._spread(100, 3000, 4))
+        markdown = generate_markdown([comparison], "Benchmarks", confidence=95)
+
+        self.assertIn(f"| +20.0% ±{comparison.ci_pct:.1f}% |", markdown)
+        self.assertIn("95% confidence interval", markdown)
+        self.assertNotIn("regression", markdown)
+
+
+class TestMultiBaseline(unittest.TestCase):
+    def _write_runs(self, tmp: str, means: list[dict[str, int]]) -> list[str]:
+        paths = []
+        for index, run in enumerate(means):
+            path = Path(tmp) / f"base_{index}.json"
+            path.write_text(json.dumps([{"name": name, "mean": {"value": value}} for name, value in run.items()]))
+            paths.append(str(path))
+        return paths
+
+    def test_trimmed_mean(self) -> None:
+        self.assertEqual(trimmed_mean([1, 2, 3, 4, 100]), 3.0)
+        self.assertEqual(trimmed_mean([10, 20]), 15.0)
+
+    def test_median_and_range(self) -> None:
+        runs = [{"a/b": 100, "a/c": 50}, {"a/b": 300}, {"a/b": 110, "a/c": 70}]
+        with tempfile.TemporaryDirectory() as tmp:
+            columns, ranges = aggregate_baseline_columns(self._write_runs(tmp, runs), ["mean"])
+
+        self.assertEqual(columns["mean"], {"a/b": 110, "a/c": 60})
+        self.assertEqual(ranges["mean"], {"a/b": (100, 300), "a/c": (50, 70)})
+
+    def test_trimmed_mean_aggregate(self) -> None:
+        runs = [{"a/b": value} for value in (100, 102, 104, 106, 1000)]
+        with tempfile.TemporaryDirectory() as tmp:
+            columns, _ = aggregate_baseline_columns(self._write_runs(tmp, runs), ["mean"], "trimmed-mean")
+
+        self.assertEqual(columns["mean"], {"a/b": 104})
+
+    def test_pr_within_range_not_flagged(self) -> None:
+        comparisons = generate_comparison(
+            {"a/b": 100, "a/c": 100, "a/d": 100, "a/e": 100}, {"a/b": 108, "a/c": 95, "a/d": 115, "a/e": 130}
+        )
+        apply_base_ranges(comparisons, dict.fromkeys(["a/b", "a/c", "a/d", "a/e"], (90, 120)))
+        indicators = {c.name: c.indicator for c in comparisons}
+
+        # Only errors survive a range that a single outlying base run may have stretched
+        self.assertEqual(indicators, {"a/b": "", "a/c": "", "a/d": "❌", "a/e": "❌"})
+        self.assertIn("| 100 ns (90 ns - 120 ns) |", generate_markdown(comparisons, "Benchmarks"))
+
+    def test_expand_glob(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            paths = self._write_runs(tmp, [{"a": 1}] * 3)
+            self.assertEqual(expand_base_specs([str(Path(tmp) / "base_*.json")]), paths)
+            self.assertEqual(expand_base_specs(["history:bench.db?last=5"]), ["history:bench.db?last=5"])
+
+    def test_unmatched_glob_exits(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp, redirect_stderr(io.StringIO()), self.assertRaises(SystemExit):
+            expand_base_specs([str(Path(tmp) / "*.json")])
+
+
+class TestThroughputMetric(unittest.TestCase):
+    LOG = (
+        "copy         fastest       │ slowest       │ median        │ mean          │ samples │ iters\n"
+        "├─ small     1.551 ms      │ 1.738 ms      │ 1.590 ms      │ 1.599 ms      │ 100     │ 100\n"
+        "│            644.6 MB/s    │ 575.3 MB/s    │ 628.8 MB/s    │ 625.3 MB/s    │         │\n"
+        "├─ untimed   8 ns          │ 9 ns          │ 8 ns          │ 8 ns          │ 100     │ 51200\n"
+        "╰─ large     3.102 ms      │ 3.476 ms      │ 3.180 ms      │ 3.198 ms      │ 100     │ 100\n"
+        "             1.2 GiB/s     │ 1 GiB/s       │ 1.1 GiB/s     │ 1.1 GiB/s     │         │\n"
+    )
+
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def _write(self, name: str, log: str) -> Path:
+        path = Path(self.tmp.name) / name
+        with path.open("w", encoding="utf-8") as stream:
+            parse_divan_table(log.splitlines()).write_json(stream)
+        return path
+
+    def test_change_is_inverted(self) -> None:
+        self.assertEqual(calculate_change(100, 50, higher_is_better=True), 100.0)
+        self.assertEqual(calculate_change(100, 200, higher_is_better=True), -50.0)
+
+        comparisons = generate_comparison({"a/b": 1000, "a/c": 1000}, {"a/b": 800, "a/c": 1200}, "throughput")
+
+        self.assertEqual([c.indicator for c in comparisons], ["❌", "✅"])
+        self.assertEqual(comparisons[0].change_pct, 25.0)
+
+    @skip_without_numpy
+    def test_vectorized_matches_pure_python(self) -> None:
+        self.assertIsNotNone(compare_divan.np, "NumPy is required in CI")
+        base = {f"a/{i}": 1000 + i for i in range(100)}
+        pr = {f"a/{i}": 900 + 3 * i for i in range(10, 110)}
+
+        vectorized = generate_comparison(base, pr, "throughput")
+        with mock.patch.object(compare_divan, "np", None):
+            self.assertEqual(generate_comparison(base, pr, "throughput"), vectorized)
+
+    def test_compare_files(self) -> None:
+        base = self._write("base.json", self.LOG)
+        pr = self._write("pr.json", self.LOG.replace("644.6 MB/s", "322.3 MB/s").replace("625.3 MB/s", "312.6 MB/s"))
+        metrics = comparison_metrics("throughput")
+
+        pr_columns = load_metric_columns(pr, metrics)
+        comparisons = compare_columns(load_metric_columns(base, metrics), pr_columns, "throughput")
+
+        self.assertEqual(pr_columns["throughput_unit"], {"copy/small": "B/s", "copy/large": "B/s"})
+        self.assertEqual([c.name for c in comparisons], ["copy/large", "copy/small"])
+        self.assertEqual(comparisons[1].indicator, "❌")
+        self.assertEqual(
+            format_table_row(comparisons[1]), "| `copy/small` | 625.300 MB/s | 312.600 MB/s | +100.0% ❌ |"
+        )
+
+    def test_units_must_match(self) -> None:
+        base = self._write("base.json", self.LOG)
+        pr = self._write("pr.json", self.LOG.replace("MB/s", "Mitem/s"))
+        metrics = comparison_metrics("throughput")
+
+        comparisons = compare_columns(
+            load_metric_columns(base, metrics), load_metric_columns(pr, metrics), "throughput"
+        )
+
+        self.assertEqual([c.status for c in comparisons], [ComparisonStatus.COMPARED, ComparisonStatus.INCOMPARABLE])
+        self.assertIsNone(comparisons[1].change_pct)
+        self.assertEqual(
+            format_table_row(comparisons[1]), "| `copy/small` | 625.300 MB/s | 625.300 Mitem/s | units differ |"
+        )
+        self.assertIn("1 benchmark(s) not compared", generate_markdown(comparisons, "Throughput"))
+
+    def test_aggregated_units_must_match(self) -> None:
+        other = self._write("other.json", self.LOG.replace("MB/s", "Mitem/s"))
+        specs = [str(self._write("base.json", self.LOG)), str(other)]
+        metrics = comparison_metrics("throughput")
+
+        base_columns, ranges = aggregate_baseline_columns(specs, metrics)
+        comparisons = compare_columns(
+            base_columns,
+            load_metric_columns(other, metrics),
+            "throughput",
+            CompareOptions(base_ranges=ranges["throughput"]),
+        )
+
+        self.assertEqual(base_columns["throughput_unit"], {"copy/small": "mixed units", "copy/large": "B/s"})
+        self.assertNotIn("copy/small", ranges["throughput"])
+        self.assertEqual(comparisons[1].status, ComparisonStatus.INCOMPARABLE)
+        self.assertIsNone(comparisons[1].base)
+
+    def test_format_throughput(self) -> None:
+        self.assertEqual(format_throughput(1_181_116_006, "B/s"), "1.181 GB/s")
+        self.assertEqual(format_throughput(88, "char/s"), "88 char/s")
+        self.assertEqual(format_throughput(None, "Hz"), "N/A")
+
+    def test_rejected_without_json(self) -> None:
+        path = Path(self.tmp.name) / "results.bin"
+        with path.open("wb") as stream:
+            parse_divan_table(self.LOG.splitlines()).write_binary(stream)
+        stderr = io.StringIO()
+
+        with redirect_stderr(stderr), self.assertRaises(SystemExit):
+            load_metric_columns(path, comparison_metrics("throughput"))
+        self.assertIn("does not store throughput", stderr.getvalue())
+        with self.assertRaisesRegex(ValueError, "Statistical mode"):
+            compare_columns({}, {}, "throughput", CompareOptions(confidence=95))
+
+
+class TestIterJsonArray(unittest.TestCase):
+    def test_matches_json_loads_for_any_chunk_size(self) -> None:
+        document = (FIXTURES / "base_benchmarks.json").read_text()
+        for chunk_size in (1, 2, 7, 64, 1 << 16):
+            elements = list(iter_json_array(io.StringIO(document), chunk_size))
+            self.assertEqual(elements, json.loads(document))
+
+    def test_numbers_split_across_chunks(self) -> None:
+        self.assertEqual(list(iter_json_array(io.StringIO("[12345, 1.5e3, -7]"), 1)), [12345, 1.5e3, -7])
+
+    def test_empty_array(self) -> None:
+        self.assertEqual(list(iter_json_array(io.StringIO(" [ ] "))), [])
+
+    def test_invalid_documents(self) -> None:
+        for document in ("[1,]", "[1 2]", "[1", "", "[1] 2"):
+            with self.subTest(document=document), self.assertRaises(json.JSONDecodeError):
+                list(iter_json_array(io.StringIO(document), 2))
+
+    def test_error_positions_are_file_relative(self) -> None:
+        document = "[1,\n 22,\n 333 x]"
+        for chunk_size in (1, 3, 1 << 16):
+            with self.subTest(chunk_size=chunk_size), self.assertRaises(json.JSONDecodeError) as caught:
+                list(iter_json_array(io.StringIO(document), chunk_size))
+            self.assertEqual((caught.exception.pos, caught.exception.lineno, caught.exception.colno), (14, 3, 6))
+            self.assertIn("line 3 column 6 (char 14)", str(caught.exception))
+
+    def test_unterminated_value_is_bounded(self) -> None:
+        stream = io.StringIO('[{"name": "' + "a" * 10_000)
+
+        with (
+            mock.patch.object(compare_divan, "JSON_MAX_VALUE_SIZE", 100),
+            self.assertRaisesRegex(json.JSONDecodeError, "no complete value within 100 characters"),
+        ):
+            list(iter_json_array(stream, 16))
+        self.assertLessEqual(stream.tell(), len("[") + 100)
+
+    def test_not_an_array(self) -> None:
+        with self.assertRaisesRegex(ValueError, "Expected JSON array, got dict"):
+            list(iter_json_array(io.StringIO('{"name": "a"}')))
+
+
+class TestIterJsonResults(unittest.TestCase):
+    def test_document_with_metadata(self) -> None:
+        results = json.loads((FIXTURES / "base_benchmarks.json").read_text())
+        document = json.dumps({"results": results, "metadata": {"timer_precision": {"value": 41, "unit": "ns"}}})
+        for chunk_size in (1, 7, 1 << 16):
+            metadata = RunMetadata()
+            self.assertEqual(list(iter_json_results(io.StringIO(document), metadata, chunk_size)), results)
+            self.assertEqual(metadata.timer_precision, 41)
+
+    def test_legacy_array(self) -> None:
+        document = (FIXTURES / "base_benchmarks.json").read_text()
+        metadata = RunMetadata()
+
+        self.assertEqual(list(iter_json_results(io.StringIO(document), metadata)), json.loads(document))
+        self.assertIsNone(metadata.timer_precision)
+
+    def test_metadata_first_and_unknown_fields(self) -> None:
+        document = '{"metadata": {"timer_precision": {"value": 20}}, "tool": [1], "results": [{"name": "a"}]}'
+        metadata = RunMetadata()
+
+        self.assertEqual(list(iter_json_results(io.StringIO(document), metadata)), [{"name": "a"}])
+        self.assertEqual(metadata.timer_precision, 20)
+
+    def test_invalid_documents(self) -> None:
+        cases = {
+            '{"metadata": {}}': "'results' array",
+            '{"results": {}}': "'results' to be a JSON array",
+            '{"results": [], "metadata": {"timer_precision": 41}}': "invalid 'timer_precision'",
+            '"results"': "array or object, got str",
+        }
+        for document, message in cases.items():
+            with self.subTest(document=document), self.assertRaisesRegex(ValueError, message):
+                list(iter_json_results(io.StringIO(document)))
+
+
+class TestNoiseFloor(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def _write(self, name: str, means: dict[str, str]) -> Path:
+        lines = ["Timer precision: 2 ns\n", "hot   fastest │ slowest │ median │ mean │ samples │ iters\n"]
+        lines += [f"├─ {name}  {mean} │ {mean} │ {mean} │ {mean} │ 100 │ 100\n" for name, mean in means.items()]
+        path = Path(self.tmp.name) / name
+        with path.open("w", encoding="utf-8") as stream:
+            parse_divan_table(lines).write_json(stream)
+        return path
+
+    def test_timer_noise_floor(self) -> None:
+        self.assertEqual(timer_noise_floor(2, [RunMetadata(41), RunMetadata(20)]), 82)
+        self.assertIsNone(timer_noise_floor(2, [RunMetadata()]))
+
+    def test_changes_within_floor_not_flagged(self) -> None:
+        base = self._write("base.json", {"tick": "3 ns", "slower": "3 ns", "ms": "1 ms"})
+        pr = self._write("pr.json", {"tick": "4 ns", "slower": "9 ns", "ms": "1.2 ms"})
+        base_metadata, pr_metadata = RunMetadata(), RunMetadata()
+        base_columns = load_metric_columns(base, ["mean"], base_metadata)
+        pr_columns = load_metric_columns(pr, ["mean"], pr_metadata)
+
+        noise_floor = timer_noise_floor(1.5, [base_metadata, pr_metadata])
+        comparisons = compare_columns(base_columns, pr_columns, "mean", CompareOptions(noise_floor=noise_floor))
+
+        self.assertEqual(noise_floor, 3)
+        by_name = {c.name: c for c in comparisons}
+        indicators = {name: c.indicator for name, c in by_name.items()}
+        self.assertEqual(indicators, {"hot/tick": "", "hot/slower": "❌", "hot/ms": "❌"})
+        self.assertAlmostEqual(by_name["hot/tick"].change_pct, 100 / 3)
+        report = generate_markdown(comparisons, "Benchmarks", noise_floor=noise_floor)
+        self.assertIn("Changes of at most 3 ns are within timer precision", report)
+
+    def test_rejected_for_counts(self) -> None:
+        with self.assertRaisesRegex(ValueError, "does not apply to metric 'throughput'"):
+            compare_columns({}, {}, "throughput", CompareOptions(noise_floor=10))
+
+
+class TestEnvironmentMismatches(unittest.TestCase):
+    BASE = HostFingerprint("AMD EPYC 7763", 64, "performance", "6.8.0", 0.2)
+    PR = HostFingerprint("Intel Xeon", 2, None, "6.8.0", 3.5)
+
+    def test_mismatch_warned_in_report(self) -> None:
+        mismatches = environment_mismatches(RunMetadata(host=self.BASE), RunMetadata(host=self.PR))
+        comparisons = generate_comparison({"a/b": 100}, {"a/b": 150})
+
+        report = generate_markdown(comparisons, "Benchmarks", env_mismatches=mismatches)
+        stream = io.StringIO()
+        render_markdown(comparisons, stream, "Benchmarks", max_bytes=2000, env_mismatches=mismatches)
+
+        for markdown in (report, stream.getvalue()):
+            lines = markdown.splitlines()
+            self.assertEqual(lines[2], "> [!WARNING]")
+            self.assertIn("> | CPU model | `AMD EPYC 7763` | `Intel Xeon` |", lines)
+            self.assertIn("> | Cores | `64` | `2` |", lines)
+            self.assertNotIn("Kernel", markdown)
+
+    def test_missing_fingerprint(self) -> None:
+        self.assertEqual(environment_mismatches(RunMetadata(host=self.BASE), RunMetadata()), [])
+        with self.assertRaisesRegex(ValueError, "No host fingerprint in the base and PR results"):
+            environment_mismatches(RunMetadata(), RunMetadata(), strict=True)
+
+    def test_strict_refuses_mismatch(self) -> None:
+        with self.assertRaisesRegex(ValueError, "different hosts \\(CPU model: 'AMD EPYC 7763' vs 'Intel Xeon'; Cores"):
+            environment_mismatches(RunMetadata(host=self.BASE), RunMetadata(host=self.PR), strict=True)
+        same = RunMetadata(host=HostFingerprint(**{**vars(self.BASE), "load_average": 7.0}))
+        self.assertEqual(environment_mismatches(RunMetadata(host=self.BASE), same, strict=True), [])
+
+    def test_strict_refuses_mixed_base_hosts(self) -> None:
+        base = RunMetadata(host=self.BASE)
+        base.update(RunMetadata(host=self.PR))
+
+        with self.assertRaisesRegex(ValueError, "CPU model: 'AMD EPYC 7763 / Intel Xeon' vs 'AMD EPYC 7763'"):
+            environment_mismatches(base, RunMetadata(host=self.BASE), strict=True)
+
+
+class TestRerun(unittest.TestCase):
+    def test_filter_matches_benchmark_functions(self) -> None:
+        pattern = rerun_filter(["hashing/sha256/1024", "hashing/sha256/64", "bench_a::parse/Vec<u8>/1.5"])
+
+        self.assertEqual(
+            pattern,
+            "^(?:hashing(?:::sha256(?:::1024)?)?|hashing(?:::sha256(?:::64)?)?|parse(?:::Vec<u8>(?:::1\\.5)?)?)$",
+        )
+        for path in ("hashing::sha256", "hashing", "parse::Vec<u8>", "parse::Vec<u8>::1.5"):
+            self.assertRegex(path, pattern)
+        for path in ("hashing::sha2560", "hashing::md5", "bench_a::parse", "parse::Vec<u8>::105"):
+            self.assertNotRegex(path, pattern)
+
+    def test_confirm_replaces_rerun_comparisons(self) -> None:
+        base = {"mean": {"a/real": 100, "a/flaky": 100, "a/noisy": 100, "a/fast": 100}}
+        pr = {"mean": {"a/real": 150, "a/flaky": 150, "a/noisy": 107, "a/fast": 100}}
+        rerun = {"mean": {"a/real": 140, "a/flaky": 101, "a/gone": 5}}
+        comparisons = compare_columns(base, pr, "mean")
+
+        summary = confirm_rerun(comparisons, base, rerun, "mean")
+
+        self.assertEqual((summary.rerun, summary.confirmed, summary.cleared), (2, ["a/real"], ["a/flaky"]))
+        self.assertEqual(
+            {c.name: c.pr for c in comparisons}, {"a/fast": 100, "a/flaky": 101, "a/noisy": 107, "a/real": 140}
+        )
+        report = generate_markdown(comparisons, "Benchmarks", rerun=summary)
+        self.assertIn("**2 potential regression(s)**", report)
+        self.assertIn("2 benchmark(s) re-run: 1 regression(s) confirmed, 1 cleared.", report)
+
+    def test_write_filter(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "filter.txt"
+            write_rerun_filter(str(path), ["a/b"])
+            self.assertEqual(path.read_text(), "^(?:a(?:::b)?)$\n")
+            write_rerun_filter(str(path), [])
+            self.assertFalse(path.exists())
+            with self.assertRaises(OSError):
+                write_rerun_filter(str(Path(tmp) / "missing" / "filter.txt"), ["a/b"])
+
+
+class TestLoadMetricValues(unittest.TestCase):
+    def _load_invalid(self, entries: list[Any]) -> str:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "bench.json"
+            path.write_text(json.dumps(entries))
+            stderr = io.StringIO()
+            with redirect_stderr(stderr), self.assertRaises(SystemExit):
+                load_metric_values(path, "mean")
+        return stderr.getvalue()
+
+    def test_keeps_only_requested_metrics(self) -> None:
+        columns = load_metric_columns(FIXTURES / "base_benchmarks.json", ["mean", "samples"])
+
+        self.assertEqual(set(columns), {"mean", "samples"})
+        self.assertEqual(columns["mean"]["parse/parse_large"], 321800)
+        self.assertEqual(columns["samples"]["parse/parse_large"], 100)
+
+    def test_matches_full_load(self) -> None:
+        expected = {
+            name: entry["median"]["value"] for name, entry in _load_as_dict(FIXTURES / "pr_benchmarks.json").items()
+        }
+        self.assertEqual(load_metric_values(FIXTURES / "pr_benchmarks.json", "median"), expected)
+
+    def test_missing_metric_reports_index(self) -> None:
+        error = self._load_invalid([{"name": "a", "mean": {"value": 1}}, {"name": "b"}])
+        self.assertIn("'b' (entry 1)", error)
+        self.assertIn("missing metric 'mean'", error)
+
+    def test_duplicate_names_keep_last(self) -> None:
+        entries = [{"name": "a", "mean": {"value": 1}}, {"name": "b", "mean": {"value": 3}}]
+        entries += [{"name": "a", "mean": {"value": 2}}, {"name": "b", "mean": {"value": 4}}]
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "bench.json"
+            path.write_text(json.dumps(entries))
+            stderr = io.StringIO()
+            with redirect_stderr(stderr):
+                values = load_metric_values(path, "mean")
+
+        self.assertEqual(values, {"a": 2, "b": 4})
+        self.assertIn("2 duplicate benchmark name(s)", stderr.getvalue())
+        self.assertIn("(first: 'a')", stderr.getvalue())
+
+    def test_non_object_entry_rejected(self) -> None:
+        error = self._load_invalid([{"name": "a", "mean": {"value": 1}}, 5])
+        self.assertIn("Entry 1", error)
+
+    def test_binary_matches_json(self) -> None:
+        table = parse_divan_table((FIXTURES / "divan_output.txt").read_text().splitlines())
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "results.bin"
+            with path.open("wb") as stream:
+                table.write_binary(stream)
+
+            for metric in ("fastest", "median", "mean"):
+                self.assertEqual(
+                    load_metric_values(path, metric),
+                    load_metric_values(FIXTURES / "parsed_results.json", metric),
+                )
+
+    def test_binary_metadata_loaded(self) -> None:
+        table = parse_divan_table((FIXTURES / "divan_output.txt").read_text().splitlines())
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "results.bin"
+            with path.open("wb") as stream:
+                table.write_binary(stream)
+            metadata = RunMetadata()
+            load_metric_columns(path, ["mean"], metadata)
+
+        self.assertEqual(metadata.timer_precision, 41)
+
+    def test_binary_duplicate_names_keep_last(self) -> None:
+        rows = [("a", 1, 9, 4, 5, 10, 100), ("b", 2, 8, 4, 5, 10, 100), ("a", 3, 7, 4, 6, 10, 100)]
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "results.bin"
+            with path.open("wb") as stream:
+                ResultTable.from_rows(rows).write_binary(stream)
+            stderr = io.StringIO()
+            with redirect_stderr(stderr):
+                columns = load_metric_columns(path, ["fastest", "mean"])
+
+        self.assertEqual(columns, {"fastest": {"a": 3, "b": 2}, "mean": {"a": 6, "b": 5}})
+        self.assertIn("1 duplicate benchmark name(s)", stderr.getvalue())
+        self.assertIn("only the last entry", stderr.getvalue())
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,99 @@
+"""Tests for env_divan module."""
+
+from __future__ import annotations
+
+import tempfile
+import unittest
+from pathlib import Path
+
+from env_divan import (
+    FingerprintMismatch,
+    HostFingerprint,
+    capture_fingerprint,
+    compare_fingerprints,
+    compare_host_sets,
+    read_cpu_model,
+    read_governor,
+)
+
+X86_CPUINFO = """\
+processor\t: 0
+vendor_id\t: AuthenticAMD
+model name\t: AMD EPYC 7763 64-Core Processor
+cpu MHz\t\t: 2445.432
+
+processor\t: 1
+model name\t: AMD EPYC 7763 64-Core Processor
+"""
+
+ARM_CPUINFO = """\
+processor\t: 0
+BogoMIPS\t: 108.00
+CPU part\t: 0xd0c
+
+Hardware\t: BCM2835
+"""
+
+
+class TestCapture(unittest.TestCase):
+    def setUp(self) -> None:
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.tmp = Path(tmp.name)
+
+    def _file(self, name: str, text: str) -> Path:
+        path = self.tmp / name
+        path.write_text(text)
+        return path
+
+    def test_cpu_model(self) -> None:
+        self.assertEqual(read_cpu_model(self._file("x86", X86_CPUINFO)), "AMD EPYC 7763 64-Core Processor")
+        self.assertEqual(read_cpu_model(self._file("arm", ARM_CPUINFO)), "BCM2835")
+        self.assertIsNotNone(read_cpu_model(self.tmp / "missing"))
+
+    def test_governor(self) -> None:
+        self.assertEqual(read_governor(self._file("governor", "performance\n")), "performance")
+        self.assertIsNone(read_governor(self.tmp / "missing"))
+
+    def test_capture_fingerprint(self) -> None:
+        fingerprint = capture_fingerprint()
+
+        self.assertGreaterEqual(fingerprint.cores, 1)
+        self.assertTrue(fingerprint.kernel)
+        self.assertEqual(HostFingerprint.from_dict(fingerprint.to_dict()), fingerprint)
+
+
+class TestFingerprint(unittest.TestCase):
+    def test_unknown_fields_left_out(self) -> None:
+        fingerprint = HostFingerprint(cpu_model="Xeon", cores=4, load_average=1.5)
+
+        self.assertEqual(fingerprint.to_dict(), {"cpu_model": "Xeon", "cores": 4, "load_average": 1.5})
+        self.assertEqual(HostFingerprint.from_dict({**fingerprint.to_dict(), "future": 1}), fingerprint)
+
+    def test_invalid_fields(self) -> None:
+        for data in ([], {"cores": "4"}, {"cores": True}, {"kernel": 6}, {"load_average": "high"}):
+            with self.subTest(data=data), self.assertRaises(ValueError):
+                HostFingerprint.from_dict(data)
+
+    def test_compare_fingerprints(self) -> None:
+        bare_metal = HostFingerprint("EPYC", 64, "performance", "6.8.0", 0.3, "rustc 1.90.0")
+        vm = HostFingerprint("Xeon", 2, None, "6.8.0", 3.9, "rustc 1.90.0")
+
+        self.assertEqual(
+            compare_fingerprints(bare_metal, vm),
+            [FingerprintMismatch("cpu_model", "EPYC", "Xeon"), FingerprintMismatch("cores", 64, 2)],
+        )
+        self.assertEqual(compare_fingerprints(bare_metal, HostFingerprint("EPYC", 64, load_average=5.0)), [])
+
+    def test_compare_host_sets(self) -> None:
+        epyc, xeon = HostFingerprint("EPYC", 64, kernel="6.8.0"), HostFingerprint("Xeon", 64, kernel="6.8.0")
+
+        self.assertEqual(compare_host_sets([epyc], [epyc]), [])
+        self.assertEqual(
+            compare_host_sets([epyc, xeon], [epyc]), [FingerprintMismatch("cpu_model", "EPYC / Xeon", "EPYC")]
+        )
+        self.assertEqual(compare_host_sets([epyc], []), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,156 @@
+"""Tests for history_divan module."""
+
+from __future__ import annotations
+
+import io
+import subprocess
+import sys
+import tempfile
+import unittest
+from contextlib import redirect_stderr
+from pathlib import Path
+
+from compare_divan import load_baseline_values, load_metric_columns, load_metric_values
+from history_divan import HistoryError, HistorySpec, HistoryStore, RunInfo, parse_history_spec
+from parse_divan import RESULT_COLUMNS
+
+REPO = Path(__file__).parent.parent
+FIXTURES = REPO / "tests" / "fixtures"
+
+
+def _scaled(columns: dict[str, dict[str, int | None]], factor: int) -> dict[str, dict[str, int | None]]:
+    return {
+        metric: {name: None if value is None else value * factor for name, value in values.items()}
+        for metric, values in columns.items()
+    }
+
+
+class TestParseHistorySpec(unittest.TestCase):
+    def test_file_path_is_not_a_spec(self) -> None:
+        self.assertIsNone(parse_history_spec("results/base.json"))
+
+    def test_parses_options(self) -> None:
+        spec = parse_history_spec("history:db/bench.db?branch=main&last=5")
+
+        self.assertEqual(spec, HistorySpec(path=Path("db/bench.db"), branch="main", last=5))
+
+    def test_defaults_to_latest_run(self) -> None:
+        self.assertEqual(parse_history_spec("history:bench.db"), HistorySpec(path=Path("bench.db")))
+
+    def test_rejects_unknown_options(self) -> None:
+        with self.assertRaisesRegex(ValueError, "Unknown history spec option"):
+            parse_history_spec("history:bench.db?runs=5")
+
+    def test_rejects_empty_selection(self) -> None:
+        with self.assertRaisesRegex(ValueError, "at least one run"):
+            parse_history_spec("history:bench.db?last=0")
+
+    def test_rejects_non_integer_selection(self) -> None:
+        with self.assertRaisesRegex(ValueError, "non-integer 'last'"):
+            parse_history_spec("history:bench.db?last=abc")
+
+    def test_cli_reports_malformed_spec(self) -> None:
+        for script in ("compare_divan.py", "trend_divan.py"):
+            with self.subTest(script=script):
+                args = [sys.executable, str(REPO / script), "history:bench.db?last=abc"]
+                if script == "compare_divan.py":
+                    args.append(str(FIXTURES / "pr_benchmarks.json"))
+                result = subprocess.run(args, capture_output=True, text=True, check=False)  # noqa: S603
+
+                self.assertEqual(result.returncode, 1)
+                self.assertEqual(
+                    result.stderr, "Error: History spec 'history:bench.db?last=abc' has a non-integer 'last' option\n"
+                )
+
+
+class TestHistoryStore(unittest.TestCase):
+    def setUp(self) -> None:
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.db = Path(tmp.name) / "bench.db"
+        self.columns = load_metric_columns(FIXTURES / "base_benchmarks.json", RESULT_COLUMNS)
+
+        with HistoryStore(self.db) as store:
+            for index, (branch, factor) in enumerate([("main", 1), ("main", 3), ("feature", 100), ("main", 2)]):
+                run = RunInfo(f"run-{index}", f"sha{index}", branch, f"2026-01-0{index + 1}T00:00:00+00:00")
+                store.ingest(run, _scaled(self.columns, factor))
+
+    def test_select_runs_newest_first(self) -> None:
+        with HistoryStore(self.db, readonly=True) as store:
+            runs = store.select_runs(branch="main", last=2)
+
+        self.assertEqual([run.run_id for run in runs], ["run-3", "run-1"])
+
+    def test_baseline_is_median_of_last_runs(self) -> None:
+        spec = parse_history_spec(f"history:{self.db}?branch=main&last=3")
+        mean = self.columns["mean"]
+
+        self.assertEqual(
+            load_baseline_values(f"history:{self.db}?branch=main&last=3", "mean"),
+            {name: value * 2 for name, value in mean.items()},
+        )
+        with HistoryStore(self.db, readonly=True) as store:
+            self.assertEqual(
+                store.baseline_values(spec, "samples"),
+                {name: value * 2 for name, value in self.columns["samples"].items()},
+            )
+
+    def test_baseline_from_commit(self) -> None:
+        values = load_baseline_values(f"history:{self.db}?commit=sha2", "median")
+
+        self.assertEqual(values, {name: value * 100 for name, value in self.columns["median"].items()})
+
+    def test_file_baseline_unchanged(self) -> None:
+        path = FIXTURES / "base_benchmarks.json"
+
+        self.assertEqual(load_baseline_values(str(path), "mean"), load_metric_values(path, "mean"))
+
+    def test_series_values_oldest_first(self) -> None:
+        name = next(name for name, value in self.columns["mean"].items() if value is not None)
+        with HistoryStore(self.db, readonly=True) as store:
+            runs, series = store.series_values(HistorySpec(path=self.db, branch="main", last=3), "mean")
+
+        self.assertEqual([run.run_id for run in runs], ["run-0", "run-1", "run-3"])
+        self.assertEqual(series[name], [self.columns["mean"][name] * factor for factor in (1, 3, 2)])
+
+    def test_timestamps_ordered_in_utc(self) -> None:
+        with HistoryStore(self.db) as store:
+            # 01:30+01:00 is 00:30 UTC, older than run-5 although it sorts after it as text
+            store.ingest(RunInfo("run-4", "sha4", "release", "2026-01-05T01:30:00+01:00"), self.columns)
+            store.ingest(RunInfo("run-5", "sha5", "release", "2026-01-05T00:45:00"), self.columns)
+            runs = store.select_runs(branch="release")
+
+        self.assertEqual(
+            [(run.run_id, run.timestamp) for run in runs],
+            [
+                ("run-5", "2026-01-05T00:45:00+00:00"),
+                ("run-4", "2026-01-05T00:30:00+00:00"),
+            ],
+        )
+
+    def test_invalid_timestamp_rejected(self) -> None:
+        with HistoryStore(self.db) as store, self.assertRaisesRegex(HistoryError, "Invalid timestamp 'yesterday'"):
+            store.ingest(RunInfo("run-4", "sha4", "main", "yesterday"), self.columns)
+
+    def test_duplicate_run_rejected(self) -> None:
+        with HistoryStore(self.db) as store, self.assertRaisesRegex(HistoryError, "already in"):
+            store.ingest(RunInfo("run-0", "sha9", "main", "2026-02-01T00:00:00+00:00"), self.columns)
+
+    def test_no_matching_runs(self) -> None:
+        stderr = io.StringIO()
+        with redirect_stderr(stderr), self.assertRaises(SystemExit):
+            load_baseline_values(f"history:{self.db}?branch=release", "mean")
+
+        self.assertIn("No runs", stderr.getvalue())
+
+    def test_missing_database(self) -> None:
+        stderr = io.StringIO()
+        with redirect_stderr(stderr), self.assertRaises(SystemExit):
+            load_baseline_values(f"history:{self.db.with_name('missing.db')}", "mean")
+
+        self.assertIn("not found", stderr.getvalue())
+        self.assertFalse(self.db.with_name("missing.db").exists())
+
+
+if __name__ == "__main__":
+    unittest.main()
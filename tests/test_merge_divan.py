@@ -0,0 +1,200 @@
+"""Tests for merge_divan module."""
+
+from __future__ import annotations
+
+import io
+import json
+import tempfile
+import unittest
+from contextlib import redirect_stderr
+from pathlib import Path
+
+from compare_divan import load_metric_columns
+from env_divan import HostFingerprint
+from merge_divan import ShardError, average_rows, average_throughput, merge_shards, write_merged
+from parse_divan import RESULT_COLUMNS, ResultTable, RunMetadata, Throughput
+from synth_divan import synthetic_rows
+
+
+class TestMergeShards(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.rows = sorted(synthetic_rows(200, seed=5))
+
+    def _shard(
+        self,
+        name: str,
+        rows: list,
+        *,
+        binary: bool = False,
+        metadata: RunMetadata | None = None,
+        throughput: dict[str, list[Throughput]] | None = None,
+    ) -> Path:
+        path = Path(self.tmp.name) / name
+        table = ResultTable.from_rows(rows, throughput, metadata or RunMetadata())
+        if binary:
+            with path.open("wb") as stream:
+                table.write_binary(stream)
+        else:
+            with path.open("w", encoding="utf-8") as stream:
+                table.write_json(stream)
+        return path
+
+    def test_interleaved_shards(self) -> None:
+        shards = [
+            self._shard("a.json", self.rows[0::3]),
+            self._shard("b.bin", self.rows[1::3], binary=True),
+            self._shard("c.json", self.rows[2::3]),
+        ]
+
+        self.assertEqual(list(merge_shards(shards)), self.rows)
+
+    def test_duplicate_policies(self) -> None:
+        slower = [(name, *(None if v is None else v * 2 for v in values)) for name, *values in self.rows[:10]]
+        shards = [self._shard("a.json", self.rows), self._shard("b.json", slower)]
+
+        with self.assertRaisesRegex(ShardError, "is in several shards: '.*a.json', '.*b.json'"):
+            list(merge_shards(shards))
+        self.assertEqual(list(merge_shards(shards, "fastest")), self.rows)
+
+        averaged = list(merge_shards(shards, "average"))
+        self.assertEqual(averaged[0], average_rows([self.rows[0], slower[0]]))
+        self.assertEqual(averaged[10:], self.rows[10:])
+
+    def test_average_rows(self) -> None:
+        rows = [("a/b", 10, 30, 20, 20, 100, 10), ("a/b", 12, 26, 22, 24, 50, 10), ("a/b", 8, None, 21, 22, 100, 5)]
+
+        self.assertEqual(average_rows(rows), ("a/b", 8, 30, 21, 22, 250, None))
+
+    def test_average_throughput(self) -> None:
+        throughputs = [
+            [Throughput("B/s", 300, 100, 200, 200)],
+            [Throughput("B/s", 250, 50, 100, None)],
+        ]
+
+        self.assertEqual(average_throughput(throughputs), [Throughput("B/s", 300, 50, 133, 200)])
+        self.assertEqual(average_throughput([*throughputs, [Throughput("item/s", 1, 1, 1, 1)]]), [])
+        self.assertEqual(average_throughput([*throughputs, []]), [])
+
+    def test_throughput_carried_through(self) -> None:
+        names = [row[0] for row in self.rows[:4]]
+        fast = {name: [Throughput("B/s", 400, 100, 200, 200)] for name in names}
+        slow = {names[0]: [Throughput("B/s", 200, 50, 100, 100)]}
+        slower = [(name, *(None if v is None else v * 2 for v in values)) for name, *values in self.rows[:1]]
+        shards = [self._shard("a.json", self.rows[:4], throughput=fast), self._shard("b.json", slower, throughput=slow)]
+        output = Path(self.tmp.name) / "merged.json"
+
+        for policy, expected in (
+            ("fastest", fast[names[0]]),
+            ("average", [Throughput("B/s", 400, 50, 133, 133)]),
+        ):
+            with self.subTest(policy=policy):
+                write_merged(shards, str(output), policy, "mean")
+
+                merged = {
+                    result["name"]: result.get("throughput") for result in json.loads(output.read_text())["results"]
+                }
+                self.assertEqual([Throughput.from_dict(item) for item in merged[names[0]]], expected)
+                self.assertEqual(merged[names[1]], [counter.to_dict() for counter in fast[names[1]]])
+
+    def test_inconsistent_shards(self) -> None:
+        cases = {
+            "not sorted": [self._shard("reversed.json", self.rows[::-1])],
+            "Duplicate benchmark": [self._shard("twice.json", [self.rows[0], self.rows[0]])],
+            "no results": [self._shard("a.json", self.rows), self._shard("empty.json", [])],
+            "disagree on --namespace-binaries": [
+                self._shard("a.json", self.rows),
+                self._shard("namespaced.json", [(f"bench_1::{name}", *values) for name, *values in self.rows]),
+            ],
+        }
+        for message, shards in cases.items():
+            with self.subTest(message=message), self.assertRaisesRegex(ShardError, message):
+                list(merge_shards(shards))
+
+    def test_namespacing_decided_per_shard(self) -> None:
+        generic = [(f"g/Vec<alloc::string::String>/{name}", *values) for name, *values in self.rows[:5]]
+        namespaced = [(f"bench_1::{name}", *values) for name, *values in self.rows]
+        cases = {
+            # Names holding the separator in a shard that is not namespaced, recorded or inferred
+            "recorded": [
+                self._shard("a.json", self.rows),
+                self._shard("b.json", generic, metadata=RunMetadata(namespace_binaries=False)),
+            ],
+            "inferred": [self._shard("a.json", self.rows), self._shard("b.bin", generic + self.rows[:1], binary=True)],
+        }
+        for case, shards in cases.items():
+            with self.subTest(case=case):
+                self.assertEqual(len(list(merge_shards(shards, "fastest"))), len(self.rows) + len(generic))
+
+        shards = [
+            self._shard("a.json", self.rows, metadata=RunMetadata(namespace_binaries=False)),
+            self._shard("namespaced.json", namespaced[:1], metadata=RunMetadata(namespace_binaries=True)),
+        ]
+        with self.assertRaisesRegex(ShardError, "'.*namespaced.json' and '.*a.json' disagree"):
+            list(merge_shards(shards))
+
+    def test_write_merged_is_loadable(self) -> None:
+        shards = [self._shard("a.json", self.rows[:150]), self._shard("b.json", self.rows[100:])]
+        output = Path(self.tmp.name) / "merged.json"
+
+        count = write_merged(shards, str(output), "fastest", "mean")
+
+        self.assertEqual(count, len(self.rows))
+        columns = load_metric_columns(output, RESULT_COLUMNS)
+        self.assertEqual(list(columns["mean"]), [row[0] for row in self.rows])
+
+    def test_merged_metadata(self) -> None:
+        shards = [
+            self._shard("a.json", self.rows[0::3], metadata=RunMetadata(20)),
+            self._shard("b.bin", self.rows[1::3], binary=True),
+            self._shard("c.json", self.rows[2::3], metadata=RunMetadata(41)),
+        ]
+        output = Path(self.tmp.name) / "merged.json"
+
+        write_merged(shards, str(output), "error", "mean")
+
+        metadata = RunMetadata()
+        load_metric_columns(output, ["mean"], metadata)
+        self.assertEqual(metadata.timer_precision, 41)
+
+    def test_mixed_hosts_recorded(self) -> None:
+        xeon, epyc = HostFingerprint(cpu_model="Xeon"), HostFingerprint(cpu_model="EPYC")
+        shards = [
+            self._shard("a.json", self.rows[0::2], metadata=RunMetadata(host=xeon)),
+            self._shard("b.json", self.rows[1::2], metadata=RunMetadata(host=epyc)),
+        ]
+        output = Path(self.tmp.name) / "merged.json"
+        stderr = io.StringIO()
+
+        with redirect_stderr(stderr):
+            write_merged(shards, str(output), "error", "mean")
+
+        self.assertIn("measured on 2 different hosts", stderr.getvalue())
+        metadata = RunMetadata()
+        load_metric_columns(output, ["mean"], metadata)
+        self.assertEqual(metadata.hosts, [xeon, epyc])
+
+    def test_failed_merge_keeps_output(self) -> None:
+        shards = [self._shard("a.json", self.rows), self._shard("b.json", self.rows)]
+        output = Path(self.tmp.name) / "merged.json"
+        output.write_text("previous")
+
+        with self.assertRaises(ShardError):
+            write_merged(shards, str(output), "error", "mean")
+
+        self.assertEqual(output.read_text(), "previous")
+        remaining = sorted(path.name for path in Path(self.tmp.name).iterdir())
+        self.assertEqual(remaining, ["a.json", "b.json", "merged.json"])
+
+
+class TestSortedByName(unittest.TestCase):
+    def test_sorts_rows(self) -> None:
+        rows = list(synthetic_rows(100))
+        table = ResultTable.from_rows(rows).sorted_by_name()
+
+        self.assertEqual([table.row(index) for index in range(len(table))], sorted(rows))
+
+
+if __name__ == "__main__":
+    unittest.main()
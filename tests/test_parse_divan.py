@@ -2,11 +2,38 @@
 
 from __future__ import annotations
 
+import io
 import json
+import struct
+import tempfile
 import unittest
 from pathlib import Path
 
-from parse_divan import parse_divan_output
+from env_divan import HostFingerprint
+from parse_divan import (
+    BENCH_LINE_PATTERN,
+    BINARY_FORMAT_VERSION,
+    TREE_LINE_PATTERN,
+    DivanLineParser,
+    ResultTable,
+    RunMetadata,
+    Throughput,
+    iter_divan_results,
+    iter_divan_rows,
+    parse_divan_output,
+    parse_divan_table,
+    parse_running_line,
+    parse_sections,
+    parse_throughput,
+    parse_timer_precision,
+    read_binary_metadata,
+    read_binary_metric,
+    split_sections,
+    tee_lines,
+    write_json_array,
+    write_json_document,
+    write_ndjson,
+)
 
 FIXTURES = Path(__file__).parent / "fixtures"
 
@@ -44,6 +71,13 @@ class TestParseDivanOutput(unittest.TestCase):
         self.assertEqual(results[0].samples, 100)
         self.assertEqual(results[0].iters, 100)
 
+    def test_line_patterns_still_exported(self) -> None:
+        line = "│  ├─ 16   1.551 ms │ 1.738 ms │ 1.590 ms │ 1.599 ms │ 100     │ 100"
+
+        self.assertIsNotNone(TREE_LINE_PATTERN.match(line))
+        self.assertEqual(BENCH_LINE_PATTERN.match(line).group(1), "16")
+        self.assertIsNone(TREE_LINE_PATTERN.match("parse        fastest  │ slowest"))
+
     def test_result_count(self) -> None:
         content = (FIXTURES / "divan_output.txt").read_text()
         results = parse_divan_output(content)
@@ -86,6 +120,51 @@ class TestParseDivanOutput(unittest.TestCase):
         self.assertEqual(results[0].samples, 10)
         self.assertEqual(results[0].iters, 10)
 
+    def test_unspaced_and_padded_time_values(self) -> None:
+        header = "fmt        fastest │ slowest │ median  │ mean    │ samples │ iters\n"
+        data = "╰─ op  8ns    │ 30 ns   │  1.5 us │ 9ns     │ 100     │ 51200\n"
+        results = parse_divan_output(header + data)
+
+        self.assertEqual(len(results), 1)
+        self.assertEqual(results[0].fastest.value, 8)
+        self.assertEqual(results[0].slowest.value, 30)
+        self.assertEqual(results[0].median.value, 1500)
+        self.assertEqual(results[0].mean.value, 9)
+
+    def test_benchmark_named_like_column_header(self) -> None:
+        header = "stats        fastest  │ slowest  │ median   │ mean     │ samples │ iters\n"
+        data = "╰─ fastest_slowest_median  1.5 ms │ 1.7 ms │ 1.6 ms │ 1.6 ms │ 100 │ 100\n"
+        results = parse_divan_output(header + data)
+
+        self.assertEqual([r.name for r in results], ["stats/fastest_slowest_median"])
+
+    def test_arbitrary_depth(self) -> None:
+        lines = [
+            "sort              fastest │ slowest │ median │ mean   │ samples │ iters\n",
+            "├─ Vec<u8>                │         │        │        │         │\n",
+            "│  ├─ 10                  │         │        │        │         │\n",
+            "│  │  ├─ t=1    1 ns       │ 2 ns    │ 1 ns   │ 1 ns   │ 100     │ 100\n",
+            "│  │  ╰─ t=4    2 ns       │ 3 ns    │ 2 ns   │ 2 ns   │ 100     │ 100\n",
+            "│  ╰─ 1000     5 ns       │ 6 ns    │ 5 ns   │ 5 ns   │ 100     │ 100\n",
+            "├─ slice       7 ns       │ 8 ns    │ 7 ns   │ 7 ns   │ 100     │ 100\n",
+            "╰─ Vec<u16>               │         │        │        │         │\n",
+            "   ╰─ 10                  │         │        │        │         │\n",
+            "      ╰─ t=1    9 ns       │ 9 ns    │ 9 ns   │ 9 ns   │ 100     │ 100\n",
+        ]
+
+        names = [row[0] for row in iter_divan_rows(lines)]
+
+        self.assertEqual(
+            names,
+            [
+                "sort/Vec<u8>/10/t=1",
+                "sort/Vec<u8>/10/t=4",
+                "sort/Vec<u8>/1000",
+                "sort/slice",
+                "sort/Vec<u16>/10/t=1",
+            ],
+        )
+
     def test_no_benchmark_lines(self) -> None:
         content = "Timer precision: 41 ns\nSome random text\n"
         results = parse_divan_output(content)
@@ -100,5 +179,370 @@ class TestParseDivanOutput(unittest.TestCase):
             self.assertEqual(warnings, [], f"Unexpected warnings for {result.name}: {warnings}")
 
 
+class TestIterDivanResults(unittest.TestCase):
+    def test_matches_parse_divan_output(self) -> None:
+        content = (FIXTURES / "divan_output.txt").read_text()
+
+        with (FIXTURES / "divan_output.txt").open() as stream:
+            streamed = list(iter_divan_results(stream))
+
+        self.assertEqual(streamed, parse_divan_output(content))
+
+    def test_yields_before_input_is_exhausted(self) -> None:
+        lines = iter(
+            [
+                "parse        fastest  │ slowest  │ median   │ mean     │ samples │ iters\n",
+                "├─ parse_small  1.551 ms │ 1.738 ms │ 1.590 ms │ 1.599 ms │ 100     │ 100\n",
+                "├─ parse_medium  309.8 µs │ 453.3 µs │ 319.3 µs │ 321.8 µs │ 100     │ 100\n",
+                "╰─ parse_large  409.8 µs │ 553.3 µs │ 419.3 µs │ 421.8 µs │ 100     │ 100\n",
+            ]
+        )
+        results = iter_divan_results(lines)
+
+        # A result is complete once the next line shows it has no throughput line
+        first = next(results)
+        self.assertEqual(first.name, "parse/parse_small")
+        self.assertEqual(len(list(lines)), 1)
+
+    def test_line_parser_matches_iter_divan_rows(self) -> None:
+        with (FIXTURES / "divan_output.txt").open() as stream:
+            lines = stream.readlines()
+        parser = DivanLineParser()
+
+        fed = [row for row in map(parser.feed, lines) if row is not None]
+        fed.append(parser.close())
+
+        self.assertEqual(fed, list(iter_divan_rows(lines)))
+        self.assertEqual(parser.counters()["lines_scanned"], len(lines))
+        self.assertEqual(parser.counters()["results"], len(fed))
+
+
+class TestThroughput(unittest.TestCase):
+    LOG = (
+        "parse          fastest       │ slowest       │ median        │ mean          │ samples │ iters\n",
+        "├─ parse_u64   3.079 ns      │ 10.28 ns      │ 3.114 ns      │ 3.201 ns      │ 100     │ 204800\n",
+        "│              324.7 Mitem/s │ 97.22 Mitem/s │ 321.1 Mitem/s │ 312.3 Mitem/s │         │\n",
+        "├─ no_counter  8 ns          │ 9 ns          │ 8 ns          │ 8 ns          │ 100     │ 51200\n",
+        "╰─ copy        1.551 ms      │ 1.738 ms      │ 1.590 ms      │ 1.599 ms      │ 100     │ 100\n",
+        "               644.6 MB/s    │ 575.3 MB/s    │ 628.8 MB/s    │ 625.3 MB/s    │         │\n",
+        "               1.2 GiB/s     │ 1 GiB/s       │ 1.1 GiB/s     │ 1.1 GiB/s     │         │\n",
+    )
+
+    def test_parse_throughput_units(self) -> None:
+        cases = {
+            "644.6 MB/s": ("B/s", 644_600_000),
+            "1 KiB/s": ("B/s", 1024),
+            "324.7 Mitem/s": ("item/s", 324_700_000),
+            "88 char/s": ("char/s", 88),
+            "3.1 GHz": ("Hz", 3_100_000_000),
+            "1 Kitem/s": ("item/s", 1000),
+        }
+        for value, expected in cases.items():
+            with self.subTest(value=value):
+                self.assertEqual(parse_throughput(value), expected)
+        for value in ("1 KiHz", "1.5 ns", "MB/s", "fast MB/s"):
+            with self.subTest(value=value):
+                self.assertIsNone(parse_throughput(value))
+
+    def test_attached_to_results(self) -> None:
+        results = parse_divan_output("".join(self.LOG))
+
+        self.assertEqual([r.name for r in results], ["parse/parse_u64", "parse/no_counter", "parse/copy"])
+        self.assertEqual(
+            results[0].throughput, [Throughput("item/s", 324_700_000, 97_220_000, 321_100_000, 312_300_000)]
+        )
+        self.assertEqual(results[1].throughput, [])
+        self.assertEqual([t.unit for t in results[2].throughput], ["B/s", "B/s"])
+        self.assertEqual(results[2].throughput[1].fastest, round(1.2 * 2**30))
+        self.assertEqual(results[2].mean.value, 1_599_000)
+
+    def test_streaming_and_table_agree(self) -> None:
+        table = parse_divan_table(self.LOG)
+
+        self.assertEqual(list(table), list(iter_divan_results(self.LOG)))
+        self.assertEqual(list(table.sorted_by_name()), sorted(table, key=lambda result: result.name))
+
+    def test_json_round_trip(self) -> None:
+        table = parse_divan_table(self.LOG)
+        stream = io.StringIO()
+
+        table.write_json(stream)
+
+        document = {"results": [r.to_dict() for r in table], "metadata": {"namespace_binaries": False}}
+        self.assertEqual(stream.getvalue(), json.dumps(document, indent=2) + "\n")
+        entries = json.loads(stream.getvalue())["results"]
+        self.assertEqual([Throughput.from_dict(entry) for entry in entries[0]["throughput"]], table[0].throughput)
+        self.assertNotIn("throughput", entries[1])
+
+
+class TestWriteJsonArray(unittest.TestCase):
+    def test_matches_json_dumps(self) -> None:
+        results = parse_divan_output((FIXTURES / "divan_output.txt").read_text())
+        stream = io.StringIO()
+
+        write_json_array(results, stream)
+
+        self.assertEqual(stream.getvalue(), json.dumps([r.to_dict() for r in results], indent=2) + "\n")
+
+    def test_empty_results(self) -> None:
+        stream = io.StringIO()
+        write_json_array([], stream)
+        self.assertEqual(stream.getvalue(), "[]\n")
+
+
+class TestTeeMode(unittest.TestCase):
+    def test_tee_lines_echoes_unchanged(self) -> None:
+        lines = ["Timer precision: 41 ns\n", "no newline"]
+        stream = io.StringIO()
+
+        passed = list(tee_lines(lines, stream))
+
+        self.assertEqual(passed, lines)
+        self.assertEqual(stream.getvalue(), "".join(lines))
+
+    def test_write_ndjson(self) -> None:
+        results = parse_divan_output((FIXTURES / "divan_output.txt").read_text())
+        stream = io.StringIO()
+
+        write_ndjson(results, stream)
+
+        rows = [json.loads(line) for line in stream.getvalue().splitlines()]
+        self.assertEqual(rows, json.loads((FIXTURES / "parsed_results.json").read_text()))
+
+
+class TestResultTable(unittest.TestCase):
+    def test_rows_match_results(self) -> None:
+        content = (FIXTURES / "divan_output.txt").read_text()
+
+        table = parse_divan_table(content.splitlines())
+
+        self.assertEqual(len(table), 6)
+        self.assertEqual(list(table), parse_divan_output(content))
+
+    def test_column_access(self) -> None:
+        table = parse_divan_table((FIXTURES / "divan_output.txt").read_text().splitlines())
+
+        self.assertEqual(table.column("mean")[0], 1599000)
+        self.assertEqual(table.metric_values("iters")["transform/transform_large"], 100)
+
+    def test_missing_values(self) -> None:
+        header = "grp        fastest │ slowest │ median  │ mean    │ samples │ iters\n"
+        data = "╰─ op      8 ns    │ ?       │ 8 ns    │ 9 ns    │         │ 51200\n"
+        table = parse_divan_table([header, data])
+
+        self.assertIsNone(table[0].slowest.value)
+        self.assertIsNone(table[0].samples)
+        self.assertEqual(table.metric_values("slowest"), {"grp/op": None})
+
+    def test_write_json_matches_json_dumps(self) -> None:
+        content = (FIXTURES / "divan_output.txt").read_text()
+        table = parse_divan_table((content + '╰─ odd"name  8 ns │ │ 8 ns │ 9 ns │ │\n').splitlines())
+        stream = io.StringIO()
+
+        table.write_json(stream)
+
+        metadata = {"timer_precision": {"value": 41, "unit": "ns"}, "namespace_binaries": False}
+        document = {"results": [r.to_dict() for r in table], "metadata": metadata}
+        self.assertEqual(stream.getvalue(), json.dumps(document, indent=2) + "\n")
+
+    def test_write_json_empty(self) -> None:
+        stream = io.StringIO()
+        ResultTable().write_json(stream)
+        self.assertEqual(stream.getvalue(), '{\n  "results": [],\n  "metadata": {}\n}\n')
+
+
+class TestBinaryFormat(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.path = Path(self.tmp.name) / "results.bin"
+
+    def _write(self, table: ResultTable) -> None:
+        with self.path.open("wb") as stream:
+            table.write_binary(stream)
+
+    def test_round_trip_matches_json(self) -> None:
+        content = (FIXTURES / "divan_output.txt").read_text()
+        self._write(parse_divan_table(content.splitlines()))
+
+        table = ResultTable.read_binary(self.path)
+        stream = io.StringIO()
+        table.write_json(stream)
+
+        expected = json.loads((FIXTURES / "parsed_results.json").read_text())
+        self.assertEqual(json.loads(stream.getvalue())["results"], expected)
+
+    def test_round_trip_keeps_metadata(self) -> None:
+        table = parse_divan_table((FIXTURES / "divan_output.txt").read_text().splitlines())
+        table.metadata.host = HostFingerprint(cpu_model="Xeon", cores=8)
+        self._write(table)
+
+        metadata = ResultTable.read_binary(self.path).metadata
+        self.assertEqual(metadata, RunMetadata(41, table.metadata.host, namespace_binaries=False))
+        self.assertEqual(read_binary_metadata(self.path), metadata)
+
+    def test_reads_version_1_without_metadata(self) -> None:
+        table = parse_divan_table((FIXTURES / "divan_output.txt").read_text().splitlines())
+        self._write(table)
+        # Version 1 files end with the name table
+        data = bytearray(self.path.read_bytes())
+        _, _, _, row_count, names_offset, names_size = struct.unpack_from("<8sHHQQQ", data)
+        struct.pack_into("<H", data, 8, 1)
+        self.path.write_bytes(bytes(data[: names_offset + 8 * (row_count + 1) + names_size]))
+
+        self.assertEqual(list(ResultTable.read_binary(self.path)), list(table))
+        self.assertEqual(read_binary_metadata(self.path), RunMetadata())
+        self.assertEqual(read_binary_metric(self.path, "mean"), table.metric_values("mean"))
+
+    def test_read_single_metric(self) -> None:
+        content = (FIXTURES / "divan_output.txt").read_text() + "╰─ µ_op  8 ns │ │ 8 ns │ 9 ns │ │\n"
+        table = parse_divan_table(content.splitlines())
+        self._write(table)
+
+        self.assertEqual(read_binary_metric(self.path, "mean"), table.metric_values("mean"))
+        self.assertEqual(read_binary_metric(self.path, "samples")["transform/µ_op"], None)
+
+    def test_read_single_metric_duplicates_keep_last(self) -> None:
+        self._write(ResultTable.from_rows([("a", 1, 2, 3, 4, 5, 6), ("a", 7, 8, 9, 10, 11, 12)]))
+        duplicates: list[str] = []
+
+        self.assertEqual(read_binary_metric(self.path, "mean", duplicates), {"a": 10})
+        self.assertEqual(duplicates, ["a"])
+
+    def test_empty_table(self) -> None:
+        self._write(ResultTable())
+        self.assertEqual(len(ResultTable.read_binary(self.path)), 0)
+        self.assertEqual(read_binary_metric(self.path, "mean"), {})
+
+    def test_rejects_other_versions(self) -> None:
+        self._write(parse_divan_table((FIXTURES / "divan_output.txt").read_text().splitlines()))
+        data = bytearray(self.path.read_bytes())
+        struct.pack_into("<H", data, 8, BINARY_FORMAT_VERSION + 1)
+        self.path.write_bytes(bytes(data))
+
+        with self.assertRaisesRegex(ValueError, "version"):
+            read_binary_metric(self.path, "mean")
+
+    def test_rejects_json(self) -> None:
+        with self.assertRaisesRegex(ValueError, "not a binary result file"):
+            read_binary_metric(FIXTURES / "parsed_results.json", "mean")
+
+
+MULTI_BINARY_LOG = """\
+   Compiling bench v0.1.0 (/work/bench)
+     Running benches/alpha.rs (target/release/deps/alpha-0123456789abcdef)
+Timer precision: 41 ns
+parse        fastest  │ slowest  │ median   │ mean     │ samples │ iters
+╰─ small     1.551 ms │ 1.738 ms │ 1.590 ms │ 1.599 ms │ 100     │ 100
+     Running benches/beta.rs (target/release/deps/beta-fedcba9876543210)
+Timer precision: 20 ns
+parse        fastest  │ slowest  │ median   │ mean     │ samples │ iters
+╰─ small     2.551 ms │ 2.738 ms │ 2.590 ms │ 2.599 ms │ 100     │ 100
+"""
+
+
+class TestBenchBinarySections(unittest.TestCase):
+    def test_parse_running_line(self) -> None:
+        self.assertEqual(
+            parse_running_line("     Running benches/alpha.rs (target/release/deps/alpha-0123456789abcdef)"),
+            "alpha",
+        )
+        self.assertEqual(parse_running_line("     Running target/release/deps/beta-fedcba9876543210"), "beta")
+        self.assertIsNone(parse_running_line("parse        fastest  │ slowest"))
+
+    def test_names_without_namespace(self) -> None:
+        results = parse_divan_output(MULTI_BINARY_LOG)
+        self.assertEqual([r.name for r in results], ["parse/small", "parse/small"])
+
+    def test_names_with_namespace(self) -> None:
+        results = list(iter_divan_results(MULTI_BINARY_LOG.splitlines(), namespace_binaries=True))
+        self.assertEqual([r.name for r in results], ["alpha::parse/small", "beta::parse/small"])
+
+    def test_split_sections(self) -> None:
+        sections = list(split_sections(MULTI_BINARY_LOG.splitlines()))
+
+        self.assertEqual(len(sections), 3)
+        self.assertTrue(sections[1][0].strip().startswith("Running benches/alpha.rs"))
+        self.assertTrue(sections[2][0].strip().startswith("Running benches/beta.rs"))
+
+    def test_parallel_matches_serial(self) -> None:
+        lines = (FIXTURES / "divan_output.txt").read_text().splitlines() + MULTI_BINARY_LOG.splitlines()
+        expected = list(iter_divan_results(lines, namespace_binaries=True))
+
+        results = list(parse_sections(split_sections(lines), jobs=2, namespace_binaries=True))
+
+        self.assertEqual(results, expected)
+
+
+class TestRunMetadata(unittest.TestCase):
+    def test_parse_timer_precision(self) -> None:
+        self.assertEqual(parse_timer_precision("Timer precision: 41 ns\n"), 41)
+        self.assertEqual(parse_timer_precision("Timer precision: 1.5 µs"), 1500)
+        self.assertIsNone(parse_timer_precision("parse  fastest │ slowest"))
+
+    def test_coarsest_precision_kept(self) -> None:
+        lines = MULTI_BINARY_LOG.splitlines()
+        parser = DivanLineParser()
+        for line in lines:
+            parser.feed(line)
+        metadata = RunMetadata()
+
+        list(parse_sections(split_sections(lines), jobs=2, metadata=metadata))
+
+        expected = RunMetadata(41, namespace_binaries=False)
+        self.assertEqual(parse_divan_table(lines).metadata, expected)
+        self.assertEqual(parser.metadata, expected)
+        self.assertEqual(metadata, expected)
+        self.assertTrue(parse_divan_table(lines, namespace_binaries=True).metadata.namespace_binaries)
+
+    def test_document_written_while_streaming(self) -> None:
+        lines = (FIXTURES / "divan_output.txt").read_text().splitlines()
+        metadata = RunMetadata()
+        stream = io.StringIO()
+
+        write_json_document(iter_divan_results(lines, metadata=metadata), stream, metadata)
+
+        document = json.loads(stream.getvalue())
+        self.assertEqual(
+            document["metadata"], {"timer_precision": {"value": 41, "unit": "ns"}, "namespace_binaries": False}
+        )
+        self.assertEqual(document["results"], json.loads((FIXTURES / "parsed_results.json").read_text()))
+        self.assertEqual(RunMetadata.from_dict(document["metadata"]), metadata)
+
+    def test_host_round_trip(self) -> None:
+        metadata = RunMetadata(41, HostFingerprint(cpu_model="Xeon", cores=2, kernel="6.8.0"))
+        data = metadata.to_dict()
+
+        self.assertEqual(data["host"], {"cpu_model": "Xeon", "cores": 2, "kernel": "6.8.0"})
+        self.assertEqual(RunMetadata.from_dict(data), metadata)
+        merged = RunMetadata()
+        merged.update(RunMetadata(20))
+        merged.update(metadata)
+        self.assertEqual(merged, metadata)
+
+    def test_merge_keeps_every_host(self) -> None:
+        xeon = HostFingerprint(cpu_model="Xeon", cores=2, load_average=1.0)
+        epyc = HostFingerprint(cpu_model="EPYC", cores=64)
+        merged = RunMetadata()
+        for host in (xeon, epyc, HostFingerprint(cpu_model="Xeon", cores=2, load_average=3.0)):
+            merged.update(RunMetadata(host=host))
+
+        self.assertEqual(merged.hosts, [xeon, epyc])
+        self.assertEqual(merged.to_dict()["other_hosts"], [{"cpu_model": "EPYC", "cores": 64}])
+        self.assertEqual(RunMetadata.from_dict(merged.to_dict()), merged)
+
+    def test_invalid_metadata(self) -> None:
+        invalid = (
+            [],
+            {"timer_precision": "41 ns"},
+            {"timer_precision": {"value": 4.1}},
+            {"host": "ci"},
+            {"namespace_binaries": "yes"},
+        )
+        for data in invalid:
+            with self.subTest(data=data), self.assertRaises(ValueError):
+                RunMetadata.from_dict(data)
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,139 @@
+"""Tests for serve_divan module."""
+
+from __future__ import annotations
+
+import json
+import os
+import shutil
+import socket
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import serve_divan
+from compare_divan import generate_comparison, generate_markdown, load_metric_values
+from serve_divan import ComparisonServer, request_comparison
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+
+class TestComparisonServer(unittest.TestCase):
+    def setUp(self) -> None:
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.tmp = Path(tmp.name)
+        self.base = self.tmp / "base.json"
+        shutil.copy(FIXTURES / "base_benchmarks.json", self.base)
+        self.pr = str(FIXTURES / "pr_benchmarks.json")
+
+        self.socket = self.tmp / "divan.sock"
+        self.server = ComparisonServer(self.socket)
+        thread = threading.Thread(target=self.server.serve_forever)
+        thread.start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(thread.join)
+        self.addCleanup(self.server.shutdown)
+
+    def _expected(self) -> str:
+        comparisons = generate_comparison(load_metric_values(self.base, "mean"), load_metric_values(self.pr, "mean"))
+        return generate_markdown(comparisons, "Benchmarks")
+
+    def test_same_report_as_compare_divan(self) -> None:
+        markdown = request_comparison(self.socket, {"base": str(self.base), "pr": self.pr})
+
+        self.assertEqual(markdown, self._expected())
+
+    def test_baseline_stays_resident(self) -> None:
+        for _ in range(3):
+            request_comparison(self.socket, {"base": str(self.base), "pr": self.pr, "metric": "median"})
+
+        self.assertEqual(self.server.store.loads, 1)
+
+    def test_noise_floor_from_resident_metadata(self) -> None:
+        entries = json.loads(self.base.read_text())
+        metadata = {"timer_precision": {"value": 1_000_000, "unit": "ns"}}
+        self.base.write_text(json.dumps({"results": entries, "metadata": metadata}))
+        request = {"base": str(self.base), "pr": self.pr}
+
+        self.assertIn("❌", request_comparison(self.socket, request))
+        markdown = request_comparison(self.socket, {**request, "noise_floor": 1000})
+
+        self.assertIn("Changes of at most 1.000 s are within timer precision", markdown)
+        self.assertNotIn("❌", markdown)
+        self.assertEqual(self.server.store.loads, 1)
+
+    def test_baseline_reloaded_when_file_changes(self) -> None:
+        request_comparison(self.socket, {"base": str(self.base), "pr": self.pr})
+        entries = json.loads(self.base.read_text())
+        entries[0]["mean"]["value"] *= 2
+        self.base.write_text(json.dumps(entries))
+        os.utime(self.base, ns=(0, 0))
+
+        markdown = request_comparison(self.socket, {"base": str(self.base), "pr": self.pr})
+
+        self.assertEqual(markdown, self._expected())
+        self.assertEqual(self.server.store.loads, 2)
+
+    def test_errors_are_returned(self) -> None:
+        with self.assertRaisesRegex(RuntimeError, "not found"):
+            request_comparison(self.socket, {"base": str(self.tmp / "missing.json"), "pr": self.pr})
+        with self.assertRaisesRegex(RuntimeError, "Invalid request"):
+            request_comparison(self.socket, {"pr": self.pr})
+
+    def test_options_checked_as_by_compare_divan(self) -> None:
+        request = {"base": str(self.base), "pr": self.pr}
+        with self.assertRaisesRegex(RuntimeError, "^Error: --max-bytes must be at least 1024$"):
+            request_comparison(self.socket, {**request, "max_bytes": 100})
+        with self.assertRaisesRegex(RuntimeError, "^Error: --confidence must be between 0 and 100"):
+            request_comparison(self.socket, {**request, "confidence": 100})
+
+    def test_unreadable_pr_file_is_reported(self) -> None:
+        with self.assertRaisesRegex(RuntimeError, "^Error: .*Is a directory"):
+            request_comparison(self.socket, {"base": str(self.base), "pr": str(self.tmp)})
+
+        markdown = request_comparison(self.socket, {"base": str(self.base), "pr": self.pr})
+        self.assertEqual(markdown, self._expected())
+
+    def test_empty_or_invalid_reply_is_an_error(self) -> None:
+        for reply, message in ((b"", "without replying"), (b"{", "invalid reply"), (b"[]", "invalid reply")):
+            with self.subTest(reply=reply), socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as listener:
+                path = self.tmp / "fake.sock"
+                path.unlink(missing_ok=True)
+                listener.bind(str(path))
+                listener.listen()
+
+                def answer(listener: socket.socket = listener, reply: bytes = reply) -> None:
+                    connection, _ = listener.accept()
+                    with connection:
+                        while connection.recv(serve_divan.RECEIVE_SIZE):
+                            pass
+                        connection.sendall(reply)
+
+                thread = threading.Thread(target=answer)
+                thread.start()
+                with self.assertRaisesRegex(RuntimeError, message):
+                    request_comparison(path, {"base": str(self.base), "pr": self.pr})
+                thread.join()
+
+    def test_stalled_client_is_dropped(self) -> None:
+        with (
+            mock.patch.object(serve_divan, "REQUEST_TIMEOUT", 0.2),
+            socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as stalled,
+        ):
+            # Connects but never finishes its request
+            stalled.connect(str(self.socket))
+            stalled.sendall(b"{")
+            markdown = request_comparison(self.socket, {"base": str(self.base), "pr": self.pr})
+
+            self.assertEqual(markdown, self._expected())
+            self.assertEqual(stalled.recv(1), b"")
+
+    def test_refuses_running_server_socket(self) -> None:
+        with self.assertRaisesRegex(OSError, "Another server"):
+            ComparisonServer(self.socket)
+
+
+if __name__ == "__main__":
+    unittest.main()
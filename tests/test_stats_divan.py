@@ -0,0 +1,112 @@
+"""Tests for stats_divan module."""
+
+from __future__ import annotations
+
+import io
+import unittest
+from pathlib import Path
+
+import stats_divan
+from compare_divan import generate_comparison, generate_markdown, load_metric_values
+from parse_divan import ResultTable, parse_divan_table, read_input
+from stats_divan import PhaseStats, StatsHook, collect_stats, phase
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+
+class _RecordingHook(StatsHook):
+    def __init__(self) -> None:
+        self.phases: list[PhaseStats] = []
+        self.counters: list[tuple[str, dict[str, int]]] = []
+
+    def on_phase(self, stats: PhaseStats) -> None:
+        self.phases.append(stats)
+
+    def on_counters(self, phase: str, counters: dict[str, int]) -> None:
+        self.counters.append((phase, counters))
+
+
+class TestHooks(unittest.TestCase):
+    def setUp(self) -> None:
+        self.hook = _RecordingHook()
+        stats_divan.add_hook(self.hook)
+        self.addCleanup(stats_divan.remove_hook, self.hook)
+
+    def test_library_phases(self) -> None:
+        table = parse_divan_table(read_input(str(FIXTURES / "divan_output.txt")).splitlines())
+        table.write_json(io.StringIO())
+        values = load_metric_values(FIXTURES / "base_benchmarks.json", "mean")
+        generate_markdown(generate_comparison(values, values), "Benchmarks")
+
+        self.assertEqual(
+            [stats.name for stats in self.hook.phases],
+            ["read_input", "parse", "serialize", "load_benchmarks", "generate_comparison", "generate_markdown"],
+        )
+        self.assertTrue(all(stats.seconds >= 0 and stats.peak_bytes is None for stats in self.hook.phases))
+
+    def test_parse_counters(self) -> None:
+        parse_divan_table((FIXTURES / "divan_output.txt").read_text().splitlines())
+
+        self.assertEqual(
+            self.hook.counters,
+            [
+                (
+                    "parse",
+                    {
+                        "lines_scanned": 9,
+                        "tree_lines": 6,
+                        "header_lines": 2,
+                        "skipped_lines": 1,
+                        "results": 6,
+                        "subgroup_transitions": 0,
+                        "throughput_lines": 0,
+                    },
+                )
+            ],
+        )
+
+    def test_subgroup_transitions(self) -> None:
+        lines = [
+            "bench     fastest │ slowest │ median │ mean │ samples │ iters",
+            "╰─ sizes          │         │        │      │         │",
+            "   ├─ 1  1 ns     │ 1 ns    │ 1 ns   │ 1 ns │ 1       │ 1",
+        ]
+        self.assertEqual(len(parse_divan_table(lines)), 1)
+        self.assertEqual(self.hook.counters[0][1]["subgroup_transitions"], 1)
+
+    def test_removed_hook_gets_nothing(self) -> None:
+        stats_divan.remove_hook(self.hook)
+        self.addCleanup(stats_divan.add_hook, self.hook)
+
+        parse_divan_table((FIXTURES / "divan_output.txt").read_text().splitlines())
+
+        self.assertEqual(self.hook.phases, [])
+        self.assertEqual(self.hook.counters, [])
+
+
+class TestCollectStats(unittest.TestCase):
+    def test_nested_peaks(self) -> None:
+        with collect_stats() as collector, phase("outer"):
+            data = bytearray(1 << 20)
+            del data
+            with phase("inner"):
+                pass
+
+        self.assertGreaterEqual(collector.phases["outer"].peak_bytes, 1 << 20)
+        self.assertLess(collector.phases["inner"].peak_bytes, 1 << 20)
+
+    def test_report(self) -> None:
+        with collect_stats(trace_memory=False) as collector:
+            table = ResultTable.from_rows([("a", 1, 2, 3, 4, 5, 6)])
+            table.write_json(io.StringIO())
+            table.write_json(io.StringIO())
+            stats_divan.report_counters("parse", {"results": 1})
+            stats_divan.report_counters("parse", {"results": 2})
+
+        report = collector.format_report()
+        self.assertRegex(report, r"serialize +2 +[\d.]+ ms +N/A")
+        self.assertRegex(report, r"results +3\n")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,61 @@
+"""Tests for synth_divan module."""
+
+from __future__ import annotations
+
+import unittest
+
+from parse_divan import parse_divan_table, parse_time_to_ns
+from synth_divan import divan_log_lines, format_divan_time, synthetic_rows
+
+
+class TestFormatDivanTime(unittest.TestCase):
+    def test_four_significant_digits(self) -> None:
+        self.assertEqual(format_divan_time(1_816_000), "1.816 ms")
+        self.assertEqual(format_divan_time(710_100), "710.1 µs")
+        self.assertEqual(format_divan_time(42), "42.00 ns")
+        self.assertEqual(format_divan_time(None), "")
+
+    def test_parsed_values_round_trip(self) -> None:
+        for ns in (1_816_000, 710_100, 42, 12_345_678_901, 99_996):
+            parsed = parse_time_to_ns(format_divan_time(ns))
+            self.assertEqual(parse_time_to_ns(format_divan_time(parsed)), parsed)
+
+
+class TestSyntheticLog(unittest.TestCase):
+    def test_parses_to_generated_rows(self) -> None:
+        for count in (0, 1, 7, 41, 2000):
+            with self.subTest(count=count):
+                rows = list(synthetic_rows(count, seed=3))
+                table = parse_divan_table(divan_log_lines(rows))
+
+                self.assertEqual([table.row(index) for index in range(len(table))], rows)
+
+    def test_nested_subgroups_round_trip(self) -> None:
+        names = ["a/b/c/d/1", "a/b/c/d/2", "a/b/c/3", "a/b/4", "a/5", "a/e/6", "f/g/h/7"]
+        rows = [(name, 10 * index + 10, None, 9, 10, 100, 1) for index, name in enumerate(names)]
+
+        table = parse_divan_table(divan_log_lines(rows))
+
+        self.assertEqual([table.row(index) for index in range(len(table))], rows)
+
+    def test_realistic_shape(self) -> None:
+        rows = list(synthetic_rows(2000))
+        lines = list(divan_log_lines(rows))
+
+        self.assertTrue(any(line.lstrip().startswith("Compiling") for line in lines))
+        self.assertTrue(any(line.lstrip().startswith("Running") for line in lines))
+        self.assertTrue(any(line.startswith("│  ├─") for line in lines))
+        self.assertTrue(any(row[2] is None for row in rows))
+        self.assertTrue(any(row[5] is None and row[6] is None for row in rows))
+
+    def test_drift_changes_values_only(self) -> None:
+        base = list(synthetic_rows(100))
+        pr = list(synthetic_rows(100, drift=0.2))
+
+        self.assertEqual([row[0] for row in base], [row[0] for row in pr])
+        self.assertNotEqual([row[4] for row in base], [row[4] for row in pr])
+        self.assertEqual(base, list(synthetic_rows(100)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,48 @@
+"""Tests for tree_divan module."""
+
+from __future__ import annotations
+
+import itertools
+import unittest
+
+from tree_divan import NameTrie
+
+
+class TestNameTrie(unittest.TestCase):
+    def setUp(self) -> None:
+        names = ["sort/Vec<u8>/10/t=1", "sort/Vec<u8>/10/t=4", "sort/Vec<u8>/1000/t=1", "sort/slice/10", "hash"]
+        self.trie = NameTrie.from_items((name, index) for index, name in enumerate(names))
+
+    def test_find(self) -> None:
+        self.assertEqual(list(self.trie.find("sort/Vec<u8>").iter_values()), [0, 1, 2])
+        self.assertEqual(self.trie.find("hash").values, [4])
+        self.assertIsNone(self.trie.find("sort/Vec<u16>"))
+        self.assertIs(self.trie.find(""), self.trie)
+
+    def test_rollup_every_depth(self) -> None:
+        groups = self.trie.rollup(lambda value: [value], lambda lists: sorted(itertools.chain.from_iterable(lists)))
+
+        self.assertEqual(
+            groups,
+            [
+                ("sort", [0, 1, 2, 3]),
+                ("sort/Vec<u8>", [0, 1, 2]),
+                ("sort/Vec<u8>/10", [0, 1]),
+                ("sort/Vec<u8>/1000", [2]),
+                ("sort/slice", [3]),
+            ],
+        )
+
+    def test_rollup_max_depth(self) -> None:
+        groups = self.trie.rollup(lambda _: 1, sum, max_depth=2)
+
+        self.assertEqual(groups, [("sort", 4), ("sort/Vec<u8>", 3), ("sort/slice", 1)])
+
+    def test_name_that_is_also_a_group(self) -> None:
+        trie = NameTrie.from_items([("a/b", 1), ("a/b/c", 2)])
+
+        self.assertEqual(trie.rollup(lambda value: value, sum), [("a", 3), ("a/b", 3)])
+
+
+if __name__ == "__main__":
+    unittest.main()
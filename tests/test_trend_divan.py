@@ -0,0 +1,153 @@
+"""Tests for trend_divan module."""
+
+from __future__ import annotations
+
+import json
+import os
+import random
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import trend_divan
+from history_divan import HistoryStore, RunInfo
+from parse_divan import RESULT_COLUMNS
+from trend_divan import MetricSeries, find_change_points, generate_trend_markdown, load_series
+
+# Every SHIFTED_EVERY-th benchmark of the engine comparison is 20% slower from SHIFT_RUN on
+SHIFTED_EVERY = 3
+SHIFT_RUN = 25
+
+# Share of values missing from the series of the engine comparison
+MISSING_SHARE = 0.05
+
+# The NumPy parity tests are skipped without NumPy, except in CI (which sets CI),
+# where they fail instead so the vectorized engine is always covered there
+skip_without_numpy = unittest.skipIf(trend_divan.np is None and not os.environ.get("CI"), "NumPy is not installed")
+
+
+def _noisy(levels: list[float], seed: int, noise: float = 0.01) -> list[int | None]:
+    # Seeded for reproducible data; nothing here needs cryptographic randomness
+    rng = random.Random(seed)  # noqa: S311
+    return [round(level * (1 + rng.gauss(0, noise))) for level in levels]
+
+
+def _series(values: dict[str, list[int | None]]) -> MetricSeries:
+    return MetricSeries([f"run-{index}" for index in range(len(next(iter(values.values()))))], values)
+
+
+class TestFindChangePoints(unittest.TestCase):
+    def test_step_detected_where_it_began(self) -> None:
+        series = _series(
+            {
+                "slower": _noisy([1000.0] * 30 + [1100.0] * 20, seed=1),
+                "stable": _noisy([5000.0] * 50, seed=2),
+            }
+        )
+
+        change_points = find_change_points(series)
+
+        self.assertEqual([(point.name, point.run) for point in change_points], [("slower", 30)])
+        self.assertAlmostEqual(change_points[0].change_pct, 10, delta=1)
+
+    def test_creep_detected(self) -> None:
+        series = _series({"creep": _noisy([1000.0 * 1.01**index for index in range(40)], seed=3, noise=0.005)})
+
+        change_points = find_change_points(series)
+
+        self.assertTrue(change_points)
+        self.assertTrue(all(point.change_pct > 0 for point in change_points))
+
+    def test_missing_values_skipped(self) -> None:
+        values = _noisy([1000.0] * 20 + [2000.0] * 20, seed=4)
+        values[5] = values[20] = values[21] = None
+        series = _series({"gappy": values, "new": [None] * 35 + [10, 10, 10, 10, 10]})
+
+        change_points = find_change_points(series)
+
+        self.assertEqual([(point.name, point.run) for point in change_points], [("gappy", 22)])
+
+    def test_min_run_ignores_outliers(self) -> None:
+        values = _noisy([1000.0] * 40, seed=5)
+        values[20] = 3000
+        values[-2:] = [3000, 3000]
+        series = _series({"outlier": values})
+
+        self.assertEqual(find_change_points(series), [])
+        self.assertEqual([point.run for point in find_change_points(series, min_run=2)], [38])
+
+    @skip_without_numpy
+    def test_vectorized_matches_sequential(self) -> None:
+        self.assertIsNotNone(trend_divan.np, "NumPy is required in CI")
+        rng = random.Random(6)  # noqa: S311
+        values = {}
+        for index in range(40):
+            shifted = index % SHIFTED_EVERY == 0
+            levels = [1000.0 * (1.2 if shifted and run >= SHIFT_RUN else 1.0) for run in range(60)]
+            row = _noisy(levels, seed=index)
+            values[f"bench_{index}"] = [None if rng.random() < MISSING_SHARE else value for value in row]
+        series = _series(values)
+
+        vectorized = find_change_points(series)
+        with mock.patch.object(trend_divan, "np", None):
+            sequential = find_change_points(series)
+
+        self.assertEqual([(point.name, point.run) for point in vectorized], [(p.name, p.run) for p in sequential])
+        for fast, slow in zip(vectorized, sequential, strict=True):
+            self.assertAlmostEqual(fast.score, slow.score)
+            self.assertAlmostEqual(fast.after, slow.after)
+
+
+class TestTrendMarkdown(unittest.TestCase):
+    def test_reports_shift_with_run_label(self) -> None:
+        series = _series({"slower": _noisy([1000.0] * 10 + [1500.0] * 10, seed=7)})
+
+        markdown = generate_trend_markdown(find_change_points(series), series, "Trends")
+
+        self.assertIn("**1 sustained slowdown(s)** and **0 speedup(s)** detected", markdown)
+        self.assertIn("| `slower` | run-10 | 1.0", markdown)
+
+    def test_min_shift_hides_small_shifts(self) -> None:
+        series = _series({"slower": _noisy([1000.0] * 20 + [1010.0] * 20, seed=8, noise=0.0001)})
+        change_points = find_change_points(series)
+
+        self.assertTrue(change_points)
+        self.assertIn("No sustained shift of 2% or more", generate_trend_markdown(change_points, series, "Trends"))
+
+
+class TestLoadSeries(unittest.TestCase):
+    def setUp(self) -> None:
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.tmp = Path(tmp.name)
+
+    def test_files_oldest_first(self) -> None:
+        paths = []
+        for index, results in enumerate([[("a", 100)], [("a", 110), ("b", 5)]]):
+            path = self.tmp / f"run{index}.json"
+            path.write_text(json.dumps([{"name": name, "mean": value} for name, value in results]))
+            paths.append(str(path))
+
+        series = load_series(paths, "mean")
+
+        self.assertEqual(series.runs, ["run0.json", "run1.json"])
+        self.assertEqual(series.values, {"a": [100, 110], "b": [None, 5]})
+
+    def test_history_spec(self) -> None:
+        db = self.tmp / "bench.db"
+        with HistoryStore(db) as store:
+            for index in range(3):
+                run = RunInfo(f"run-{index}", f"{index}" * 40, "main", f"2026-01-0{index + 1}T00:00:00+00:00")
+                store.ingest(run, {column: {"a": 100 + index} for column in RESULT_COLUMNS})
+
+        series = load_series([f"history:{db}?branch=main&last=2"], "mean")
+
+        self.assertEqual(
+            series.runs, [f"{'1' * 12} (2026-01-02T00:00:00+00:00)", f"{'2' * 12} (2026-01-03T00:00:00+00:00)"]
+        )
+        self.assertEqual(series.values, {"a": [101, 102]})
+
+
+if __name__ == "__main__":
+    unittest.main()
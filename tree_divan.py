@@ -0,0 +1,110 @@
+"""Index benchmark names as a tree of groups.
+
+Divan names a benchmark by its path through nested groups, such as
+"sort/Vec<u8>/1000/t=4", and a large suite has thousands of leaves below a
+handful of groups. NameTrie indexes values (e.g. comparisons) by the
+segments of their names, so aggregates of every group can be computed in a
+single bottom-up pass instead of one scan of all names per group.
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterable, Iterator, Sequence
+
+# Separates the groups of a benchmark name, and the benchmark itself
+NAME_SEPARATOR = "/"
+
+
+class NameTrie[T]:
+    """Values keyed by benchmark name, one node per name segment.
+
+    A node holds the values whose name ends there, and its children by
+    segment; a node with children is a group.
+    """
+
+    def __init__(self) -> None:
+        """Create an empty trie."""
+        self.children: dict[str, NameTrie[T]] = {}
+        self.values: list[T] = []
+
+    @classmethod
+    def from_items(cls, items: Iterable[tuple[str, T]]) -> NameTrie[T]:
+        """Build a trie from (name, value) pairs."""
+        trie = cls()
+        for name, value in items:
+            trie.insert(name, value)
+        return trie
+
+    def insert(self, name: str, value: T) -> None:
+        """Add a value under name."""
+        node = self
+        for segment in name.split(NAME_SEPARATOR):
+            child = node.children.get(segment)
+            if child is None:
+                child = node.children[segment] = NameTrie()
+            node = child
+        node.values.append(value)
+
+    def find(self, path: str) -> NameTrie[T] | None:
+        """Return the node of a group or benchmark name, or None if there is none."""
+        node = self
+        for segment in path.split(NAME_SEPARATOR) if path else ():
+            node = node.children.get(segment)
+            if node is None:
+                return None
+        return node
+
+    def iter_values(self) -> Iterator[T]:
+        """Yield every value in this subtree, children in name order."""
+        yield from self.values
+        for segment in sorted(self.children):
+            yield from self.children[segment].iter_values()
+
+    def rollup[S](
+        self,
+        leaf: Callable[[T], S],
+        merge: Callable[[Sequence[S]], S],
+        *,
+        max_depth: int | None = None,
+    ) -> list[tuple[str, S]]:
+        """Aggregate the values below every group in one bottom-up pass.
+
+        Each value is turned into an aggregate by leaf, and the aggregates
+        of a node's own values and children are combined by merge, so every
+        value is visited once whatever the depth of the tree.
+
+        Args:
+            leaf: Aggregate of a single value.
+            merge: Combination of several aggregates.
+            max_depth: Deepest group reported (1 for top-level groups), or
+                None for all; deeper groups are still aggregated.
+
+        Returns:
+            (path, aggregate) of every group down to max_depth, each group
+            before its subgroups, siblings in name order.
+
+        """
+        groups: list[tuple[str, S]] = []
+
+        def visit(node: NameTrie[T], path: str, depth: int) -> S:
+            if not node.children and len(node.values) == 1:
+                return leaf(node.values[0])
+            slot = None
+            if node.children and path and (max_depth is None or depth <= max_depth):
+                # Reserve the group's place ahead of its subgroups
+                slot = len(groups)
+                groups.append((path, None))
+            aggregates = [leaf(value) for value in node.values]
+            for segment in sorted(node.children):
+                child_path = f"{path}{NAME_SEPARATOR}{segment}" if path else segment
+                aggregates.append(visit(node.children[segment], child_path, depth + 1))
+            aggregate = merge(aggregates)
+            if slot is not None:
+                groups[slot] = (path, aggregate)
+            return aggregate
+
+        visit(self, "", 0)
+        return groups
@@ -0,0 +1,436 @@
+#!/usr/bin/env python3
+"""Detect sustained shifts across a series of benchmark runs.
+
+A pairwise comparison only sees the change since its base: a benchmark
+getting 1% slower with every merge passes every report while creeping 20%
+slower over a quarter. This script takes a time-ordered series of runs
+(result files, or runs from a history database) and looks for change points
+in each benchmark's series, reporting the run where each sustained shift
+began.
+
+Change points are found by binary segmentation with a CUSUM statistic on
+log values, after a running median removes outlier runs: the split of a segment that best separates its mean before and
+after, scaled by the benchmark's noise, is kept if it is significant, and
+both halves are searched again. With NumPy, the statistic is computed for
+every split of every benchmark at once.
+"""
+
+from __future__ import annotations
+
+import argparse
+import itertools
+import math
+import statistics
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from compare_divan import (
+    TIMED_METRICS,
+    ComparisonThresholds,
+    expand_base_specs,
+    format_time,
+    get_change_indicator,
+    load_metric_values,
+)
+from history_divan import HistoryError, load_history_series, parse_history_spec
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; detection falls back to pure Python
+    np = None
+
+if TYPE_CHECKING:
+    from collections.abc import Sequence
+
+# Minimum standardized shift (CUSUM statistic) for a split to be significant
+DEFAULT_THRESHOLD = 6.0
+
+# Minimum number of runs on each side of a change point; shorter excursions
+# are outliers, smoothed away by a running median before segmentation
+DEFAULT_MIN_RUN = 3
+
+# Shifts smaller than this (in %) are not reported, even if significant
+DEFAULT_MIN_SHIFT = 2.0
+
+# Scales the median absolute deviation to a standard deviation for normal noise
+MAD_TO_STDEV = 1.4826
+
+# Smallest noise assumed, in log units (0.1%), so perfectly stable series
+# do not make every tiny shift infinitely significant
+MIN_NOISE = 1e-3
+
+# Elements of the split statistic computed at once by the vectorized engine
+VECTORIZED_CHUNK_ELEMENTS = 1 << 20
+
+# Length of commit hashes in run labels from a history database
+SHORT_SHA_LENGTH = 12
+
+
+@dataclass
+class MetricSeries:
+    """Values of one metric for every benchmark across a series of runs."""
+
+    # Label of each run, oldest first
+    runs: list[str]
+    # Each benchmark's values, one per run, None where a run did not measure it
+    values: dict[str, list[int | None]]
+
+
+@dataclass
+class ChangePoint:
+    """A sustained shift in the series of a benchmark."""
+
+    name: str
+    # Index of the first run after the shift
+    run: int
+    # Geometric means of the values before and after the shift
+    before: float
+    after: float
+    # Standardized size of the shift (see DEFAULT_THRESHOLD)
+    score: float
+
+    @property
+    def change_pct(self) -> float:
+        """Change from before to after the shift, in percent."""
+        return (self.after / self.before - 1) * 100
+
+
+def load_file_series(paths: Sequence[str | Path], metric: str) -> MetricSeries:
+    """Load a metric from result files given oldest first, each one run.
+
+    Raises:
+        SystemExit: If a file cannot be loaded (the error is printed to stderr).
+
+    """
+    values: dict[str, list[int | None]] = {}
+    for position, path in enumerate(paths):
+        for name, value in load_metric_values(path, metric).items():
+            series = values.get(name)
+            if series is None:
+                series = values[name] = [None] * len(paths)
+            series[position] = value
+    return MetricSeries([Path(path).name for path in paths], values)
+
+
+def load_series(specs: Sequence[str], metric: str) -> MetricSeries:
+    """Load a series from result files, or from a single history spec.
+
+    A history spec such as "history:bench.db?branch=main&last=100" gives
+    the selected runs, oldest first, labelled by commit and time.
+
+    Raises:
+        SystemExit: If an input cannot be loaded (the error is printed to stderr).
+
+    """
+    try:
+        history = parse_history_spec(specs[0]) if len(specs) == 1 else None
+        if history is None:
+            return load_file_series(specs, metric)
+        runs, values = load_history_series(history, metric)
+    except (ValueError, HistoryError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+    return MetricSeries([f"{run.commit[:SHORT_SHA_LENGTH]} ({run.timestamp})" for run in runs], values)
+
+
+def _log_series(values: list[int | None]) -> list[float | None]:
+    """Take the log of positive values, so shifts are relative; others are missing."""
+    return [math.log(value) if value is not None and value > 0 else None for value in values]
+
+
+def _noise_level(logs: list[float | None]) -> float | None:
+    """Estimate the noise of a series from its successive differences.
+
+    A shift only affects one difference, so the median absolute deviation
+    of the differences estimates the noise even across change points.
+    """
+    differences = [b - a for a, b in itertools.pairwise(logs) if a is not None and b is not None]
+    if len(differences) < 2:  # noqa: PLR2004
+        return None
+    center = statistics.median(differences)
+    spread = statistics.median([abs(difference - center) for difference in differences])
+    return max(spread * MAD_TO_STDEV / math.sqrt(2), MIN_NOISE)
+
+
+def _median_filter_sequential(logs: list[float | None], half_width: int) -> list[float | None]:
+    """Replace each value by the median of a window of 2 * half_width + 1 measured values around it.
+
+    Windows are shifted to stay within the series, so an excursion at
+    either end is smoothed like one in the middle. A series shorter than a
+    window takes the upper median of all its values.
+    """
+    positions = [position for position, value in enumerate(logs) if value is not None]
+    present = [logs[position] for position in positions]
+    width = 2 * half_width + 1
+    last_start = max(0, len(present) - width)
+    filtered: list[float | None] = [None] * len(logs)
+    for index, position in enumerate(positions):
+        start = min(max(0, index - half_width), last_start)
+        window = sorted(present[start : start + width])
+        filtered[position] = window[len(window) // 2]
+    return filtered
+
+
+def _median_filter_vectorized(logs: np.ndarray, half_width: int) -> np.ndarray:
+    """Apply _median_filter_sequential to every row of logs, NaN where values are missing."""
+    missing = np.isnan(logs)
+    width = 2 * half_width + 1
+    length = max(logs.shape[1], width)
+    filtered = np.full_like(logs, np.nan)
+    chunk = max(1, VECTORIZED_CHUNK_ELEMENTS // (length * width))
+    for offset in range(0, len(logs), chunk):
+        rows = slice(offset, offset + chunk)
+        # Measured values first, in order, so a window spans measured neighbours only
+        order = np.argsort(missing[rows], axis=1, kind="stable")
+        packed = np.take_along_axis(logs[rows], order, axis=1)
+        packed = np.pad(packed, ((0, 0), (0, length - logs.shape[1])), constant_values=np.nan)
+        windows = np.sort(np.lib.stride_tricks.sliding_window_view(packed, width, axis=1), axis=2)
+        medians = np.take_along_axis(windows, ((~np.isnan(windows)).sum(axis=2) // 2)[..., None], axis=2)[..., 0]
+        last_starts = np.maximum(0, (~missing[rows]).sum(axis=1) - width)[:, None]
+        starts = np.minimum(np.maximum(0, np.arange(logs.shape[1]) - half_width), last_starts)
+        np.put_along_axis(filtered[rows], order, np.take_along_axis(medians, starts, axis=1), axis=1)
+    filtered[missing] = np.nan
+    return filtered
+
+
+def _best_splits_sequential(
+    logs: list[list[float | None]],
+    noise: list[float],
+    segments: list[tuple[int, int, int]],
+    min_run: int,
+) -> list[tuple[int, float, float, float]]:
+    """Find the best split of each (row, start, end) segment, in pure Python.
+
+    Returns:
+        (split, score, mean before, mean after) of each segment, with a
+        score of -1 if no split leaves min_run values on both sides.
+
+    """
+    best_splits = []
+    for row, start, end in segments:
+        series = logs[row]
+        counts = [0, *itertools.accumulate(value is not None for value in series)]
+        sums = [0.0, *itertools.accumulate(0.0 if value is None else value for value in series)]
+        best = (start, -1.0, 0.0, 0.0)
+        for split in range(start + 1, end):
+            before, after = counts[split] - counts[start], counts[end] - counts[split]
+            if series[split] is None or before < min_run or after < min_run:
+                continue
+            mean_before = (sums[split] - sums[start]) / before
+            mean_after = (sums[end] - sums[split]) / after
+            score = abs(mean_after - mean_before) * math.sqrt(before * after / (before + after)) / noise[row]
+            if score > best[1]:
+                best = (split, score, mean_before, mean_after)
+        best_splits.append(best)
+    return best_splits
+
+
+def _best_splits_vectorized(
+    logs: np.ndarray,
+    noise: np.ndarray,
+    segments: list[tuple[int, int, int]],
+    min_run: int,
+) -> list[tuple[int, float, float, float]]:
+    """Find the best split of each segment with NumPy, every candidate split at once.
+
+    Gives the same results as _best_splits_sequential, for logs with NaN
+    where values are missing. Segments are processed in chunks of at most
+    VECTORIZED_CHUNK_ELEMENTS candidate splits.
+    """
+    present = ~np.isnan(logs)
+    width = logs.shape[1] + 1
+    counts = np.zeros((len(logs), width), dtype=np.int64)
+    sums = np.zeros((len(logs), width))
+    np.cumsum(present, axis=1, out=counts[:, 1:])
+    np.cumsum(np.where(present, logs, 0.0), axis=1, out=sums[:, 1:])
+    # A split at the end of a series is never valid, so the padding is never read as present
+    splittable = np.zeros((len(logs), width), dtype=bool)
+    splittable[:, :-1] = present
+
+    best_splits: list[tuple[int, float, float, float]] = []
+    chunk = max(1, VECTORIZED_CHUNK_ELEMENTS // width)
+    candidates = np.arange(width)
+    for offset in range(0, len(segments), chunk):
+        rows, starts, ends = (np.array(column) for column in zip(*segments[offset : offset + chunk], strict=True))
+        index = np.arange(len(rows))
+        row_counts, row_sums = counts[rows], sums[rows]
+        before = row_counts - row_counts[index, starts][:, None]
+        after = row_counts[index, ends][:, None] - row_counts
+        valid = (
+            splittable[rows]
+            & (candidates > starts[:, None])
+            & (candidates < ends[:, None])
+            & (before >= min_run)
+            & (after >= min_run)
+        )
+        with np.errstate(divide="ignore", invalid="ignore"):
+            mean_before = (row_sums - row_sums[index, starts][:, None]) / before
+            mean_after = (row_sums[index, ends][:, None] - row_sums) / after
+            weights = np.sqrt(before * after / (before + after))
+            scores = np.abs(mean_after - mean_before) * weights / noise[rows][:, None]
+        scores = np.where(valid, scores, -1.0)
+        splits = np.where(valid.any(axis=1), scores.argmax(axis=1), starts)
+        best_splits.extend(
+            zip(
+                splits.tolist(),
+                scores[index, splits].tolist(),
+                np.where(valid.any(axis=1), mean_before[index, splits], 0.0).tolist(),
+                np.where(valid.any(axis=1), mean_after[index, splits], 0.0).tolist(),
+                strict=True,
+            )
+        )
+    return best_splits
+
+
+def find_change_points(
+    series: MetricSeries,
+    *,
+    threshold: float = DEFAULT_THRESHOLD,
+    min_run: int = DEFAULT_MIN_RUN,
+) -> list[ChangePoint]:
+    """Find the sustained shifts in the series of every benchmark.
+
+    Each series is first smoothed by a running median over 2 * min_run - 1
+    measured runs, which removes excursions shorter than min_run but keeps
+    steps. Every benchmark starts as one segment covering all runs. Each round
+    finds the best split of every remaining segment at once; a split whose
+    score exceeds threshold is a change point, and the segments on both of
+    its sides go to the next round. A shift is measured between the
+    segments it separated when it was found, so a slow creep is reported
+    at the run where its cumulated shift is the most significant.
+
+    Args:
+        series: Values of every benchmark across the runs, oldest first.
+        threshold: Minimum score of a change point (see DEFAULT_THRESHOLD).
+        min_run: Minimum number of measured runs on each side of a change point.
+
+    Returns:
+        The change points, by benchmark name then run.
+
+    """
+    names = sorted(series.values)
+    logs = [_log_series(series.values[name]) for name in names]
+    noise = [_noise_level(row) for row in logs]
+    # Series too short to estimate their noise cannot be tested
+    segments = [(row, 0, len(series.runs)) for row in range(len(names)) if noise[row] is not None]
+
+    if np is not None and segments:
+        logs_array = _median_filter_vectorized(np.array(logs, dtype=float), min_run - 1)
+        noise_array = np.array([level or 0.0 for level in noise])
+
+        def best_splits(segments: list[tuple[int, int, int]]) -> list[tuple[int, float, float, float]]:
+            return _best_splits_vectorized(logs_array, noise_array, segments, min_run)
+
+    else:
+        logs = [_median_filter_sequential(row, min_run - 1) for row in logs]
+
+        def best_splits(segments: list[tuple[int, int, int]]) -> list[tuple[int, float, float, float]]:
+            return _best_splits_sequential(logs, noise, segments, min_run)
+
+    change_points: list[ChangePoint] = []
+    while segments:
+        next_segments = []
+        for (row, start, end), (split, score, mean_before, mean_after) in zip(
+            segments, best_splits(segments), strict=True
+        ):
+            if score > threshold:
+                change_points.append(ChangePoint(names[row], split, math.exp(mean_before), math.exp(mean_after), score))
+                next_segments += [(row, start, split), (row, split, end)]
+        segments = next_segments
+
+    change_points.sort(key=lambda point: (point.name, point.run))
+    return change_points
+
+
+def generate_trend_markdown(
+    change_points: list[ChangePoint],
+    series: MetricSeries,
+    title: str,
+    thresholds: ComparisonThresholds | None = None,
+    *,
+    min_shift: float = DEFAULT_MIN_SHIFT,
+) -> str:
+    """Generate a markdown report of the shifts found by find_change_points.
+
+    Args:
+        change_points: Change points to report.
+        series: The series they were found in, for run labels.
+        title: Title for the report header.
+        thresholds: Thresholds for change indicators, as in compare_divan.
+        min_shift: Smallest shift reported, in percent.
+
+    Returns:
+        Markdown-formatted report string, slowdowns first.
+
+    """
+    if thresholds is None:
+        thresholds = ComparisonThresholds()
+    shifts = [point for point in change_points if abs(point.change_pct) >= min_shift]
+    slowdowns = sorted((point for point in shifts if point.change_pct > 0), key=lambda point: -point.change_pct)
+    speedups = sorted((point for point in shifts if point.change_pct < 0), key=lambda point: point.change_pct)
+
+    lines = [
+        f"## {title}",
+        "",
+        f"<sub>{len(series.runs)} run(s) from {series.runs[0]} to {series.runs[-1]}, "
+        f"{len(series.values)} benchmark(s)</sub>"
+        if series.runs
+        else "<sub>No runs</sub>",
+        "",
+    ]
+    if not shifts:
+        lines.append(f"No sustained shift of {min_shift:g}% or more detected.")
+        return "\n".join(lines)
+
+    lines.append(f"**{len(slowdowns)} sustained slowdown(s)** and **{len(speedups)} speedup(s)** detected")
+    lines.append("")
+    lines.append("| Benchmark | Since | Before | After | Change |")
+    lines.append("|-----------|-------|--------|-------|--------|")
+    for point in slowdowns + speedups:
+        change = f"{point.change_pct:+.1f}% {get_change_indicator(point.change_pct, thresholds)}".rstrip()
+        lines.append(
+            f"| `{point.name}` | {series.runs[point.run]} | {format_time(round(point.before))} | "
+            f"{format_time(round(point.after))} | {change} |"
+        )
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Detect sustained shifts across a time-ordered series of benchmark runs.",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument(
+        "series",
+        nargs="+",
+        help="Result files (JSON or binary), oldest first, or a quoted glob of them; "
+        "or a single history spec like history:bench.db?branch=main&last=100",
+    )
+    parser.add_argument("--title", default="Benchmark trends", help="Title for the report header")
+    parser.add_argument("--metric", default="mean", choices=TIMED_METRICS, help="Metric to track")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=DEFAULT_THRESHOLD,
+        help="Minimum standardized size of a shift: its size in units of the benchmark's run-to-run noise, "
+        "scaled by the square root of the runs it is measured over",
+    )
+    parser.add_argument(
+        "--min-run", type=int, default=DEFAULT_MIN_RUN, help="Minimum number of runs on each side of a shift"
+    )
+    parser.add_argument("--min-shift", type=float, default=DEFAULT_MIN_SHIFT, help="Smallest shift reported (in %%)")
+    parser.add_argument("-o", "--output", help="Output file")
+
+    args = parser.parse_args()
+    if args.min_run < 1:
+        parser.error("--min-run must be at least 1")
+
+    series = load_series(expand_base_specs(args.series), args.metric)
+    change_points = find_change_points(series, threshold=args.threshold, min_run=args.min_run)
+    markdown = generate_trend_markdown(change_points, series, args.title, min_shift=args.min_shift)
+    if args.output:
+        Path(args.output).write_text(markdown)
+    else:
+        print(markdown)